@@ -0,0 +1,64 @@
+# benchmarks/conflict_classification.py
+#
+# Usage: python -m benchmarks.conflict_classification [--legacy-limit N]
+
+import os
+import time
+import random
+import argparse
+from collections import defaultdict
+from logic.conflict_analysis import IGNORED_FILES, classify_conflicts
+
+SIZES = [10_000, 50_000, 100_000, 250_000, 500_000, 1_000_000]
+FOLDERS = ["common/traits", "common/decisions", "common/on_action", "events", "gfx/interface", "localization/english"]
+
+def legacy_classify_conflicts(file_paths):
+    # The per-path rescan ConflictFinder used to do
+    red_conflicts = {}
+    yellow_conflicts = {}
+    for path, mods in file_paths.items():
+        if os.path.basename(path) in IGNORED_FILES:
+            pass
+        elif len(mods) > 1:
+            conflicting_paths = [file_path for file_path in file_paths if os.path.basename(file_path) == os.path.basename(path)]
+            if any(os.path.dirname(file_path) == os.path.dirname(path) for file_path in conflicting_paths):
+                red_conflicts[path] = mods
+            else:
+                yellow_conflicts[path] = mods
+    return red_conflicts, yellow_conflicts
+
+def generate_file_paths(num_files, num_mods=30, overlap=0.05, seed=0):
+    rng = random.Random(seed)
+    file_paths = defaultdict(list)
+    for i in range(num_files):
+        path = os.path.join(rng.choice(FOLDERS), f"file_{i % (num_files // 4 + 1)}_{i}.txt")
+        file_paths[path].append(str(rng.randrange(num_mods)))
+        if rng.random() < overlap:
+            file_paths[path].append(str(rng.randrange(num_mods)))
+    return file_paths
+
+def measure(func, *args):
+    start = time.perf_counter()
+    result = func(*args)
+    return time.perf_counter() - start, result
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark conflict classification from 10k to 1M files")
+    parser.add_argument("--legacy-limit", type=int, default=20_000, help="largest input the quadratic version is run on")
+    args = parser.parse_args()
+
+    print(f"{'files':>10} {'conflicts':>10} {'current, s':>12} {'legacy, s':>12}")
+    for num_files in SIZES:
+        file_paths = generate_file_paths(num_files)
+        current_time, result = measure(classify_conflicts, file_paths)
+        legacy_display = "skipped"
+        if num_files <= args.legacy_limit:
+            legacy_time, legacy_result = measure(legacy_classify_conflicts, file_paths)
+            if legacy_result != result:
+                raise SystemExit(f"Results differ at {num_files} files")
+            legacy_display = f"{legacy_time:.3f}"
+        conflicts = len(result[0]) + len(result[1])
+        print(f"{num_files:>10} {conflicts:>10} {current_time:>12.3f} {legacy_display:>12}")
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,153 @@
+# benchmarks/generate_library.py
+#
+# Builds a fake Crusader Kings III documents folder: mod/<id>.mod descriptors, mod/<id>/ folders with
+# game files and localization, dlc_load.json and an old style profiles.ini.
+# Usage: python -m benchmarks.generate_library DIR [--mods 500] [--files 40] [--overlap 0.2] ...
+
+import os
+import json
+import random
+import argparse
+import configparser
+from typing import Dict, List, Sequence
+
+# Folders mods usually touch, with the extension of the files in them
+GAME_FOLDERS = [
+    ("common/traits", ".txt"), ("common/decisions", ".txt"), ("common/on_action", ".txt"),
+    ("common/scripted_effects", ".txt"), ("common/culture/cultures", ".txt"), ("common/landed_titles", ".txt"),
+    ("events", ".txt"), ("history/characters", ".txt"), ("gui", ".gui"), ("gfx/interface/icons/traits", ".dds"),
+]
+# Shared files many mods override, so overlapping mods collide on exactly these paths
+SHARED_POOL_SIZE = 200
+LOCALIZATION_KEYS = 60
+MOD_ID_START = 2000000000
+
+def mod_folder_name(index: int) -> str:
+    return str(MOD_ID_START + index)
+
+def write_file(file_path: str, content: str, encoding: str = 'utf-8') -> None:
+    os.makedirs(os.path.dirname(file_path), exist_ok=True)
+    with open(file_path, 'w', encoding=encoding) as f:
+        f.write(content)
+
+def shared_paths(rng: random.Random) -> List[str]:
+    paths = []
+    for number in range(SHARED_POOL_SIZE):
+        folder, extension = rng.choice(GAME_FOLDERS)
+        paths.append(f"{folder}/00_shared_{number}{extension}")
+    # Same file names in other folders: separate paths to the game, so they only conflict where they are shared too
+    for number in range(0, SHARED_POOL_SIZE, 10):
+        folder, extension = rng.choice(GAME_FOLDERS)
+        paths.append(f"{folder}/00_shared_{number}{extension}")
+    return paths
+
+def write_localization(mod_path: str, mod_key: str, languages: Sequence[str], rng: random.Random) -> None:
+    # english is complete; every other language is translated, partly translated, left in english or missing
+    keys = [f"{mod_key}_key_{number}" for number in range(LOCALIZATION_KEYS)]
+    for language in languages:
+        if language == "english":
+            entries = [(key, f"English text {number}") for number, key in enumerate(keys)]
+        else:
+            state = rng.choice(("translated", "partial", "identical", "missing"))
+            if state == "missing":
+                continue
+            entries = []
+            for number, key in enumerate(keys):
+                if state == "partial" and number % 3 == 0:
+                    continue
+                text = f"English text {number}" if state == "identical" else f"{language} text {number}"
+                entries.append((key, text))
+        lines = [f"l_{language}:"] + [f' {key}:0 "{text}"' for key, text in entries]
+        write_file(os.path.join(mod_path, 'localization', language, f"{mod_key}_l_{language}.yml"),
+                   "\n".join(lines) + "\n", encoding='utf-8-sig')
+
+def generate_library(root: str, mods: int = 500, files_per_mod: int = 40, overlap: float = 0.2,
+                     languages: Sequence[str] = ("english", "russian"), enabled_ratio: float = 0.6,
+                     profiles: int = 20, seed: int = 0) -> Dict[str, str]:
+    # overlap is the share of each mod's files taken from the shared pool. Returns the paths ModOperations takes.
+    rng = random.Random(seed)
+    mods_directory = os.path.join(root, 'mod')
+    os.makedirs(mods_directory, exist_ok=True)
+    pool = shared_paths(rng)
+
+    mod_files = []
+    for index in range(mods):
+        folder = mod_folder_name(index)
+        mod_path = os.path.join(mods_directory, folder)
+        descriptor = (f'version="1.{index % 10}"\ntags={{\n\t"Gameplay"\n}}\nname="Synthetic Mod {index}"\n'
+                      f'supported_version="1.12.*"\nremote_file_id="{folder}"\n')
+        write_file(os.path.join(mod_path, 'descriptor.mod'), descriptor)
+        write_file(os.path.join(mods_directory, f"{folder}.mod"), descriptor + f'path="mod/{folder}"\n')
+
+        for number in range(files_per_mod):
+            content = f"mod{index}_object_{number} = {{\n\tvalue = {rng.randint(0, 1000)}\n}}\n"
+            if rng.random() < overlap:
+                pool_index = rng.randrange(len(pool))
+                rel_path = pool[pool_index]
+                # Every fourth shared file is byte-identical in all mods, for the identical override check
+                if pool_index % 4 == 0:
+                    content = "shared = yes\n"
+            else:
+                game_folder, extension = rng.choice(GAME_FOLDERS)
+                rel_path = f"{game_folder}/mod{index}_{number}{extension}"
+            write_file(os.path.join(mod_path, rel_path), content)
+        write_localization(mod_path, f"mod{index}", languages, rng)
+        mod_files.append(f"mod/{folder}.mod")
+
+    enabled_mods = [mod_file for mod_file in mod_files if rng.random() < enabled_ratio]
+    with open(os.path.join(root, 'dlc_load.json'), 'w', encoding='utf-8') as f:
+        json.dump({"disabled_dlcs": [], "enabled_mods": enabled_mods}, f, indent=4)
+
+    # Old style profiles: JSON strings inside profiles.ini, as ModOperations used to write them
+    config = configparser.ConfigParser()
+    for number in range(profiles):
+        profile_mods = [mod_file for mod_file in mod_files if rng.random() < enabled_ratio]
+        group_size = max(1, len(profile_mods) // 4)
+        groups = {
+            f"Group {group}": [mod_file[len("mod/"):] for mod_file in profile_mods[group * group_size:(group + 1) * group_size]]
+            for group in range(4)
+        }
+        config[f"Playset {number}"] = {
+            "enabled_mods": json.dumps({mod_file: True for mod_file in profile_mods}),
+            "groups": json.dumps(groups),
+        }
+    with open(os.path.join(root, 'profiles.ini'), 'w', encoding='utf-8') as f:
+        config.write(f)
+
+    return {
+        "mods_directory": mods_directory,
+        "dlc_load_path": os.path.join(root, 'dlc_load.json'),
+        "profiles_path": os.path.join(root, 'profiles.ini'),
+    }
+
+def add_library_arguments(parser: argparse.ArgumentParser) -> None:
+    parser.add_argument("--mods", type=int, default=500)
+    parser.add_argument("--files", type=int, default=40, help="game files per mod")
+    parser.add_argument("--overlap", type=float, default=0.2, help="share of files taken from the shared pool")
+    parser.add_argument("--languages", default="english,russian", help="comma separated, english is always complete")
+    parser.add_argument("--enabled", type=float, default=0.6, help="share of mods enabled in dlc_load.json")
+    parser.add_argument("--profiles", type=int, default=20)
+    parser.add_argument("--seed", type=int, default=0)
+
+def library_options(args) -> Dict:
+    return {
+        "mods": args.mods,
+        "files_per_mod": args.files,
+        "overlap": args.overlap,
+        "languages": tuple(args.languages.split(",")),
+        "enabled_ratio": args.enabled,
+        "profiles": args.profiles,
+        "seed": args.seed,
+    }
+
+def main(argv: List[str] = None) -> int:
+    parser = argparse.ArgumentParser(description="Generate a synthetic CK3 mod library")
+    parser.add_argument("root", help="folder to create the library in, used as --game-dir")
+    add_library_arguments(parser)
+    args = parser.parse_args(argv)
+    paths = generate_library(args.root, **library_options(args))
+    print(f"Generated {args.mods} mod(s) in {paths['mods_directory']}")
+    return 0
+
+if __name__ == '__main__':
+    raise SystemExit(main())
@@ -0,0 +1,204 @@
+# benchmarks/run_benchmarks.py
+#
+# Times the logic paths on a generated library and compares them with benchmarks/baseline.json.
+# Usage: python -m benchmarks.run_benchmarks [--repeat 5] [--save-baseline] [--check] [library options]
+# Numbers only compare between runs on the same machine with the same library options.
+
+import os
+import sys
+import json
+import time
+import shutil
+import platform
+import argparse
+import statistics
+import tempfile
+from pathlib import Path
+from typing import Callable, Dict, List, Tuple
+from logic.file_operations import scan_mod_files, deferred_writer
+from logic.mod_operations import ModOperations
+from logic.conflict_analysis import classify_conflicts, find_identical_overrides, make_executor
+from logic.conflict_report import find_missing_translations
+from logic.script_objects import ScriptObjectCache, effective_script_files, find_object_collisions
+from logic.hash_cache import HashCache
+from logic.translations import parse_localization_version
+from benchmarks.generate_library import add_library_arguments, library_options, generate_library
+
+BASELINE_PATH = Path(__file__).with_name('baseline.json')
+# A benchmark this much slower than the baseline counts as a regression
+DEFAULT_THRESHOLD = 1.25
+# Cache files ModOperations keeps in the mods directory; removed before every cold run
+CACHE_FILES = ('descriptor_index.json', 'mod_sizes.json', 'file_hashes.json', 'script_objects.json', 'temp_mods.json')
+
+def clear_caches(paths: Dict[str, str]) -> None:
+    deferred_writer.flush()
+    for file_name in CACHE_FILES:
+        try:
+            os.remove(os.path.join(paths["mods_directory"], file_name))
+        except FileNotFoundError:
+            pass
+    parse_localization_version.cache_clear()
+
+def make_manager(paths: Dict[str, str]) -> ModOperations:
+    return ModOperations(paths["mods_directory"], paths["dlc_load_path"], paths["profiles_path"])
+
+def build_benchmarks(paths: Dict[str, str]) -> List[Tuple[str, Callable[[], object], Callable[[object], None]]]:
+    # (name, setup, run): only run is timed, setup prepares a fresh state for it
+    mods_directory = Path(paths["mods_directory"])
+    index_path = mods_directory / 'descriptor_index.json'
+
+    def cold():
+        clear_caches(paths)
+
+    def warm_manager():
+        manager = make_manager(paths)
+        manager.refresh_conflict_index()
+        return manager
+
+    def fresh_index():
+        clear_caches(paths)
+        return make_manager(paths)
+
+    def conflict_candidates():
+        manager = warm_manager()
+        # An empty hash cache each time so the files are really hashed
+        hash_cache_path = mods_directory / 'benchmark_hashes.json'
+        if hash_cache_path.exists():
+            hash_cache_path.unlink()
+        return manager, manager.conflict_index.file_paths(), HashCache(hash_cache_path)
+
+    def classify(state):
+        manager, file_paths, hash_cache = state
+        red_conflicts, yellow_conflicts = classify_conflicts(file_paths)
+        find_identical_overrides({**red_conflicts, **yellow_conflicts}, manager.mods_directory, hash_cache)
+
+    def script_files_state():
+        manager = warm_manager()
+        load_position = {mod_folder: position for position, mod_folder in enumerate(manager.load_order_folders())}
+        # An empty parse cache each time so every file is really parsed
+        cache_path = mods_directory / 'benchmark_objects.json'
+        if cache_path.exists():
+            cache_path.unlink()
+        return effective_script_files(manager.conflict_index.file_paths(), load_position), ScriptObjectCache(cache_path)
+
+    def translations_state():
+        parse_localization_version.cache_clear()
+        return make_manager(paths).get_enabled_mod_folders()
+
+    def profile_state():
+        manager = make_manager(paths)
+        return manager, list(manager.profiles)
+
+    def load_profiles(state):
+        manager, profile_names = state
+        for profile_name in profile_names:
+            manager.load_profile(profile_name)
+        deferred_writer.flush()
+
+    return [
+        ("scan_mod_files cold", cold, lambda state: scan_mod_files(mods_directory, index_path)),
+        ("scan_mod_files warm", lambda: scan_mod_files(mods_directory, index_path),
+         lambda state: scan_mod_files(mods_directory, index_path)),
+        ("ModOperations.__init__", lambda: make_manager(paths), lambda state: make_manager(paths)),
+        ("load_profile x all", profile_state, load_profiles),
+        ("conflict index cold", fresh_index, lambda manager: manager.refresh_conflict_index()),
+        ("conflict index warm", warm_manager, lambda manager: manager.refresh_conflict_index()),
+        ("classify + identical", conflict_candidates, classify),
+        ("object collisions cold", script_files_state,
+         lambda state: find_object_collisions(state[0], str(mods_directory), state[1])),
+        ("find_missing_translations", translations_state,
+         lambda mod_folders: find_missing_translations(str(mods_directory), mod_folders)),
+        ("find_missing_translations x4 processes", translations_state,
+         lambda mod_folders: run_in_processes(str(mods_directory), mod_folders)),
+    ]
+
+def run_in_processes(mods_directory: str, mod_folders: List[str]) -> None:
+    with make_executor(True, 4) as executor:
+        find_missing_translations(mods_directory, mod_folders, executor)
+
+def time_benchmark(setup: Callable[[], object], run: Callable[[object], None], repeat: int) -> List[float]:
+    timings = []
+    for _ in range(repeat):
+        state = setup()
+        started = time.perf_counter()
+        run(state)
+        timings.append(time.perf_counter() - started)
+    return timings
+
+def environment() -> Dict[str, str]:
+    return {
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "cpus": str(os.cpu_count()),
+    }
+
+def print_results(results: Dict[str, Dict[str, float]], baseline: Dict, threshold: float) -> List[str]:
+    # Prints the table and returns the names of the benchmarks slower than threshold x baseline
+    baseline_results = baseline.get("results", {})
+    regressions = []
+    print(f"{'benchmark':<40} {'median':>10} {'min':>10} {'baseline':>10} {'ratio':>7}")
+    for name, result in results.items():
+        previous = baseline_results.get(name)
+        if previous:
+            ratio = result["median"] / previous
+            flag = " !" if ratio > threshold else ""
+            if flag:
+                regressions.append(name)
+            print(f"{name:<40} {result['median']:>9.4f}s {result['min']:>9.4f}s {previous:>9.4f}s {ratio:>6.2f}x{flag}")
+        else:
+            print(f"{name:<40} {result['median']:>9.4f}s {result['min']:>9.4f}s {'-':>10} {'-':>7}")
+    return regressions
+
+def main(argv: List[str] = None) -> int:
+    parser = argparse.ArgumentParser(description="Benchmark the mod manager logic on a synthetic library")
+    add_library_arguments(parser)
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--filter", default="", help="only benchmarks whose name contains this")
+    parser.add_argument("--baseline", type=Path, default=BASELINE_PATH)
+    parser.add_argument("--save-baseline", action="store_true", help="store this run's medians as the new baseline")
+    parser.add_argument("--check", action="store_true", help="exit with 1 if anything regressed")
+    parser.add_argument("--threshold", type=float, default=DEFAULT_THRESHOLD)
+    args = parser.parse_args(argv)
+
+    options = library_options(args)
+    baseline = {}
+    if args.baseline.exists():
+        with open(args.baseline, 'r', encoding='utf-8') as f:
+            baseline = json.load(f)
+        baseline_options = baseline.get("library", {})
+        if baseline_options and baseline_options != {**options, "languages": list(options["languages"])}:
+            print("Warning: the baseline was recorded with other library options", file=sys.stderr)
+
+    root = tempfile.mkdtemp(prefix="ck3_benchmark_")
+    try:
+        started = time.perf_counter()
+        paths = generate_library(root, **options)
+        print(f"Generated {options['mods']} mod(s) in {time.perf_counter() - started:.1f}s")
+        results = {}
+        for name, setup, run in build_benchmarks(paths):
+            if args.filter not in name:
+                continue
+            timings = time_benchmark(setup, run, args.repeat)
+            results[name] = {"median": statistics.median(timings), "min": min(timings)}
+    finally:
+        deferred_writer.flush()
+        shutil.rmtree(root, ignore_errors=True)
+
+    regressions = print_results(results, baseline, args.threshold)
+    if args.save_baseline:
+        data = {
+            "environment": environment(),
+            "library": {**options, "languages": list(options["languages"])},
+            "results": {**baseline.get("results", {}), **{name: round(result["median"], 6) for name, result in results.items()}},
+        }
+        with open(args.baseline, 'w', encoding='utf-8') as f:
+            json.dump(data, f, indent=4)
+            f.write("\n")
+        print(f"Saved baseline to {args.baseline}")
+    if regressions:
+        print(f"Slower than {args.threshold}x baseline: {', '.join(regressions)}", file=sys.stderr)
+        return 1 if args.check else 0
+    return 0
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,87 @@
+# logic/conflict_analysis.py
+
+import os
+import threading
+import concurrent.futures
+from typing import Callable, Dict, Iterable, Iterator, List, Tuple
+
+IGNORED_FILES = {"descriptor.mod", "thumbnail.png", "thumbnail.ico", "Steam desc.txt"}
+# How often, in seconds, a scan waiting on its workers looks at the cancel event
+CANCEL_POLL_INTERVAL = 0.2
+
+class ScanCancelled(Exception):
+    pass
+
+def make_executor(use_processes: bool = False, max_workers: int = None) -> concurrent.futures.Executor:
+    # Walking folders and comparing localization is pure Python and holds the GIL,
+    # worker processes keep that work off the GUI process and scale with the number of cores
+    if use_processes:
+        return concurrent.futures.ProcessPoolExecutor(max_workers=max_workers or os.cpu_count())
+    return concurrent.futures.ThreadPoolExecutor(max_workers=max_workers)
+
+def completed_futures(futures: Iterable[concurrent.futures.Future],
+                      cancel_event: threading.Event = None) -> Iterator[concurrent.futures.Future]:
+    # Like as_completed, but notices cancel_event while a long task is still running, not only when one finishes.
+    # Once it is set the futures not started yet are cancelled and ScanCancelled is raised.
+    futures = list(futures)
+    timeout = CANCEL_POLL_INTERVAL if cancel_event is not None else None
+
+    def check_cancelled():
+        if cancel_event is not None and cancel_event.is_set():
+            for future in futures:
+                future.cancel()
+            raise ScanCancelled()
+
+    pending = set(futures)
+    while pending:
+        done, pending = concurrent.futures.wait(pending, timeout=timeout, return_when=concurrent.futures.FIRST_COMPLETED)
+        for future in done:
+            check_cancelled()
+            yield future
+        check_cancelled()
+
+def classify_conflicts(file_paths: Dict[str, List[str]]) -> Tuple[Dict[str, List[str]], Dict[str, List[str]]]:
+    # Every path provided by more than one mod is red. The old rule made a conflict yellow when no file of the same
+    # name sat in its own folder, but the path itself always does, so nothing was ever yellow; the yellow dict is
+    # kept (always empty) for the callers and the report format.
+    red_conflicts = {
+        path: mods for path, mods in file_paths.items()
+        if len(mods) > 1 and os.path.basename(path) not in IGNORED_FILES
+    }
+    return red_conflicts, {}
+
+def find_identical_overrides(conflicts: Dict[str, List[str]], mods_directory: str, hash_cache, max_workers: int = None,
+                             progress_callback: Callable[[int], None] = None,
+                             cancel_event: threading.Event = None) -> Dict[str, List[str]]:
+    # Conflicts where every mod ships a byte-identical file. Sizes are compared first,
+    # so only same-size candidates get hashed, and hashes come from the cache when possible.
+    # progress_callback gets the number of files of each finished conflict; raises ScanCancelled once cancel_event is set.
+    def is_identical(path, mods):
+        if cancel_event is not None and cancel_event.is_set():
+            return False
+        stats = []
+        for mod_folder in mods:
+            try:
+                stats.append(os.stat(os.path.join(mods_directory, mod_folder, path)))
+            except OSError:
+                return False
+        if len({stat.st_size for stat in stats}) > 1:
+            return False
+        hashes = {
+            hash_cache.get_hash(mod_folder, path, os.path.join(mods_directory, mod_folder, path), stat)
+            for mod_folder, stat in zip(mods, stats)
+        }
+        return len(hashes) == 1 and None not in hashes
+
+    with concurrent.futures.ThreadPoolExecutor(max_workers=max_workers) as executor:
+        results = executor.map(lambda item: is_identical(*item), conflicts.items())
+        identical_conflicts = {}
+        for (path, mods), identical in zip(conflicts.items(), results):
+            if identical:
+                identical_conflicts[path] = mods
+            if progress_callback:
+                progress_callback(len(mods))
+    hash_cache.save()
+    if cancel_event is not None and cancel_event.is_set():
+        raise ScanCancelled()
+    return identical_conflicts
@@ -0,0 +1,219 @@
+# logic/conflict_index.py
+
+import os
+import bisect
+import threading
+from collections import defaultdict
+from typing import Dict, Iterable, List, Optional, Tuple
+from .conflict_analysis import IGNORED_FILES
+from .tracing import traced
+
+@traced()
+def build_mod_manifest(mod_path: str) -> Tuple[List[str], Dict[str, int]]:
+    # Relative paths of every file in the mod plus directory mtimes to tell when the list goes stale
+    files = []
+    dir_mtimes = {}
+    stack = [mod_path]
+    while stack:
+        current = stack.pop()
+        try:
+            rel_dir = os.path.relpath(current, mod_path)
+            dir_mtimes[rel_dir] = os.stat(current).st_mtime_ns
+            prefix = "" if rel_dir == "." else rel_dir + os.sep
+            with os.scandir(current) as entries:
+                for entry in entries:
+                    if entry.is_dir(follow_symlinks=False):
+                        stack.append(entry.path)
+                    else:
+                        files.append(prefix + entry.name)
+        except OSError:
+            pass
+    return files, dir_mtimes
+
+def is_manifest_valid(mod_path: str, dir_mtimes: Dict[str, int]) -> bool:
+    if not dir_mtimes:
+        return False
+    for rel_dir, mtime in dir_mtimes.items():
+        try:
+            if os.stat(os.path.join(mod_path, rel_dir)).st_mtime_ns != mtime:
+                return False
+        except OSError:
+            return False
+    return True
+
+def stable_mods(old_position: Dict[str, int], mod_folders: List[str]) -> set:
+    # The largest set of mods whose order relative to each other is the same in mod_folders as before
+    # (a longest increasing subsequence of their old positions). Only the other mods really moved:
+    # a file provided only by stable mods keeps its winner.
+    tails = []
+    tail_indices = []
+    previous = []
+    kept = [mod_folder for mod_folder in mod_folders if mod_folder in old_position]
+    for index, mod_folder in enumerate(kept):
+        position = old_position[mod_folder]
+        slot = bisect.bisect_left(tails, position)
+        if slot == len(tails):
+            tails.append(position)
+            tail_indices.append(index)
+        else:
+            tails[slot] = position
+            tail_indices[slot] = index
+        previous.append(tail_indices[slot - 1] if slot else -1)
+    stable = set()
+    index = tail_indices[-1] if tail_indices else -1
+    while index != -1:
+        stable.add(kept[index])
+        index = previous[index]
+    return stable
+
+def load_winner(mods: List[str], load_position: Dict[str, int]) -> str:
+    return max(mods, key=lambda mod_folder: load_position.get(mod_folder, -1))
+
+class ConflictIndex:
+    # Inverted index of relative path -> mods providing it, kept up to date as mods are enabled and disabled.
+    # load_position is the place of each mod in the load order; of the mods providing a file, the one loaded
+    # last wins and shadows the others.
+    def __init__(self):
+        self.lock = threading.RLock()
+        self.manifests = {}
+        self.providers = defaultdict(list)
+        self.active = set()
+        self.conflict_counts = defaultdict(int)
+        self.load_position = {}
+        # Overridden files whose winner may have changed since the last take_changed_paths()
+        self.changed_paths = set()
+
+    def get_manifest(self, mod_folder: str) -> Optional[Tuple[List[str], Dict[str, int]]]:
+        with self.lock:
+            return self.manifests.get(mod_folder)
+
+    def set_manifest(self, mod_folder: str, manifest: Tuple[List[str], Dict[str, int]]) -> None:
+        with self.lock:
+            was_active = mod_folder in self.active
+            if was_active:
+                self.remove_mod(mod_folder)
+            self.manifests[mod_folder] = manifest
+            if was_active:
+                self.add_mod(mod_folder)
+
+    def add_mod(self, mod_folder: str) -> None:
+        with self.lock:
+            if mod_folder in self.active or mod_folder not in self.manifests:
+                return
+            self.active.add(mod_folder)
+            for path in self.manifests[mod_folder][0]:
+                mods = self.providers[path]
+                if os.path.basename(path) not in IGNORED_FILES and mods:
+                    if len(mods) == 1:
+                        self.conflict_counts[mods[0]] += 1
+                    self.conflict_counts[mod_folder] += 1
+                mods.append(mod_folder)
+
+    def remove_mod(self, mod_folder: str) -> None:
+        with self.lock:
+            if mod_folder not in self.active:
+                return
+            self.active.discard(mod_folder)
+            for path in self.manifests[mod_folder][0]:
+                mods = self.providers.get(path)
+                if not mods or mod_folder not in mods:
+                    continue
+                if len(mods) > 1 and os.path.basename(path) not in IGNORED_FILES:
+                    self.changed_paths.add(path)
+                mods.remove(mod_folder)
+                if not mods:
+                    del self.providers[path]
+                elif os.path.basename(path) not in IGNORED_FILES:
+                    if len(mods) == 1:
+                        self.conflict_counts[mods[0]] -= 1
+                    self.conflict_counts[mod_folder] -= 1
+            self.conflict_counts.pop(mod_folder, None)
+
+    def sync(self, enabled_folders) -> None:
+        enabled_folders = set(enabled_folders)
+        with self.lock:
+            for mod_folder in self.active - enabled_folders:
+                self.remove_mod(mod_folder)
+            for mod_folder in enabled_folders - self.active:
+                self.add_mod(mod_folder)
+
+    def get_conflict_count(self, mod_folder: str) -> int:
+        with self.lock:
+            return self.conflict_counts.get(mod_folder, 0)
+
+    def providers_of(self, paths: List[str]) -> Dict[str, List[str]]:
+        # Enabled mods providing each of the given paths, only for paths that have any
+        with self.lock:
+            providers = self.providers
+            return {path: list(providers[path]) for path in paths if path in providers}
+
+    def file_paths(self) -> Dict[str, List[str]]:
+        with self.lock:
+            return {path: list(mods) for path, mods in self.providers.items()}
+
+    def localization_paths(self) -> Dict[str, List[str]]:
+        with self.lock:
+            mod_localizations = {}
+            for mod_folder in self.active:
+                paths = [path for path in self.manifests[mod_folder][0] if path.startswith('localization')]
+                if paths:
+                    mod_localizations[mod_folder] = paths
+            return mod_localizations
+
+    def resolve(self, paths: Iterable[str] = None) -> Dict[str, Tuple[str, List[str]]]:
+        # (winner, shadowed mods in load order) of every overridden file, or of the given paths only
+        with self.lock:
+            providers = self.providers
+            if paths is None:
+                paths = providers
+            position = self.load_position
+            resolved = {}
+            for path in paths:
+                mods = providers.get(path)
+                if mods is None or len(mods) < 2 or os.path.basename(path) in IGNORED_FILES:
+                    continue
+                ordered = sorted(mods, key=lambda mod_folder: position.get(mod_folder, -1))
+                resolved[path] = (ordered[-1], ordered[:-1])
+            return resolved
+
+    def reordered_paths(self, mod_folders: List[str]) -> List[str]:
+        # Overridden files of the mods that change place relative to the others if the load order becomes mod_folders
+        with self.lock:
+            stable = stable_mods(self.load_position, mod_folders)
+            paths = set()
+            for mod_folder in self.active:
+                if mod_folder in stable:
+                    continue
+                for path in self.manifests[mod_folder][0]:
+                    if len(self.providers.get(path, ())) > 1 and os.path.basename(path) not in IGNORED_FILES:
+                        paths.add(path)
+            return list(paths)
+
+    def winner_changes(self, mod_folders: List[str]) -> Dict[str, Tuple[str, str]]:
+        # What the load order mod_folders would change, without applying it: path -> (winner now, winner then)
+        new_position = {mod_folder: position for position, mod_folder in enumerate(mod_folders)}
+        with self.lock:
+            changes = {}
+            for path in self.reordered_paths(mod_folders):
+                mods = self.providers[path]
+                old_winner = load_winner(mods, self.load_position)
+                new_winner = load_winner(mods, new_position)
+                if old_winner != new_winner:
+                    changes[path] = (old_winner, new_winner)
+            return changes
+
+    def set_load_order(self, mod_folders: List[str]) -> List[str]:
+        # Applies a new load order and returns the overridden files whose providers changed order,
+        # the only ones resolve() can give a different answer for
+        with self.lock:
+            paths = self.reordered_paths(mod_folders)
+            self.load_position = {mod_folder: position for position, mod_folder in enumerate(mod_folders)}
+            self.changed_paths.update(paths)
+            return paths
+
+    def take_changed_paths(self) -> List[str]:
+        # The files set_load_order reported plus those a removed mod used to override, collected since the last call,
+        # so a caller that did not see the load order being applied (e.g. set_enabled) still learns about them
+        with self.lock:
+            paths, self.changed_paths = self.changed_paths, set()
+            return list(paths)
@@ -0,0 +1,265 @@
+# logic/conflict_report.py
+#
+# Conflict and translation analysis without Qt; used by ConflictFinder and `python -m logic.mod_manager report`.
+
+import os
+import csv
+import json
+import time
+import threading
+import concurrent.futures
+from typing import Callable, Dict, Iterator, List, Optional, TextIO
+from .conflict_analysis import ScanCancelled, classify_conflicts, completed_futures, find_identical_overrides
+from .translations import check_mod_translations
+from .script_objects import effective_script_files, find_object_collisions
+from .tracing import span, traced
+
+# Seconds between progress reports and between batches of streamed conflicts
+PROGRESS_INTERVAL = 0.1
+STREAM_INTERVAL = 0.25
+
+REPORT_CSV_COLUMNS = ["kind", "path", "mods", "winner", "mod", "file", "status", "missing_keys", "untranslated_keys", "extra_keys"]
+
+@traced()
+def find_missing_localizations(mods_directory: str, mod_folders: List[str], language: str = 'russian') -> List[str]:
+    # Mods that ship a localization folder without the given language
+    missing = []
+    for mod_folder in mod_folders:
+        try:
+            if language not in os.listdir(os.path.join(mods_directory, mod_folder, 'localization')):
+                missing.append(mod_folder)
+        except OSError as e:
+            print(f"Error reading localization of {mod_folder}: {e}")
+    return missing
+
+@traced()
+def find_missing_translations(mods_directory: str, mod_folders: List[str],
+                              executor: concurrent.futures.Executor = None,
+                              progress_callback: Callable[[str], None] = None,
+                              cancel_event: threading.Event = None) -> Dict[str, List[tuple]]:
+    # Each mod is checked by check_mod_translations, in worker processes when a process pool is passed.
+    # progress_callback gets each finished mod folder; raises ScanCancelled once cancel_event is set.
+    results = {}
+    if executor is None:
+        for mod_folder in mod_folders:
+            if cancel_event is not None and cancel_event.is_set():
+                raise ScanCancelled()
+            results[mod_folder] = check_mod_translations(os.path.join(mods_directory, mod_folder))
+            if progress_callback:
+                progress_callback(mod_folder)
+    else:
+        futures = {
+            executor.submit(check_mod_translations, os.path.join(mods_directory, mod_folder)): mod_folder
+            for mod_folder in mod_folders
+        }
+        for future in completed_futures(futures, cancel_event):
+            results[futures[future]] = future.result()
+            if progress_callback:
+                progress_callback(futures[future])
+
+    # In the order of mod_folders, whatever order the workers finished in
+    missing_translations = {}
+    for mod_folder in mod_folders:
+        if results[mod_folder]:
+            missing_translations[mod_folder] = results[mod_folder]
+    return missing_translations
+
+class ScanProgress:
+    # Progress of a whole scan in files of work. Work is added as each stage learns how much it has,
+    # so the percentage never goes backwards; the ETA comes from the rate so far.
+    def __init__(self, callback: Callable[[float, Optional[float]], None] = None):
+        self.callback = callback
+        self.started = time.perf_counter()
+        self.done = 0
+        self.total = 0
+        self.percent = 0.0
+        self.last_report = 0.0
+
+    def add_work(self, units: int) -> None:
+        self.total += units
+
+    def advance(self, units: int) -> None:
+        self.done += units
+        self.report()
+
+    def report(self, force: bool = False) -> None:
+        if not self.callback:
+            return
+        now = time.perf_counter()
+        if not force and now - self.last_report < PROGRESS_INTERVAL:
+            return
+        self.last_report = now
+        fraction = min(1.0, self.done / self.total) if self.total else 0.0
+        self.percent = max(self.percent, fraction * 100)
+        elapsed = now - self.started
+        eta = None
+        if 0.01 < fraction < 1.0 and elapsed > 0.5:
+            eta = elapsed * (1 - fraction) / fraction
+        self.callback(self.percent, eta)
+
+    def finish(self) -> None:
+        self.done = self.total
+        self.report(force=True)
+
+def sort_by_load_order(conflicts: Dict[str, List[str]], load_position: Dict[str, int]) -> None:
+    for mods in conflicts.values():
+        mods.sort(key=lambda mod_folder: load_position.get(mod_folder, len(load_position)))
+
+@traced()
+def analyze_conflicts(manager, executor: concurrent.futures.Executor = None,
+                      progress_callback: Callable[[float, Optional[float]], None] = None,
+                      cancel_event: threading.Event = None,
+                      conflicts_callback: Callable[[Dict[str, List[str]], Dict[str, List[str]]], None] = None) -> Dict:
+    # Runs the whole analysis for the enabled mods of a ModOperations.
+    # progress_callback(percent, eta_seconds or None) is weighted by files: the walked files of every mod,
+    # the files compared for identical overrides and the localization files checked.
+    # conflicts_callback(red, yellow) gets the conflicts found so far while the mods are indexed, in batches;
+    # the result has the final lists. Raises ScanCancelled once cancel_event is set.
+    progress = ScanProgress(progress_callback)
+    enabled_folders = manager.get_enabled_mod_folders()
+    # Mods of every conflict are listed in load order, so the last one is the winner
+    load_position = {mod_folder: position for position, mod_folder in enumerate(manager.load_order_folders())}
+
+    # Translations cost about one unit per localization file; the estimate is corrected once the manifests are in
+    def translation_weights():
+        weights = {mod_folder: 1 for mod_folder in enabled_folders}
+        for mod_folder, paths in manager.conflict_index.localization_paths().items():
+            if mod_folder in weights:
+                weights[mod_folder] += len(paths)
+        return weights
+    estimated_translations = sum(translation_weights().values())
+    progress.add_work(estimated_translations)
+
+    pending_red = {}
+    pending_yellow = {}
+    last_sent = [time.perf_counter()]
+
+    def send_conflicts(force=False):
+        if not (pending_red or pending_yellow):
+            return
+        if not force and time.perf_counter() - last_sent[0] < STREAM_INTERVAL:
+            return
+        sort_by_load_order(pending_red, load_position)
+        sort_by_load_order(pending_yellow, load_position)
+        conflicts_callback(dict(pending_red), dict(pending_yellow))
+        pending_red.clear()
+        pending_yellow.clear()
+        last_sent[0] = time.perf_counter()
+
+    def collect_conflicts(file_paths):
+        red_conflicts, yellow_conflicts = classify_conflicts(file_paths)
+        pending_red.update(red_conflicts)
+        pending_yellow.update(yellow_conflicts)
+        send_conflicts()
+
+    def mod_indexed(mod_folder):
+        # Only the paths of the new mod can have new conflicts
+        manifest = manager.conflict_index.get_manifest(mod_folder)
+        if manifest is not None:
+            collect_conflicts(manager.conflict_index.providers_of(manifest[0]))
+
+    with span("conflicts: index"):
+        index_progress = [0]
+        def index_progressed(done, total):
+            if not index_progress[0] and total:
+                progress.add_work(total)
+            progress.advance(done - index_progress[0])
+            index_progress[0] = done
+        # Waits for a walk already running, e.g. the startup build, instead of walking the same mods next to it
+        with manager.conflict_index_walk(cancel_event):
+            if conflicts_callback:
+                # What is already indexed goes out first, the rest as each mod is walked
+                manager.conflict_index.sync(mod_folder for mod_folder in enabled_folders if manager.is_manifest_current(mod_folder))
+                collect_conflicts(manager.conflict_index.file_paths())
+            manager.refresh_conflict_index(index_progressed, executor, cancel_event,
+                                           mod_indexed if conflicts_callback else None)
+        if conflicts_callback:
+            send_conflicts(force=True)
+        file_paths = manager.conflict_index.file_paths()
+        mod_localizations = manager.conflict_index.localization_paths()
+
+    weights = translation_weights()
+    progress.add_work(sum(weights.values()) - estimated_translations)
+
+    with span("conflicts: classify", paths=len(file_paths)):
+        red_conflicts, yellow_conflicts = classify_conflicts(file_paths)
+    with span("conflicts: identical overrides", candidates=len(red_conflicts) + len(yellow_conflicts)):
+        candidates = {**red_conflicts, **yellow_conflicts}
+        progress.add_work(sum(len(mods) for mods in candidates.values()))
+        identical_conflicts = find_identical_overrides(candidates, manager.mods_directory, manager.hash_cache,
+                                                       progress_callback=progress.advance, cancel_event=cancel_event)
+    for path in identical_conflicts:
+        red_conflicts.pop(path, None)
+        yellow_conflicts.pop(path, None)
+
+    # Mods of each conflict in load order, whatever order the index happened to collect them in
+    for conflicts in (red_conflicts, yellow_conflicts, identical_conflicts):
+        sort_by_load_order(conflicts, load_position)
+    winners = {path: mods[-1] for conflicts in (red_conflicts, yellow_conflicts, identical_conflicts)
+               for path, mods in conflicts.items()}
+
+    with span("conflicts: script objects"):
+        script_files = effective_script_files(file_paths, load_position)
+        progress.add_work(sum(len(paths) for paths in script_files.values()))
+        object_collisions = find_object_collisions(script_files, manager.mods_directory, manager.script_object_cache,
+                                                   executor, progress.advance, cancel_event)
+
+    missing_russian = find_missing_localizations(manager.mods_directory, list(mod_localizations))
+    missing_translations = find_missing_translations(manager.mods_directory, enabled_folders, executor,
+                                                     lambda mod_folder: progress.advance(weights[mod_folder]), cancel_event)
+    progress.finish()
+
+    return {
+        "red": red_conflicts,
+        "yellow": yellow_conflicts,
+        "identical": identical_conflicts,
+        "winners": winners,
+        "objects": object_collisions,
+        "missing_localization": missing_russian,
+        "translations": missing_translations,
+    }
+
+def report_rows(report: Dict) -> Iterator[Dict]:
+    # One flat row per finding, sorted so two reports can be diffed line by line
+    for kind in ("red", "yellow", "identical"):
+        for path in sorted(report[kind]):
+            yield {"kind": kind, "path": path, "mods": ";".join(report[kind][path]), "winner": report["winners"][path]}
+    for object_id in sorted(report["objects"]):
+        locations = report["objects"][object_id]
+        yield {"kind": "object", "path": object_id, "mods": ";".join(mod_folder for mod_folder, file, line in locations),
+               "file": ";".join(f"{file}:{line}" for mod_folder, file, line in locations)}
+    for mod_folder in sorted(report["missing_localization"]):
+        yield {"kind": "missing_localization", "mod": mod_folder}
+    for mod_folder in sorted(report["translations"]):
+        for status, file, missing_keys, untranslated_keys, extra_keys in sorted(report["translations"][mod_folder], key=lambda entry: entry[1]):
+            yield {"kind": "translation", "mod": mod_folder, "file": file, "status": status,
+                   "missing_keys": missing_keys, "untranslated_keys": untranslated_keys, "extra_keys": extra_keys}
+
+def write_report_json(report: Dict, output: TextIO) -> None:
+    translations = {
+        mod_folder: [
+            {"file": file, "status": status, "missing_keys": missing_keys,
+             "untranslated_keys": untranslated_keys, "extra_keys": extra_keys}
+            for status, file, missing_keys, untranslated_keys, extra_keys in sorted(files, key=lambda entry: entry[1])
+        ]
+        for mod_folder, files in report["translations"].items()
+    }
+    data = {
+        "red": report["red"],
+        "yellow": report["yellow"],
+        "identical": report["identical"],
+        "winners": report["winners"],
+        "objects": {
+            object_id: [{"mod": mod_folder, "file": file, "line": line} for mod_folder, file, line in locations]
+            for object_id, locations in report["objects"].items()
+        },
+        "missing_localization": sorted(report["missing_localization"]),
+        "translations": translations,
+    }
+    json.dump(data, output, indent=4, ensure_ascii=False, sort_keys=True)
+    output.write("\n")
+
+def write_report_csv(report: Dict, output: TextIO) -> None:
+    writer = csv.DictWriter(output, fieldnames=REPORT_CSV_COLUMNS, lineterminator="\n")
+    writer.writeheader()
+    writer.writerows(report_rows(report))
@@ -1,19 +1,121 @@
 # logic/file_operations.py
 
+import io
+import os
 import json
+import time
+import struct
+import hashlib
+import atexit
+import shutil
+import tempfile
+import threading
 import zipfile
 import configparser
 from pathlib import Path
-from typing import Dict, List
+from typing import Callable, Dict, List, Tuple
+from .tracing import span, traced
 
-def save_json(file_path: Path, data: dict) -> None:
-    try:
-        with open(file_path, 'w', encoding='utf-8') as f:
-            json.dump(data, f, indent=4, ensure_ascii=False)
-    except Exception as e:
-        print(f"Error saving {file_path}: {e}")
+# Descriptors handed to scan_mod_files' batch_callback at a time
+SCAN_BATCH_SIZE = 100
+
+# Archive members are copied to disk in pieces of this size, so progress and cancellation stay responsive
+EXTRACT_CHUNK_SIZE = 1024 * 1024
+# Archives are unpacked into a folder with this prefix next to the mods before they replace anything
+EXTRACT_PREFIX = '.extracting-'
+
+# Writes requested within this many seconds of each other are merged into one
+WRITE_DELAY = 0.3
+# ...but a file never waits longer than this behind a steady stream of changes
+MAX_WRITE_DELAY = 2.0
+
+@traced()
+def write_file_atomic(file_path: Path, content: str) -> None:
+    # Readers (and the game) see either the old or the new file, never a half-written one
+    temp_path = f"{file_path}.tmp"
+    with open(temp_path, 'w', encoding='utf-8') as f:
+        f.write(content)
+    os.replace(temp_path, file_path)
+
+def content_digest(content: str) -> bytes:
+    return hashlib.blake2b(content.encode('utf-8'), digest_size=16).digest()
+
+class DeferredWriter:
+    # Collects serialized file contents and writes each file once per burst of changes.
+    # Contents identical to what was last written are skipped unless the file changed on disk since.
+    def __init__(self, delay: float = WRITE_DELAY, max_delay: float = MAX_WRITE_DELAY):
+        self.delay = delay
+        self.max_delay = max_delay
+        self.pending = {}
+        self.written = {}
+        self.first_pending = None
+        self.timer = None
+        self.lock = threading.RLock()
+
+    def write(self, file_path: Path, content: str, defer: bool = True) -> None:
+        key = os.path.abspath(file_path)
+        with self.lock:
+            if self.is_written(key, content):
+                self.pending.pop(key, None)
+                return
+            self.pending[key] = content
+            if not defer:
+                self.flush(file_path)
+                return
+            now = time.monotonic()
+            if self.first_pending is None:
+                self.first_pending = now
+            if self.timer:
+                self.timer.cancel()
+            delay = min(self.delay, max(0.0, self.first_pending + self.max_delay - now))
+            self.timer = threading.Timer(delay, self.flush)
+            self.timer.daemon = True
+            self.timer.start()
+
+    def is_written(self, key: str, content: str) -> bool:
+        written = self.written.get(key)
+        if written is None or written[0] != content_digest(content):
+            return False
+        try:
+            return os.stat(key).st_mtime_ns == written[1]
+        except OSError:
+            return False
+
+    def flush(self, file_path: Path = None) -> None:
+        # Writes everything pending, or only file_path when given
+        with self.lock:
+            if file_path is None:
+                pending = self.pending
+                self.pending = {}
+                self.first_pending = None
+                if self.timer:
+                    self.timer.cancel()
+                    self.timer = None
+            else:
+                key = os.path.abspath(file_path)
+                pending = {key: self.pending.pop(key)} if key in self.pending else {}
+            for key, content in pending.items():
+                try:
+                    write_file_atomic(key, content)
+                    self.written[key] = (content_digest(content), os.stat(key).st_mtime_ns)
+                except Exception as e:
+                    print(f"Error saving {key}: {e}")
+
+deferred_writer = DeferredWriter()
+atexit.register(deferred_writer.flush)
+
+def save_json(file_path: Path, data: dict, defer: bool = False) -> None:
+    # Serialized right away so later changes to data cannot leak into a deferred write
+    with span("save_json", file=os.path.basename(file_path), defer=defer):
+        try:
+            content = json.dumps(data, indent=4, ensure_ascii=False)
+        except Exception as e:
+            print(f"Error saving {file_path}: {e}")
+            return
+        deferred_writer.write(file_path, content, defer)
 
 def load_json(file_path: Path) -> dict:
+    deferred_writer.flush(file_path)
     if file_path.exists():
         try:
             with open(file_path, 'r', encoding='utf-8') as f:
@@ -26,23 +128,48 @@ def save_config(file_path: Path, data: Dict[str, Dict[str, str]]) -> None:
     config = configparser.ConfigParser()
     for section, values in data.items():
         config[section] = values
-    try:
-        with open(file_path, 'w', encoding='utf-8') as f:
-            config.write(f)
-    except Exception as e:
-        print(f"Error saving config {file_path}: {e}")
+    content = io.StringIO()
+    config.write(content)
+    deferred_writer.write(file_path, content.getvalue(), defer=False)
 
 def load_config(file_path: Path) -> Dict[str, Dict[str, str]]:
+    deferred_writer.flush(file_path)
     config = configparser.ConfigParser()
     if file_path.exists():
         config.read(file_path)
     return {section: dict(config.items(section)) for section in config.sections()}
 
-def scan_mod_files(mods_directory: Path) -> List[Dict]:
+@traced()
+def scan_mod_files(mods_directory: Path, index_path: Path = None,
+                   batch_callback: Callable[[List[Dict]], None] = None) -> List[Dict]:
+    # With an index, only descriptors whose size or mtime changed since the last scan are re-read.
+    # batch_callback gets the mods found so far in batches, so a caller can show them before the scan ends.
+    index = load_json(index_path) if index_path else {}
+    new_index = {}
     mods = []
-    for mod_file in mods_directory.glob('*.mod'):
-        mod_data = read_mod_file(mod_file)
-        mods.append(mod_data)
+    reported = 0
+    try:
+        with os.scandir(mods_directory) as entries:
+            for entry in entries:
+                if not entry.name.lower().endswith('.mod') or not entry.is_file():
+                    continue
+                stat = entry.stat()
+                cached = index.get(entry.name)
+                if cached and cached.get("size") == stat.st_size and cached.get("mtime") == stat.st_mtime_ns:
+                    mod_data = cached["data"]
+                else:
+                    mod_data = read_mod_file(Path(entry.path))
+                new_index[entry.name] = {"size": stat.st_size, "mtime": stat.st_mtime_ns, "data": mod_data}
+                mods.append(dict(mod_data))
+                if batch_callback and len(mods) - reported >= SCAN_BATCH_SIZE:
+                    batch_callback(mods[reported:])
+                    reported = len(mods)
+    except OSError as e:
+        print(f"Error scanning mods directory {mods_directory}: {e}")
+    if batch_callback and len(mods) > reported:
+        batch_callback(mods[reported:])
+    if index_path and new_index != index:
+        save_json(index_path, new_index)
     return mods
 
 def read_mod_file(file_path: Path) -> Dict:
@@ -58,9 +185,189 @@ def read_mod_file(file_path: Path) -> Dict:
         print(f"Error reading mod file {file_path}: {e}")
     return mod_data
 
-def extract_zip(zip_path: str, extract_to: str) -> None:
+@traced()
+def read_mod_descriptors(mods_directory: Path, file_names: List[str], index_path: Path = None) -> List[Dict]:
+    # Reads just the given descriptors, e.g. the ones an archive brought in, and records them in the scan index
+    index = load_json(index_path) if index_path else None
+    mods = []
+    for file_name in file_names:
+        file_path = Path(mods_directory) / file_name
+        try:
+            stat = file_path.stat()
+        except OSError as e:
+            print(f"Error reading mod file {file_path}: {e}")
+            continue
+        mod_data = read_mod_file(file_path)
+        if index is not None:
+            index[file_name] = {"size": stat.st_size, "mtime": stat.st_mtime_ns, "data": mod_data}
+        mods.append(dict(mod_data))
+    if index is not None and mods:
+        save_json(index_path, index)
+    return mods
+
+@traced()
+def snapshot_mods_directory(mods_directory: Path) -> Dict[str, Tuple[int, int, int]]:
+    # (inode, size, mtime) of every descriptor and mod folder directly in the mods directory.
+    # Comparing two snapshots tells which descriptors were added, edited or removed and which folders were replaced.
+    snapshot = {}
+    try:
+        with os.scandir(mods_directory) as entries:
+            for entry in entries:
+                if entry.name.startswith(EXTRACT_PREFIX):
+                    continue
+                try:
+                    if entry.is_dir() or (entry.is_file() and entry.name.lower().endswith('.mod')):
+                        stat = entry.stat()
+                        snapshot[entry.name] = (entry.inode(), stat.st_size, stat.st_mtime_ns)
+                except OSError:
+                    pass
+    except OSError as e:
+        print(f"Error scanning mods directory {mods_directory}: {e}")
+    return snapshot
+
+ZIP_END_RECORD = struct.Struct('<4s4H2LH')
+ZIP64_END_LOCATOR = struct.Struct('<4sLQL')
+ZIP64_END_RECORD = struct.Struct('<4sQ2H2L4Q')
+ZIP_DIRECTORY_ENTRY = struct.Struct('<4s4B4HL2L5H2L')
+ZIP_ENTRY_FLAGS = struct.Struct('<H')
+ZIP_ENTRY_LENGTHS = struct.Struct('<3H')
+
+@traced()
+def list_zip_entries(zip_path: str) -> List[str]:
+    # Member names straight from the central directory. ZipFile builds a ZipInfo object per member,
+    # which takes about a second for 100k entries; this reads the directory in one go and only decodes names.
+    try:
+        with open(zip_path, 'rb') as f:
+            f.seek(0, os.SEEK_END)
+            file_size = f.tell()
+            tail_size = min(file_size, ZIP_END_RECORD.size + 0xFFFF)
+            f.seek(file_size - tail_size)
+            tail = f.read(tail_size)
+            end_position = tail.rfind(b'PK\x05\x06')
+            if end_position == -1:
+                raise ValueError("no end of central directory record")
+            _, _, _, _, entry_count, directory_size, _, _ = ZIP_END_RECORD.unpack_from(tail, end_position)
+            end_offset = file_size - tail_size + end_position
+            directory_end = end_offset
+            locator_position = end_position - ZIP64_END_LOCATOR.size
+            if locator_position >= 0 and tail[locator_position:locator_position + 4] == b'PK\x06\x07':
+                # Zip64: the real counts live in the zip64 end record in front of the locator
+                _, _, zip64_offset, _ = ZIP64_END_LOCATOR.unpack_from(tail, locator_position)
+                f.seek(end_offset - ZIP64_END_LOCATOR.size - ZIP64_END_RECORD.size)
+                record = ZIP64_END_RECORD.unpack(f.read(ZIP64_END_RECORD.size))
+                if record[0] != b'PK\x06\x06':
+                    raise ValueError("bad zip64 end record")
+                entry_count, directory_size = record[7], record[8]
+                directory_end = end_offset - ZIP64_END_LOCATOR.size - ZIP64_END_RECORD.size
+            # Counted back from the end record, so archives with data prepended (self-extractors) work too
+            f.seek(directory_end - directory_size)
+            directory = f.read(directory_size)
+
+        raw_names = []
+        encodings = []
+        position = 0
+        header_size = ZIP_DIRECTORY_ENTRY.size
+        for _ in range(entry_count):
+            if directory[position:position + 4] != b'PK\x01\x02':
+                raise ValueError("bad central directory entry")
+            encodings.append('utf-8' if ZIP_ENTRY_FLAGS.unpack_from(directory, position + 8)[0] & 0x800 else 'cp437')
+            name_length, extra_length, comment_length = ZIP_ENTRY_LENGTHS.unpack_from(directory, position + 28)
+            raw_names.append(directory[position + header_size:position + header_size + name_length])
+            position += header_size + name_length + extra_length + comment_length
+        if len(set(encodings)) == 1:
+            # One decode for the whole directory; member names never contain NUL
+            names = b'\x00'.join(raw_names).decode(encodings[0]).split('\x00')
+        else:
+            names = [name.decode(encoding) for name, encoding in zip(raw_names, encodings)]
+        return names
+    except (ValueError, struct.error) as e:
+        print(f"Falling back to zipfile for {zip_path}: {e}")
+    except OSError as e:
+        print(f"Error reading zip file {zip_path}: {e}")
+        return []
     try:
         with zipfile.ZipFile(zip_path, 'r') as zip_ref:
-            zip_ref.extractall(extract_to)
+            return zip_ref.namelist()
     except Exception as e:
-        print(f"Error extracting zip file {zip_path}: {e}")
+        print(f"Error reading zip file {zip_path}: {e}")
+        return []
+
+class ExtractionCancelled(Exception):
+    pass
+
+def zip_member_target(extract_to: str, member_name: str) -> str:
+    # Same sanitizing as ZipFile.extract: no absolute paths, drive letters or ".." components
+    parts = [part for part in member_name.replace('\\', '/').split('/') if part not in ('', '.', '..')]
+    if parts:
+        parts[0] = os.path.splitdrive(parts[0])[1] or parts[0]
+    return os.path.join(extract_to, *parts) if parts else ''
+
+def remove_path(path: str) -> None:
+    if os.path.isdir(path) and not os.path.islink(path):
+        shutil.rmtree(path)
+    else:
+        os.remove(path)
+
+def replace_entries(source_dir: str, target_dir: str, names: List[str], backup_dir: str) -> None:
+    # Moves the named entries of source_dir into target_dir; what they replace goes to backup_dir.
+    # When a move fails, everything already moved is put back, so target_dir ends up all old or all new.
+    moved = []
+    try:
+        for name in names:
+            target = os.path.join(target_dir, name)
+            replaced = os.path.lexists(target)
+            if replaced:
+                os.rename(target, os.path.join(backup_dir, name))
+            moved.append((name, replaced))
+            os.rename(os.path.join(source_dir, name), target)
+    except OSError:
+        for name, replaced in reversed(moved):
+            target = os.path.join(target_dir, name)
+            try:
+                if not os.path.lexists(os.path.join(source_dir, name)):
+                    remove_path(target)
+                if replaced:
+                    os.rename(os.path.join(backup_dir, name), target)
+            except OSError as e:
+                print(f"Error restoring {target}: {e}")
+        raise
+
+@traced()
+def extract_zip(zip_path: str, extract_to: str, progress_callback: Callable[[int, int], None] = None,
+                cancel_event: threading.Event = None) -> List[str]:
+    # Streams the members chunk by chunk into a temporary folder next to the mods, reporting (bytes written, total bytes).
+    # Only once every member is out do the top-level entries replace what is installed, so a cancelled or failed
+    # update leaves the old version untouched. Returns the names at the top level of the archive.
+    # Raises ExtractionCancelled when cancel_event gets set; any other error is raised as well, after cleaning up.
+    staging = tempfile.mkdtemp(prefix=EXTRACT_PREFIX, dir=extract_to)
+    try:
+        unpacked = os.path.join(staging, 'new')
+        backup = os.path.join(staging, 'old')
+        os.mkdir(unpacked)
+        os.mkdir(backup)
+        with zipfile.ZipFile(zip_path, 'r') as zip_ref:
+            members = zip_ref.infolist()
+            total = sum(member.file_size for member in members)
+            written = 0
+            for member in members:
+                target = zip_member_target(unpacked, member.filename)
+                if not target:
+                    continue
+                if member.is_dir():
+                    os.makedirs(target, exist_ok=True)
+                    continue
+                os.makedirs(os.path.dirname(target), exist_ok=True)
+                with zip_ref.open(member) as source, open(target, 'wb') as destination:
+                    for chunk in iter(lambda: source.read(EXTRACT_CHUNK_SIZE), b''):
+                        if cancel_event is not None and cancel_event.is_set():
+                            raise ExtractionCancelled(zip_path)
+                        destination.write(chunk)
+                        written += len(chunk)
+                        if progress_callback:
+                            progress_callback(written, total)
+        top_level = sorted(os.listdir(unpacked))
+        replace_entries(unpacked, str(extract_to), top_level, backup)
+        return top_level
+    finally:
+        # The unpacked files of a cancelled or failed install, or the replaced old version
+        shutil.rmtree(staging, ignore_errors=True)
@@ -0,0 +1,61 @@
+# logic/hash_cache.py
+
+import os
+import hashlib
+import threading
+from pathlib import Path
+from typing import Optional
+from .file_operations import load_json, save_json
+
+def hash_file(file_path: str) -> Optional[str]:
+    # hashlib releases the GIL on large buffers, so several files can be hashed in parallel threads
+    digest = hashlib.blake2b(digest_size=16)
+    try:
+        with open(file_path, 'rb') as f:
+            for chunk in iter(lambda: f.read(1024 * 1024), b''):
+                digest.update(chunk)
+    except OSError as e:
+        print(f"Error hashing {file_path}: {e}")
+        return None
+    return digest.hexdigest()
+
+class HashCache:
+    # Content hashes keyed by "<mod folder>/<relative path>", reused while size and mtime match
+    def __init__(self, cache_path: Path):
+        self.cache_path = cache_path
+        self.entries = None
+        self.lock = threading.Lock()
+        self.dirty = False
+
+    def load(self) -> None:
+        with self.lock:
+            if self.entries is None:
+                self.entries = load_json(self.cache_path)
+
+    def get_hash(self, mod_folder: str, rel_path: str, file_path: str, stat: os.stat_result = None) -> Optional[str]:
+        self.load()
+        if stat is None:
+            try:
+                stat = os.stat(file_path)
+            except OSError:
+                return None
+        key = f"{mod_folder}/{rel_path}"
+        with self.lock:
+            entry = self.entries.get(key)
+        if entry and entry[0] == stat.st_size and entry[1] == stat.st_mtime_ns:
+            return entry[2]
+
+        file_hash = hash_file(file_path)
+        if file_hash is not None:
+            with self.lock:
+                self.entries[key] = [stat.st_size, stat.st_mtime_ns, file_hash]
+                self.dirty = True
+        return file_hash
+
+    def save(self) -> None:
+        with self.lock:
+            if not self.dirty or self.entries is None:
+                return
+            entries = dict(self.entries)
+            self.dirty = False
+        save_json(self.cache_path, entries)
@@ -0,0 +1,65 @@
+# logic/install_preview.py
+
+import os
+from typing import Dict, List
+from .conflict_analysis import classify_conflicts
+from .file_operations import list_zip_entries
+from .tracing import traced
+
+def map_archive_entries(names: List[str], archive_name: str) -> Dict[str, List[str]]:
+    # Mod folder -> file paths relative to it. A folder holding descriptor.mod is a mod root;
+    # without any, every top level folder counts as one. An archive with descriptor.mod at its
+    # root is a single mod named after the archive.
+    names = [name.replace('\\', '/') for name in names] if any('\\' in name for name in names) else names
+    roots = {name[:-len('/descriptor.mod')] for name in names if name.endswith('/descriptor.mod')}
+    if 'descriptor.mod' in names:
+        roots.add('')
+    if not roots:
+        roots = {name.split('/', 1)[0] for name in names if '/' in name}
+
+    archive_mods = {}
+    if '' in roots:
+        archive_mods[archive_name] = [name for name in names if not name.endswith('/')]
+        return archive_mods
+    # Deepest roots first, so a nested mod wins over a folder wrapping it
+    remaining = [name for name in names if not name.endswith('/')]
+    for root in sorted(roots, key=len, reverse=True):
+        prefix = root + '/'
+        files = [name[len(prefix):] for name in remaining if name.startswith(prefix)]
+        if files:
+            archive_mods[root.rsplit('/', 1)[-1]] = files
+            if len(roots) > 1:
+                remaining = [name for name in remaining if not name.startswith(prefix)]
+    return archive_mods
+
+@traced()
+def read_archive_mods(zip_path: str) -> Dict[str, List[str]]:
+    # The mods in the archive, from its central directory only (nothing is decompressed)
+    archive_name = os.path.splitext(os.path.basename(zip_path))[0]
+    return map_archive_entries(list_zip_entries(zip_path), archive_name)
+
+@traced()
+def preview_install(manager, zip_path: str, archive_mods: Dict[str, List[str]] = None) -> Dict:
+    # What installing the archive would conflict with, by the same rules as the conflict finder.
+    # Only the manifests already in the conflict index are used: building it walks every enabled mod, which is
+    # left to whoever builds the index. Until it is built, or while enabled mods are missing from it, the preview
+    # is marked partial.
+    if archive_mods is None:
+        archive_mods = read_archive_mods(zip_path)
+
+    partial = not manager.conflict_index_built or bool(manager.unindexed_mod_folders())
+    preview = {"mods": {}, "red": {}, "yellow": {}, "partial": partial}
+    for mod_folder, files in archive_mods.items():
+        paths = files if os.sep == '/' else [file.replace('/', os.sep) for file in files]
+        # Only paths some enabled mod already ships can conflict, and classify_conflicts looks at each path
+        # on its own, so classifying just those gives the same result as the full set.
+        # Reinstalling an enabled mod must not conflict with its own old files.
+        file_paths = {
+            path: [mod for mod in mods if mod != mod_folder] + [mod_folder]
+            for path, mods in manager.conflict_index.providers_of(paths).items()
+        }
+        red_conflicts, yellow_conflicts = classify_conflicts(file_paths)
+        preview["mods"][mod_folder] = len(files)
+        preview["red"].update(red_conflicts)
+        preview["yellow"].update(yellow_conflicts)
+    return preview
@@ -0,0 +1,106 @@
+# logic/load_order.py
+
+from collections.abc import MutableMapping
+from typing import Callable, Dict, Iterable, List, Optional
+
+class LoadOrder(MutableMapping):
+    # The enabled mods ("mod/<file>.mod" keys) in load order. Values are the temp-enable flags
+    # that used to live in a plain dict, so it still reads and writes like mods_data["enabled_mods"]
+    # always did, but keeps a position index and moves blocks of mods without rebuilding everything.
+    def __init__(self, enabled_mods: Dict[str, bool] = None):
+        self.order = []
+        self.flags = {}
+        self.positions = {}
+        for key, enabled in (enabled_mods or {}).items():
+            self[key] = enabled
+
+    def __getitem__(self, key: str) -> bool:
+        return self.flags[key]
+
+    def __setitem__(self, key: str, enabled: bool) -> None:
+        if key not in self.flags:
+            if self.positions is not None:
+                self.positions[key] = len(self.order)
+            self.order.append(key)
+        self.flags[key] = enabled
+
+    def __delitem__(self, key: str) -> None:
+        del self.flags[key]
+        self.order.remove(key)
+        self.positions = None
+
+    def __contains__(self, key) -> bool:
+        return key in self.flags
+
+    def __iter__(self):
+        return iter(list(self.order))
+
+    def __len__(self) -> int:
+        return len(self.order)
+
+    def to_dict(self) -> Dict[str, bool]:
+        return {key: self.flags[key] for key in self.order}
+
+    def position(self, key: str) -> Optional[int]:
+        # The position index is rebuilt lazily after removals and moves, so a burst of edits costs one pass
+        if self.positions is None:
+            self.positions = {key: position for position, key in enumerate(self.order)}
+        return self.positions.get(key)
+
+    def remove_many(self, keys: Iterable[str]) -> int:
+        keys = {key for key in keys if key in self.flags}
+        if keys:
+            self.order = [key for key in self.order if key not in keys]
+            for key in keys:
+                del self.flags[key]
+            self.positions = None
+        return len(keys)
+
+    def move_block(self, keys: Iterable[str], before: Optional[str] = None) -> None:
+        # Moves keys, in their current load order, as one contiguous block in front of before (or to the end)
+        keys = set(key for key in keys if key in self.flags)
+        keys.discard(before)
+        if not keys:
+            return
+        block = [key for key in self.order if key in keys]
+        self.order = [key for key in self.order if key not in keys]
+        target = len(self.order) if before is None or before not in self.flags else self.order.index(before)
+        self.order[target:target] = block
+        self.positions = None
+
+    def shift(self, keys: Iterable[str], direction: int, group_of: Callable[[str], Optional[str]] = None) -> List[str]:
+        # Moves every key one step up (direction < 0) or down, like the Up/Down buttons.
+        # A key stays put at either end, next to a key that also stays put, or when the
+        # neighbour belongs to another group. Returns the keys that moved.
+        group_of = group_of or (lambda key: None)
+        # A key listed twice must not be swapped twice
+        positions = sorted({self.position(key) for key in keys if key in self.flags})
+        step = -1 if direction < 0 else 1
+        if step > 0:
+            positions.reverse()
+        moved = []
+        blocked = set()
+        for position in positions:
+            neighbour = position + step
+            key = self.order[position]
+            if not 0 <= neighbour < len(self.order) or neighbour in blocked:
+                blocked.add(position)
+                continue
+            other = self.order[neighbour]
+            if group_of(key) != group_of(other):
+                blocked.add(position)
+                continue
+            self.order[position], self.order[neighbour] = other, key
+            self.positions[key] = neighbour
+            self.positions[other] = position
+            moved.append(key)
+        return moved
+
+    def reorder(self, keys: Iterable[str]) -> None:
+        # Puts keys first in the given order; keys missing from it keep their relative order after them
+        keys = [key for key in keys if key in self.flags]
+        listed = set(keys)
+        new_order = keys + [key for key in self.order if key not in listed]
+        if new_order != self.order:
+            self.order = new_order
+            self.positions = None
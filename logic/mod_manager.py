@@ -1,16 +1,240 @@
 # logic/mod_manager.py
+#
+# Command line front end over ModOperations; never imports Qt.
+# Usage: python -m logic.mod_manager [--game-dir DIR] {list,enable,disable,apply-profile,profiles,dump,report,move-preview} ...
 
+import os
+import sys
+import json
+import fnmatch
+import argparse
+import multiprocessing
+from pathlib import Path
+from typing import Dict, List, Tuple
 from logic.mod_operations import ModOperations
+from logic.conflict_analysis import make_executor
+from logic.conflict_report import analyze_conflicts, write_report_csv, write_report_json
+from logic.tracing import tracer
 
-def main():
-    mods_directory = 'path_to_mods'
-    dlc_load_path = 'path_to_dlc_load'
-    profiles_path = 'path_to_profiles'
-    manager = ModOperations(mods_directory, dlc_load_path, profiles_path)
-    manager.load_profile('default_profile')
-    mods = manager.list_mods()
+def default_game_directory() -> Path:
+    # CK3_GAME_DIR wins, otherwise the game's documents folder of the current user
+    game_directory = os.environ.get("CK3_GAME_DIR")
+    if game_directory:
+        return Path(game_directory)
+    return Path.home() / "Documents" / "Paradox Interactive" / "Crusader Kings III"
+
+def game_paths(game_directory: Path) -> Tuple[str, str, str]:
+    # (mods directory, dlc_load.json, profiles.ini) of a game directory
+    game_directory = Path(game_directory)
+    return (str(game_directory / "mod"), str(game_directory / "dlc_load.json"), str(game_directory / "profiles.ini"))
+
+def match_mods(manager: ModOperations, patterns: List[str]) -> Tuple[List[str], List[str]]:
+    # Patterns match the descriptor path ("123.mod") or the mod folder ("123") and may be globs.
+    # Returns the matching paths in library order and the patterns that matched nothing.
+    matched = []
+    unmatched = []
+    for pattern in patterns:
+        pattern = pattern.replace("\\", "/").split("/")[-1]
+        found = [
+            mod['path'] for mod in manager.mods
+            if fnmatch.fnmatch(mod['path'], pattern) or fnmatch.fnmatch(mod['path'].split('.')[0], pattern)
+        ]
+        if not found:
+            unmatched.append(pattern)
+        matched.extend(path for path in found if path not in matched)
+    return matched, unmatched
+
+def describe_mods(manager: ModOperations) -> List[Dict]:
+    mods = []
+    for mod in manager.list_mods():
+        position = manager.get_mod_position(mod['path'])
+        mods.append({
+            "name": mod['name'],
+            "version": mod['version'],
+            "path": mod['path'],
+            "position": position,
+            "enabled": position is not None,
+            "temp_disabled": position is not None and not manager.load_order[f"mod/{mod['path']}"],
+            "comment": mod['comment'],
+        })
+    return mods
+
+def list_command(manager: ModOperations, args) -> int:
+    mods = describe_mods(manager)
+    if args.enabled:
+        mods = [mod for mod in mods if mod['enabled']]
+    elif args.disabled:
+        mods = [mod for mod in mods if not mod['enabled']]
+    mods.sort(key=lambda mod: (mod['position'] is None, mod['position'] or 0, mod['name'] or ""))
+    if args.json:
+        print(json.dumps(mods, indent=4, ensure_ascii=False))
+        return 0
     for mod in mods:
-        print(mod)
+        if not mod['enabled']:
+            state = "-"
+        elif mod['temp_disabled']:
+            state = "~"
+        else:
+            state = "+"
+        position = "" if mod['position'] is None else mod['position'] + 1
+        print(f"{state} {position:>4} {mod['path']:<20} {mod['name'] or ''} {mod['version'] or ''}".rstrip())
+    return 0
+
+def toggle_command(manager: ModOperations, args, enabled: bool) -> int:
+    mod_paths, unmatched = match_mods(manager, args.patterns)
+    for pattern in unmatched:
+        print(f"Error: no mod matches {pattern}", file=sys.stderr)
+    if unmatched and not args.ignore_missing:
+        return 1
+    changed = manager.set_enabled(mod_paths, enabled)
+    manager.flush()
+    print(f"{'Enabled' if enabled else 'Disabled'} {changed} mod(s)")
+    return 0
+
+def apply_profile_command(manager: ModOperations, args) -> int:
+    if args.profile not in manager.profiles:
+        print(f"Error: unknown profile {args.profile}", file=sys.stderr)
+        return 1
+    manager.load_profile(args.profile)
+    manager.flush()
+    print(f"Applied profile {args.profile}: {len(manager.get_enabled_mod_folders())} mod(s) enabled")
+    return 0
+
+def profiles_command(manager: ModOperations, args) -> int:
+    for profile_name in manager.profiles:
+        print(profile_name)
+    return 0
+
+def dump_command(manager: ModOperations, args) -> int:
+    state = {
+        "mods_directory": str(manager.mods_directory),
+        "disabled_dlcs": manager.mods_data.get("disabled_dlcs", []),
+        "load_order": manager.load_order.to_dict(),
+        "groups": manager.groups,
+        "colors": manager.colors,
+        "profiles": list(manager.profiles),
+        "mods": describe_mods(manager),
+    }
+    content = json.dumps(state, indent=4, ensure_ascii=False)
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            f.write(content)
+    else:
+        print(content)
+    return 0
+
+def report_command(manager: ModOperations, args) -> int:
+    # --jobs 1 runs everything in this process, more jobs use a process pool of that size
+    with make_executor(args.jobs > 1, args.jobs) as executor:
+        report = analyze_conflicts(manager, executor)
+    write_report = write_report_csv if args.format == "csv" else write_report_json
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8', newline='') as f:
+            write_report(report, f)
+    else:
+        write_report(report, sys.stdout)
+    return 0
+
+def move_preview_command(manager: ModOperations, args) -> int:
+    # Which overridden files get another winner if the mods are moved; nothing is saved
+    mod_paths, unmatched = match_mods(manager, args.patterns)
+    for pattern in unmatched:
+        print(f"Error: no mod matches {pattern}", file=sys.stderr)
+    if unmatched:
+        return 1
+    manager.refresh_conflict_index()
+    if args.before is not None or args.to_end:
+        before_path = None
+        if args.before is not None:
+            before_paths, unmatched = match_mods(manager, [args.before])
+            if unmatched:
+                print(f"Error: no mod matches {args.before}", file=sys.stderr)
+                return 1
+            before_path = before_paths[0]
+        changes = manager.preview_move(mod_paths, before_path)
+    else:
+        changes = manager.preview_shift(mod_paths, -1 if args.up else 1)
+    for path in sorted(changes):
+        old_winner, new_winner = changes[path]
+        print(f"{path}: {old_winner} -> {new_winner}")
+    print(f"{len(changes)} file(s) would change winner")
+    return 0
+
+def positive_int(value: str) -> int:
+    number = int(value)
+    if number < 1:
+        raise argparse.ArgumentTypeError("must be at least 1")
+    return number
+
+def build_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(prog="mod_manager", description="UnModManagerCK3 without the GUI")
+    parser.add_argument("--game-dir", type=Path, default=None,
+                        help="Crusader Kings III documents folder (default: $CK3_GAME_DIR or ~/Documents/Paradox Interactive/Crusader Kings III)")
+    parser.add_argument("--trace", metavar="FILE", help="write a Chrome trace of the run to FILE and print where the time went")
+    parser.add_argument("--trace-memory", action="store_true", help="with --trace, record the peak memory of every span")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    list_parser = commands.add_parser("list", help="list mods in load order, then the disabled ones")
+    state = list_parser.add_mutually_exclusive_group()
+    state.add_argument("--enabled", action="store_true", help="only enabled mods")
+    state.add_argument("--disabled", action="store_true", help="only disabled mods")
+    list_parser.add_argument("--json", action="store_true", help="print JSON instead of a table")
+    list_parser.set_defaults(handler=list_command)
+
+    for name, enabled in (("enable", True), ("disable", False)):
+        toggle_parser = commands.add_parser(name, help=f"{name} mods by descriptor path, folder or glob")
+        toggle_parser.add_argument("patterns", nargs="+", help="e.g. 2217567218.mod, 2217567218 or '22*'")
+        toggle_parser.add_argument("--ignore-missing", action="store_true", help="do not fail on patterns matching nothing")
+        toggle_parser.set_defaults(handler=lambda manager, args, enabled=enabled: toggle_command(manager, args, enabled))
+
+    profile_parser = commands.add_parser("apply-profile", help="replace the load order and groups with a saved profile")
+    profile_parser.add_argument("profile")
+    profile_parser.set_defaults(handler=apply_profile_command)
+
+    profiles_parser = commands.add_parser("profiles", help="list saved profiles")
+    profiles_parser.set_defaults(handler=profiles_command)
+
+    dump_parser = commands.add_parser("dump", help="write the whole state as JSON")
+    dump_parser.add_argument("--output", "-o", help="file to write instead of stdout")
+    dump_parser.set_defaults(handler=dump_command)
+
+    report_parser = commands.add_parser("report", help="conflicts, object collisions, missing localizations and translation status of the enabled mods")
+    report_parser.add_argument("--format", choices=("json", "csv"), default="json")
+    report_parser.add_argument("--output", "-o", help="file to write instead of stdout")
+    report_parser.add_argument("--jobs", "-j", type=positive_int, default=1, help="worker processes (default: 1)")
+    report_parser.set_defaults(handler=report_command)
+
+    preview_parser = commands.add_parser("move-preview", help="show which overridden files would get another winner if mods were moved")
+    preview_parser.add_argument("patterns", nargs="+", help="mods to move, e.g. 2217567218 or '22*'")
+    direction = preview_parser.add_mutually_exclusive_group()
+    direction.add_argument("--up", action="store_true", help="one step up, like the Up button")
+    direction.add_argument("--down", action="store_true", help="one step down (default)")
+    direction.add_argument("--before", metavar="MOD", help="as one block in front of MOD")
+    direction.add_argument("--to-end", action="store_true", help="as one block to the end of the load order")
+    preview_parser.set_defaults(handler=move_preview_command)
+    return parser
+
+def main(argv: List[str] = None) -> int:
+    args = build_parser().parse_args(argv)
+    if args.trace:
+        tracer.start(args.trace, memory=args.trace_memory)
+    game_directory = args.game_dir or default_game_directory()
+    mods_directory, dlc_load_path, profiles_path = game_paths(game_directory)
+    if not os.path.isdir(mods_directory):
+        print(f"Error: mods directory {mods_directory} not found", file=sys.stderr)
+        return 1
+    manager = None
+    try:
+        manager = ModOperations(mods_directory, dlc_load_path, profiles_path)
+        return args.handler(manager, args)
+    finally:
+        # The deferred saves are part of the run, so they go into the trace too
+        if args.trace:
+            if manager is not None:
+                manager.flush()
+            tracer.finish()
 
 if __name__ == '__main__':
-    main()
+    # Needed for report --jobs in a frozen exe
+    multiprocessing.freeze_support()
+    sys.exit(main())
@@ -1,12 +1,28 @@
 # logic/mod_operations.py
 
-import json
+import os
+import threading
+import contextlib
+import concurrent.futures
 from pathlib import Path
-from typing import List, Dict
-from .file_operations import load_json, save_json, load_config, save_config, scan_mod_files, extract_zip
+from typing import Callable, Iterable, List, Dict, Optional, Tuple
+from .file_operations import deferred_writer, load_json, save_json, scan_mod_files, read_mod_descriptors, snapshot_mods_directory, extract_zip
+from .size_cache import SizeCache
+from .hash_cache import HashCache
+from .script_objects import ScriptObjectCache
+from .conflict_index import ConflictIndex, build_mod_manifest, is_manifest_valid
+from .conflict_analysis import CANCEL_POLL_INTERVAL, ScanCancelled, completed_futures, make_executor
+from .load_order import LoadOrder
+from .profile_store import ProfileStore
+from .tracing import traced
+from .install_preview import preview_install
+
+# Bytes per file assumed for progress estimates before any manifest is known
+DEFAULT_BYTES_PER_FILE = 16 * 1024
 
 class ModOperations:
-    def __init__(self, mods_directory: str, dlc_load_path: str, profiles_path: str):
+    def __init__(self, mods_directory: str, dlc_load_path: str, profiles_path: str, load: bool = True):
+        # With load=False only the profiles are read; load_settings and scan_mods fill in the rest later
         self.mods_directory = Path(mods_directory)
         self.dlc_load_path = Path(dlc_load_path)
         self.profiles_path = Path(profiles_path)
@@ -14,42 +30,89 @@ class ModOperations:
         self.groups_path = self.mods_directory / 'groups.json'
         self.colors_file = self.mods_directory / 'mod_colors.json'
         self.temp_mods_file = self.mods_directory / 'temp_mods.json'
+        self.sizes_path = self.mods_directory / 'mod_sizes.json'
+        self.descriptor_index_path = self.mods_directory / 'descriptor_index.json'
+        self.hashes_path = self.mods_directory / 'file_hashes.json'
+        self.script_objects_path = self.mods_directory / 'script_objects.json'
         
+        # Profiles moved from profiles.ini into a "profiles" folder next to it, see ProfileStore
+        self.profile_store = ProfileStore(self.profiles_path.with_suffix(''), self.profiles_path)
+        self.mods_data = {"disabled_dlcs": [], "enabled_mods": LoadOrder()}
+        self.mods = []
+        self.mods_by_path = {}
+        self.comments = {}
+        self.groups = {}
+        self.colors = {}
+        self.size_cache = SizeCache(self.sizes_path)
+        self.hash_cache = HashCache(self.hashes_path)
+        self.script_object_cache = ScriptObjectCache(self.script_objects_path)
+        self.conflict_index = ConflictIndex()
+        self.conflict_index_built = False
+        # See conflict_index_walk; reentrant, so a caller holding it can still refresh the index
+        self.conflict_index_lock = threading.RLock()
+        # What the mods directory looked like at the last scan, see sync_mods_directory
+        self.directory_snapshot = {}
+        self.loaded = False
+
+        if load:
+            self.load_settings()
+            self.scan_mods()
+
+    @traced()
+    def load_settings(self) -> None:
         self.mods_data = self.load_mods()
-        self.mods = scan_mod_files(self.mods_directory)
-        self.profiles = load_config(self.profiles_path)
         self.comments = load_json(self.comments_path)
         self.groups = load_json(self.groups_path)
         self.colors = load_json(self.colors_file)
 
+    @traced()
+    def scan_mods(self, batch_callback: Callable[[List[Dict]], None] = None) -> None:
+        self.directory_snapshot = snapshot_mods_directory(self.mods_directory)
+        self.mods = scan_mod_files(self.mods_directory, self.descriptor_index_path, batch_callback)
+        self.index_mods()
         self.sync_enabled_mods()
+        self.loaded = True
 
+    @traced()
     def save_colors(self):
-        save_json(self.colors_file, self.colors)
+        save_json(self.colors_file, self.colors, defer=True)
 
+    @traced()
     def save_groups(self):
-        save_json(self.groups_path, self.groups)
+        save_json(self.groups_path, self.groups, defer=True)
 
+    @traced()
     def save_comments(self):
-        save_json(self.comments_path, self.comments)
+        save_json(self.comments_path, self.comments, defer=True)
 
+    @traced()
+    def save_sizes(self):
+        self.size_cache.prune(mod['path'].split('.')[0] for mod in self.mods)
+        self.size_cache.save()
+
+    @traced()
     def save_mods(self):
         dlc_load_data = {
             "disabled_dlcs": self.mods_data["disabled_dlcs"],
             "enabled_mods": [mod for mod, enabled in self.mods_data["enabled_mods"].items() if enabled and mod != "mod/"]
         }
-        save_json(self.dlc_load_path, dlc_load_data)
+        save_json(self.dlc_load_path, dlc_load_data, defer=True)
         self.save_temp_mods()
 
+    @traced()
     def save_temp_mods(self):
         temp_mods_data = self.mods_data.copy()
         temp_mods_data["enabled_mods"] = {k: v for k, v in temp_mods_data["enabled_mods"].items() if k != "mod/"}
-        save_json(self.temp_mods_file, temp_mods_data)
+        save_json(self.temp_mods_file, temp_mods_data, defer=True)
+
+    @traced()
+    def flush(self) -> None:
+        # Writes out saves still waiting in the debounce window
+        deferred_writer.flush()
 
+    @traced()
     def load_mods(self) -> Dict:
         temp_mods_data = load_json(self.temp_mods_file)
-        self.groups = load_json(self.groups_path)
-        self.colors = load_json(self.colors_file)
         if not temp_mods_data:
             dlc_load_data = load_json(self.dlc_load_path)
             temp_mods_data = {
@@ -63,30 +126,224 @@ class ModOperations:
                 temp_mods_data["enabled_mods"] = {mod: True for mod in temp_mods_data["enabled_mods"] if mod != "mod/"}
             # Remove empty mod entry if it exists
             temp_mods_data["enabled_mods"].pop("mod/", None)
+        temp_mods_data["enabled_mods"] = LoadOrder(temp_mods_data["enabled_mods"])
         return temp_mods_data
 
-    def enable_mod(self, mod_name: str) -> None:
-        for mod in self.mods:
-            if mod.get('name') == mod_name:
-                mod['enabled'] = True
-                mod_file_path = f"mod/{mod['path']}"
-                self.mods_data["enabled_mods"][mod_file_path] = True
+    @property
+    def load_order(self) -> LoadOrder:
+        return self.mods_data["enabled_mods"]
+
+    def get_mod_position(self, mod_path: str) -> Optional[int]:
+        return self.load_order.position(f"mod/{mod_path}")
+
+    def shift_mods(self, mod_paths: List[str], direction: int) -> List[str]:
+        # One step up or down the load order, never across a group boundary; returns the paths that moved
+        moved = self.load_order.shift([f"mod/{mod_path}" for mod_path in mod_paths], direction, self.groups_by_key().get)
+        if moved:
+            self.save_mods()
+        return [key[len("mod/"):] for key in moved]
+
+    def move_mods(self, mod_paths: List[str], before_path: Optional[str] = None, save: bool = True) -> None:
+        # Moves the mods as one block in front of before_path, or to the end of the load order
+        before = f"mod/{before_path}" if before_path else None
+        self.load_order.move_block([f"mod/{mod_path}" for mod_path in mod_paths], before)
+        if save:
+            self.save_mods()
+
+    def groups_by_key(self) -> Dict[str, str]:
+        group_by_key = {}
+        for group, paths in self.groups.items():
+            for mod_path in paths:
+                group_by_key.setdefault(f"mod/{mod_path}", group)
+        return group_by_key
+
+    def load_order_folders(self, load_order: LoadOrder = None) -> List[str]:
+        # Enabled mods in load order; of the mods providing the same file, the game uses the last one
+        load_order = load_order if load_order is not None else self.load_order
+        return [
+            key[len("mod/"):].split('.')[0] for key in load_order
+            if load_order[key] is True and key[len("mod/"):] in self.mods_by_path
+        ]
+
+    def update_winners(self) -> List[str]:
+        # Brings the conflict index up to the current load order. Returns the overridden files
+        # whose winner may have changed; only the mods that really moved are looked at.
+        return self.conflict_index.set_load_order(self.load_order_folders())
+
+    def take_winner_changes(self) -> List[str]:
+        # Overridden files whose winner may have changed since the last call, whoever applied the change:
+        # set_enabled, a profile or the watcher sync the load order inside update_conflict_index already
+        self.update_winners()
+        return self.conflict_index.take_changed_paths()
+
+    def preview_shift(self, mod_paths: List[str], direction: int) -> Dict[str, Tuple[str, str]]:
+        # What shift_mods would change: overridden file -> (winner now, winner after the move)
+        load_order = LoadOrder(self.load_order.to_dict())
+        load_order.shift([f"mod/{mod_path}" for mod_path in mod_paths], direction, self.groups_by_key().get)
+        return self.conflict_index.winner_changes(self.load_order_folders(load_order))
+
+    def preview_move(self, mod_paths: List[str], before_path: Optional[str] = None) -> Dict[str, Tuple[str, str]]:
+        # The same for move_mods
+        load_order = LoadOrder(self.load_order.to_dict())
+        load_order.move_block([f"mod/{mod_path}" for mod_path in mod_paths], f"mod/{before_path}" if before_path else None)
+        return self.conflict_index.winner_changes(self.load_order_folders(load_order))
+
+    def index_mods(self) -> None:
+        self.mods_by_path = {mod['path']: mod for mod in self.mods}
+
+    @traced()
+    def set_enabled(self, mod_paths: List[str], enabled: bool, save: bool = True) -> int:
+        # Enables or disables a batch of mods by descriptor path and writes the load order once.
+        # Returns how many mods actually changed state.
+        enabled_mods = self.load_order
+        removed = []
+        changed = 0
+        for mod_path in mod_paths:
+            mod = self.mods_by_path.get(mod_path)
+            if mod is None:
+                continue
+            mod_file_path = f"mod/{mod_path}"
+            if enabled:
+                was_enabled = enabled_mods.get(mod_file_path) is True
+                enabled_mods[mod_file_path] = True
+            else:
+                was_enabled = mod_file_path in enabled_mods
+                removed.append(mod_file_path)
+            if was_enabled != enabled or mod.get('enabled') != enabled:
+                changed += 1
+            mod['enabled'] = enabled
+        # One pass over the load order for the whole batch
+        enabled_mods.remove_many(removed)
+        if changed:
+            if save:
                 self.save_mods()
+            self.update_conflict_index()
+        return changed
+
+    def enable_mod(self, mod_name: str) -> None:
+        self.set_enabled([mod['path'] for mod in self.mods if mod.get('name') == mod_name], True)
 
     def disable_mod(self, mod_name: str) -> None:
-        for mod in self.mods:
-            if mod.get('name') == mod_name:
-                mod['enabled'] = False
-                mod_file_path = f"mod/{mod['path']}"
-                if mod_file_path in self.mods_data["enabled_mods"]:
-                    del self.mods_data["enabled_mods"][mod_file_path]
-                self.save_mods()
-                self.save_temp_mods()
+        self.set_enabled([mod['path'] for mod in self.mods if mod.get('name') == mod_name], False)
 
     def sync_enabled_mods(self) -> None:
         for mod in self.mods:
             mod_path = f"mod/{mod['path']}"
             mod['enabled'] = self.mods_data["enabled_mods"].get(mod_path, False)
+        self.update_conflict_index()
+
+    def get_enabled_mod_folders(self) -> List[str]:
+        return [mod['path'].split('.')[0] for mod in self.mods if mod.get('enabled')]
+
+    def load_mod_manifest(self, mod_folder: str) -> Tuple[List[str], Dict[str, int]]:
+        mod_path = os.path.join(self.mods_directory, mod_folder)
+        manifest = self.conflict_index.get_manifest(mod_folder)
+        if manifest is None or not is_manifest_valid(mod_path, manifest[1]):
+            manifest = build_mod_manifest(mod_path)
+            self.conflict_index.set_manifest(mod_folder, manifest)
+        return manifest
+
+    def is_manifest_current(self, mod_folder: str) -> bool:
+        manifest = self.conflict_index.get_manifest(mod_folder)
+        return manifest is not None and is_manifest_valid(os.path.join(self.mods_directory, mod_folder), manifest[1])
+
+    def estimate_mod_files(self, mod_folders: List[str]) -> Dict[str, int]:
+        # How many files each mod probably has, to weight progress by work instead of by mod:
+        # the last manifest if there is one, otherwise the cached folder size at the library's bytes per file
+        estimates = {}
+        unknown = []
+        known_files = 0
+        known_bytes = 0
+        for mod_folder in mod_folders:
+            manifest = self.conflict_index.get_manifest(mod_folder)
+            if manifest is None:
+                unknown.append(mod_folder)
+                continue
+            estimates[mod_folder] = max(1, len(manifest[0]))
+            size = self.size_cache.cached_size(mod_folder)
+            if size:
+                known_files += estimates[mod_folder]
+                known_bytes += size
+        bytes_per_file = known_bytes / known_files if known_files else DEFAULT_BYTES_PER_FILE
+        for mod_folder in unknown:
+            size = self.size_cache.cached_size(mod_folder)
+            estimates[mod_folder] = max(1, round(size / bytes_per_file)) if size else 1
+        return estimates
+
+    @contextlib.contextmanager
+    def conflict_index_walk(self, cancel_event: threading.Event = None):
+        # Held while mods are walked into the conflict index. A second walk, e.g. Find Conflicts during the startup
+        # build, waits for the first one, so the same mods are not walked twice. Raises ScanCancelled while waiting.
+        while not self.conflict_index_lock.acquire(timeout=CANCEL_POLL_INTERVAL):
+            if cancel_event is not None and cancel_event.is_set():
+                raise ScanCancelled()
+        try:
+            yield
+        finally:
+            self.conflict_index_lock.release()
+
+    @traced()
+    def refresh_conflict_index(self, progress_callback=None, executor: concurrent.futures.Executor = None,
+                               cancel_event: threading.Event = None, mod_callback: Callable[[str], None] = None) -> None:
+        # Builds the index on first use, afterwards only re-walks mods whose folders changed.
+        # The executor may be a process pool, so workers only get the folder path and send back the manifest.
+        # progress_callback(done, total) counts estimated files. Mods are added to the index as their manifests
+        # arrive and reported to mod_callback, so conflicts can be shown before the walk is over.
+        # Raises ScanCancelled once cancel_event is set, also while a long mod is still being walked;
+        # the manifests finished until then are kept.
+        with self.conflict_index_walk(cancel_event):
+            mod_folders = self.get_enabled_mod_folders()
+            stale_folders = [mod_folder for mod_folder in mod_folders if not self.is_manifest_current(mod_folder)]
+            weights = self.estimate_mod_files(stale_folders)
+            total = sum(weights.values())
+            done = 0
+            # Mods with a manifest, even a stale one, are indexed right away; stale ones are swapped as they are re-walked
+            self.conflict_index.sync(mod_folder for mod_folder in mod_folders if self.conflict_index.get_manifest(mod_folder) is not None)
+            own_executor = executor is None
+            if own_executor:
+                executor = make_executor()
+            try:
+                futures = {
+                    executor.submit(build_mod_manifest, os.path.join(self.mods_directory, mod_folder)): mod_folder
+                    for mod_folder in stale_folders
+                }
+                for future in completed_futures(futures, cancel_event):
+                    mod_folder = futures[future]
+                    self.conflict_index.set_manifest(mod_folder, future.result())
+                    self.conflict_index.add_mod(mod_folder)
+                    if mod_callback:
+                        mod_callback(mod_folder)
+                    done += weights[mod_folder]
+                    if progress_callback:
+                        progress_callback(done, total)
+            finally:
+                if own_executor:
+                    executor.shutdown(wait=False, cancel_futures=True)
+            self.conflict_index_built = True
+            self.update_conflict_index()
+
+    @traced()
+    def update_conflict_index(self) -> None:
+        # Never walks a folder, so it is cheap enough for the GUI thread: enabled mods without a manifest
+        # stay out of the index until refresh_conflict_index walks them, see unindexed_mod_folders
+        if not self.conflict_index_built:
+            return
+        self.conflict_index.sync(
+            mod_folder for mod_folder in self.get_enabled_mod_folders()
+            if self.conflict_index.get_manifest(mod_folder) is not None
+        )
+        self.update_winners()
+
+    def unindexed_mod_folders(self) -> List[str]:
+        # Enabled mods the conflict index has never walked, e.g. enabled for the first time after it was built
+        return [mod_folder for mod_folder in self.get_enabled_mod_folders() if self.conflict_index.get_manifest(mod_folder) is None]
+
+    def get_conflict_count(self, mod_path: str) -> Optional[int]:
+        # None until the mod's files are known
+        mod_folder = mod_path.split('.')[0]
+        if not self.conflict_index_built or self.conflict_index.get_manifest(mod_folder) is None:
+            return None
+        return self.conflict_index.get_conflict_count(mod_folder)
 
     def list_mods(self) -> List[Dict]:
         return [
@@ -100,30 +357,100 @@ class ModOperations:
             for mod in self.mods
         ]
 
+    def get_mod_size(self, mod_path: str) -> int:
+        mod_folder = mod_path.split('.')[0]
+        return self.size_cache.get_size(mod_folder, str(self.mods_directory / mod_folder))
+
+    @property
+    def profiles(self) -> Dict[str, Dict]:
+        # Profile name -> {"id", "mods"}; listing never opens the profiles themselves
+        return self.profile_store.index
+
+    @traced()
     def save_profile(self, profile_name: str) -> None:
-        self.profiles[profile_name] = {
-            "enabled_mods": json.dumps(self.mods_data["enabled_mods"]),
-            "groups": json.dumps(self.groups)
-        }
-        save_config(self.profiles_path, self.profiles)
-        self.profiles = load_config(self.profiles_path)
+        self.profile_store.save(profile_name, self.load_order.to_dict(), self.groups)
 
+    @traced()
     def load_profile(self, profile_name: str) -> None:
-        profile = self.profiles.get(profile_name, {})
+        profile = self.profile_store.load(profile_name)
         if profile:
-            self.mods_data["enabled_mods"] = json.loads(profile.get("enabled_mods", "{}"))
-            self.groups = json.loads(profile.get("groups", "{}"))
+            enabled_mods, self.groups = profile
+            self.mods_data["enabled_mods"] = LoadOrder(enabled_mods)
             self.save_mods()
-            self.save_temp_mods()
             self.save_groups()
             self.sync_enabled_mods()
 
     def delete_profile(self, profile_name: str) -> None:
-        if profile_name in self.profiles:
-            del self.profiles[profile_name]
-            save_config(self.profiles_path, self.profiles)
+        self.profile_store.delete(profile_name)
 
-    def install_mod(self, zip_path: str) -> None:
-        extract_zip(zip_path, self.mods_directory)
-        self.mods = scan_mod_files(self.mods_directory)
-        self.sync_enabled_mods()
+    def preview_install(self, zip_path: str, archive_mods: Dict[str, List[str]] = None) -> Dict:
+        return preview_install(self, zip_path, archive_mods)
+
+    @traced()
+    def install_mod(self, zip_path: str, progress_callback: Callable[[int, int], None] = None,
+                    cancel_event: threading.Event = None) -> List[str]:
+        # Only the descriptors that came out of the archive are read; returns their paths.
+        # Raises ExtractionCancelled when cancel_event is set during extraction, and the extraction error when the archive
+        # could not be installed; in both cases the mods directory is left as it was.
+        top_level = extract_zip(zip_path, self.mods_directory, progress_callback, cancel_event)
+        return self.add_mods([name for name in top_level if name.lower().endswith('.mod')])
+
+    @traced()
+    def add_mods(self, file_names: List[str]) -> List[str]:
+        new_mods = [mod for mod in read_mod_descriptors(self.mods_directory, file_names, self.descriptor_index_path) if mod.get('path')]
+        positions = {mod['path']: position for position, mod in enumerate(self.mods)}
+        for mod in new_mods:
+            mod['enabled'] = self.load_order.get(f"mod/{mod['path']}", False)
+            if mod['path'] in positions:
+                self.mods[positions[mod['path']]] = mod
+            else:
+                self.mods.append(mod)
+            self.mods_by_path[mod['path']] = mod
+            # A reinstalled enabled mod may have changed files
+            if mod['enabled'] and self.conflict_index_built:
+                self.load_mod_manifest(mod['path'].split('.')[0])
+        self.update_conflict_index()
+        return [mod['path'] for mod in new_mods]
+
+    @traced()
+    def remove_mods(self, file_names: List[str]) -> List[str]:
+        # Forgets mods whose descriptors are gone; they keep their place in the load order in case they come back
+        file_names = set(file_names)
+        removed = [mod['path'] for mod in self.mods if mod['path'] in file_names]
+        if removed:
+            self.mods = [mod for mod in self.mods if mod['path'] not in file_names]
+            self.index_mods()
+            self.update_conflict_index()
+        return removed
+
+    def refresh_mod_folders(self, mod_folders: Iterable[str]) -> None:
+        # Re-walks the manifests of changed enabled mods; unchanged ones are skipped by their directory mtimes
+        if not self.conflict_index_built:
+            return
+        enabled_folders = set(self.get_enabled_mod_folders())
+        for mod_folder in mod_folders:
+            if mod_folder in enabled_folders:
+                self.load_mod_manifest(mod_folder)
+        self.update_conflict_index()
+
+    @traced()
+    def sync_mods_directory(self, mod_folders: Iterable[str] = ()) -> Tuple[List[str], List[str], List[str]]:
+        # Picks up what changed in the mods directory since the last scan without rescanning it:
+        # descriptors added, edited or removed, mod folders replaced, plus mod_folders known to have changed inside.
+        # Returns (added or updated mod paths, removed mod paths, changed mod folders).
+        snapshot = snapshot_mods_directory(self.mods_directory)
+        previous, self.directory_snapshot = self.directory_snapshot, snapshot
+        changed_names = [name for name, stat in snapshot.items() if previous.get(name) != stat]
+        removed_names = [name for name in previous if name not in snapshot]
+
+        removed = self.remove_mods([name for name in removed_names if name.lower().endswith('.mod')])
+        descriptors = [name for name in changed_names if name.lower().endswith('.mod')]
+        updated = self.add_mods(descriptors) if descriptors else []
+
+        changed_folders = set(mod_folders)
+        changed_folders.update(name for name in changed_names + removed_names if not name.lower().endswith('.mod'))
+        changed_folders.update(mod_path.split('.')[0] for mod_path in updated)
+        known_folders = {mod['path'].split('.')[0] for mod in self.mods}
+        changed_folders &= known_folders
+        self.refresh_mod_folders(changed_folders)
+        return updated, removed, sorted(changed_folders)
@@ -0,0 +1,139 @@
+# logic/profile_store.py
+#
+# Profiles live in a folder next to profiles.ini:
+#   index.json          profile name -> {"id": manifest id, "mods": count}, all that listing needs
+#   objects/<id>.json   immutable JSON blobs named by the hash of their content
+# A manifest lists the load order as chunks, one per run of mods in the same group, plus the groups blob,
+# so playsets sharing groups or whole stretches of the load order store them once.
+
+import os
+import sys
+import json
+import hashlib
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+from .file_operations import load_json, save_json, load_config, write_file_atomic
+
+def object_id(data) -> str:
+    return hashlib.blake2b(json.dumps(data, sort_keys=True, separators=(',', ':'), ensure_ascii=False).encode('utf-8'),
+                           digest_size=16).hexdigest()
+
+def split_load_order(enabled_mods: Dict[str, bool], groups: Dict[str, List[str]]) -> List[List[list]]:
+    # Runs of consecutive mods that belong to the same group (or to none)
+    group_by_key = {}
+    for group, paths in groups.items():
+        for mod_path in paths:
+            group_by_key.setdefault(f"mod/{mod_path}", group)
+    chunks = []
+    current_group = object()
+    for key, enabled in enabled_mods.items():
+        group = group_by_key.get(key)
+        if not chunks or group != current_group:
+            chunks.append([])
+            current_group = group
+        chunks[-1].append([key, enabled])
+    return chunks
+
+class ProfileStore:
+    def __init__(self, store_path: Path, legacy_path: Path = None):
+        self.store_path = Path(store_path)
+        self.objects_path = self.store_path / 'objects'
+        self.index_path = self.store_path / 'index.json'
+        migrated = self.index_path.exists()
+        self.index = load_json(self.index_path)
+        if not migrated and legacy_path is not None and Path(legacy_path).exists():
+            self.migrate(Path(legacy_path))
+
+    def migrate(self, legacy_path: Path) -> None:
+        # One-time import of the old profiles.ini, which is left in place untouched
+        for profile_name, profile in load_config(legacy_path).items():
+            try:
+                enabled_mods = json.loads(profile.get("enabled_mods", "{}"))
+                groups = json.loads(profile.get("groups", "{}"))
+            except json.JSONDecodeError as e:
+                print(f"Error migrating profile {profile_name}: {e}", file=sys.stderr)
+                continue
+            self.save(profile_name, enabled_mods, groups, write_index=False)
+        self.save_index()
+        if self.index:
+            print(f"Migrated {len(self.index)} profile(s) from {legacy_path}", file=sys.stderr)
+
+    def object_path(self, object_key: str) -> Path:
+        return self.objects_path / f"{object_key}.json"
+
+    def put(self, data) -> str:
+        object_key = object_id(data)
+        object_path = self.object_path(object_key)
+        # Same id, same content: an object only ever has to be written once
+        if not object_path.exists():
+            self.objects_path.mkdir(parents=True, exist_ok=True)
+            write_file_atomic(object_path, json.dumps(data, ensure_ascii=False))
+        return object_key
+
+    def get(self, object_key: str):
+        try:
+            with open(self.object_path(object_key), 'r', encoding='utf-8') as f:
+                return json.load(f)
+        except (OSError, json.JSONDecodeError) as e:
+            print(f"Error loading profile object {object_key}: {e}")
+            return None
+
+    def names(self) -> List[str]:
+        return list(self.index)
+
+    def save_index(self) -> None:
+        self.store_path.mkdir(parents=True, exist_ok=True)
+        save_json(self.index_path, self.index)
+
+    def save(self, profile_name: str, enabled_mods: Dict[str, bool], groups: Dict[str, List[str]],
+             write_index: bool = True) -> None:
+        manifest = {
+            "load_order": [self.put(chunk) for chunk in split_load_order(enabled_mods, groups)],
+            "groups": self.put(groups),
+        }
+        self.index[profile_name] = {"id": self.put(manifest), "mods": len(enabled_mods)}
+        if write_index:
+            self.save_index()
+
+    def load(self, profile_name: str) -> Optional[Tuple[Dict[str, bool], Dict[str, List[str]]]]:
+        # (enabled_mods, groups) of one profile, or None if it is unknown or damaged
+        entry = self.index.get(profile_name)
+        if entry is None:
+            return None
+        manifest = self.get(entry["id"])
+        if manifest is None:
+            return None
+        enabled_mods = {}
+        for chunk_id in manifest["load_order"]:
+            chunk = self.get(chunk_id)
+            if chunk is None:
+                return None
+            enabled_mods.update((key, enabled) for key, enabled in chunk)
+        groups = self.get(manifest["groups"])
+        if groups is None:
+            return None
+        return enabled_mods, groups
+
+    def delete(self, profile_name: str) -> None:
+        if self.index.pop(profile_name, None) is None:
+            return
+        self.save_index()
+        self.collect_garbage()
+
+    def collect_garbage(self) -> None:
+        # Removes objects no profile refers to any more
+        referenced = set()
+        for entry in self.index.values():
+            manifest = self.get(entry["id"])
+            if manifest is None:
+                continue
+            referenced.add(entry["id"])
+            referenced.add(manifest["groups"])
+            referenced.update(manifest["load_order"])
+        try:
+            with os.scandir(self.objects_path) as entries:
+                for entry in entries:
+                    if entry.name.endswith('.json') and entry.name[:-len('.json')] not in referenced:
+                        os.remove(entry.path)
+        except OSError as e:
+            print(f"Error cleaning up profiles in {self.objects_path}: {e}")
@@ -0,0 +1,246 @@
+# logic/script_objects.py
+#
+# Game objects (events, decisions, traits, on_actions, ...) defined by more than one file.
+# Two mods overriding the same path is a file conflict; two files with different names defining the same
+# top-level key in the same database folder is an object collision, and the game keeps only one of them.
+
+import os
+import re
+import threading
+import concurrent.futures
+from operator import itemgetter
+from pathlib import Path
+from typing import Callable, Dict, List, Optional, Tuple
+from .file_operations import load_json, save_json
+from .conflict_analysis import ScanCancelled, completed_futures
+from .tracing import traced
+
+SCRIPT_FOLDERS = ("common/", "events/")
+# Files per task handed to the executor, so one overhaul mod does not end up on a single worker
+FILES_PER_TASK = 200
+# Keys that are not objects: the event namespace and @scripted variables, which are local to their file
+IGNORED_KEYS = {b"namespace"}
+
+# Every piece below can match in only one way (runs and comments stop only at a delimiter, strings at their quote
+# or the end of the line), so a block that does not close fails in linear time instead of backtracking for ever.
+COMMENT = rb'#[^\n]*(?![^\n])'
+STRING = rb'"[^"\n]*(?:"|(?![^\n]))'
+RUN = rb'[^{}"#]+(?![^{}"#])'
+# A key starts and ends at a token boundary, so values that are not assigned to are skipped in linear time too
+KEY = rb'(?<![^\s{}=#"<>!?])([^\s{}=#"<>!?]+)(?![^\s{}=#"<>!?])[ \t\r\n]*\??=(?!=)'
+# Blocks nested this deep are skipped by the regex engine in one match; deeper ones by counting braces
+BLOCK_DEPTH = 8
+
+def block_pattern(depth: int) -> bytes:
+    inner = RUN + rb'|' + COMMENT + rb'|' + STRING
+    if depth > 1:
+        inner += rb'|' + block_pattern(depth - 1)
+    return rb'\{(?:' + inner + rb')*\}'
+
+# What can follow at the top level of a file: a whole block, a brace the block pattern could not match,
+# a key being assigned, or a comment or string to step over
+TOP_LEVEL = re.compile(COMMENT + rb'|' + STRING + rb'|' + block_pattern(BLOCK_DEPTH)
+                       + rb'|(\{)|\}|' + KEY)
+STRUCTURE = re.compile(COMMENT + rb'|' + STRING + rb'|[{}]')
+
+def is_script_file(path: str) -> bool:
+    path = path.replace(os.sep, "/")
+    return path.endswith(".txt") and path.startswith(SCRIPT_FOLDERS)
+
+def object_type(path: str) -> str:
+    # Event ids are global across the subfolders of events/, everything else is one database per folder
+    path = path.replace(os.sep, "/")
+    if path.startswith("events/"):
+        return "events"
+    return path.rpartition("/")[0]
+
+def skip_block(content: bytes, position: int) -> int:
+    # End of the block opened just before position, by counting braces; the end of the file if it never closes
+    depth = 1
+    for match in STRUCTURE.finditer(content, position):
+        token = content[match.start()]
+        if token == 0x7b:  # {
+            depth += 1
+        elif token == 0x7d:  # }
+            depth -= 1
+            if depth == 0:
+                return match.end()
+    return len(content)
+
+def parse_object_keys(content: bytes) -> List[Tuple[str, int]]:
+    # (key, line) of every top-level assignment, in file order
+    if content.startswith(b'\xef\xbb\xbf'):
+        content = content[3:]
+    keys = []
+    line = 1
+    counted = 0
+    position = 0
+    while position < len(content):
+        for match in TOP_LEVEL.finditer(content, position):
+            key = match.group(2)
+            if key is not None:
+                if key.startswith(b'@') or key in IGNORED_KEYS:
+                    continue
+                line += content.count(b'\n', counted, match.start())
+                counted = match.start()
+                keys.append((key.decode('utf-8', 'replace'), line))
+            elif match.group(1) is not None:
+                # Nested deeper than the block pattern goes, or never closed
+                position = skip_block(content, match.end())
+                break
+            # A stray closing brace is ignored like the game does, instead of hiding the rest of the file
+        else:
+            break
+    return keys
+
+def parse_script_files(mod_path: str, rel_paths: List[str]) -> Dict[str, List[Tuple[str, int]]]:
+    # Top-level so it can run in a worker process
+    results = {}
+    for rel_path in rel_paths:
+        try:
+            with open(os.path.join(mod_path, rel_path), 'rb') as f:
+                results[rel_path] = parse_object_keys(f.read())
+        except OSError as e:
+            print(f"Error reading {rel_path} of {mod_path}: {e}")
+    return results
+
+class ScriptObjectCache:
+    # Top-level keys keyed by "<mod folder>/<relative path>", reused while size and mtime match.
+    # The keys of a file are kept as one "key line key line ..." string, which keeps the indented JSON of an
+    # overhaul-sized library small and quick to load. Keys never contain an ASCII space (KEY stops at one), but may
+    # contain other whitespace such as a no-break space, so the string is split on " " only.
+    def __init__(self, cache_path: Path):
+        self.cache_path = cache_path
+        self.entries = None
+        self.lock = threading.Lock()
+        self.dirty = False
+
+    def load(self) -> None:
+        with self.lock:
+            if self.entries is None:
+                self.entries = load_json(self.cache_path)
+
+    def get_keys(self, mod_folder: str, rel_path: str, stat: os.stat_result) -> Optional[List[Tuple[str, int]]]:
+        # None when the file changed or the entry does not decode, so the file is parsed again
+        with self.lock:
+            entry = self.entries.get(f"{mod_folder}/{rel_path}")
+        if not entry or len(entry) != 3 or entry[0] != stat.st_size or entry[1] != stat.st_mtime_ns:
+            return None
+        if not entry[2]:
+            return []
+        fields = entry[2].split(" ")
+        if len(fields) % 2:
+            return None
+        try:
+            return list(zip(fields[::2], map(int, fields[1::2])))
+        except ValueError:
+            return None
+
+    def set_keys(self, mod_folder: str, rel_path: str, stat: os.stat_result, keys: List[Tuple[str, int]]) -> None:
+        with self.lock:
+            self.entries[f"{mod_folder}/{rel_path}"] = [stat.st_size, stat.st_mtime_ns, " ".join(f"{key} {line}" for key, line in keys)]
+            self.dirty = True
+
+    def save(self) -> None:
+        with self.lock:
+            if not self.dirty or self.entries is None:
+                return
+            entries = dict(self.entries)
+            self.dirty = False
+        save_json(self.cache_path, entries)
+
+def effective_script_files(file_paths: Dict[str, List[str]], load_position: Dict[str, int]) -> Dict[str, List[str]]:
+    # Script files the game actually reads, by mod: of the mods providing a path only the last loaded one counts
+    mod_files = {}
+    for path, mods in file_paths.items():
+        if not is_script_file(path):
+            continue
+        winner = max(mods, key=lambda mod_folder: load_position.get(mod_folder, -1))
+        mod_files.setdefault(winner, []).append(path)
+    return mod_files
+
+@traced()
+def find_object_collisions(mod_files: Dict[str, List[str]], mods_directory: str, cache: ScriptObjectCache,
+                           executor: concurrent.futures.Executor = None,
+                           progress_callback: Callable[[int], None] = None,
+                           cancel_event: threading.Event = None) -> Dict[str, List[Tuple[str, str, int]]]:
+    # "<object type>/<key>" -> (mod folder, file, line) of every definition, for keys defined in more than one file.
+    # Files whose size and mtime match the cache are not read again; the rest is parsed in chunks on the executor,
+    # in worker processes when it is a process pool. progress_callback gets the number of files of each finished chunk;
+    # raises ScanCancelled once cancel_event is set.
+    cache.load()
+    keys_by_file = {}
+    stale = []
+    for mod_folder, paths in mod_files.items():
+        stale_paths = []
+        for path in paths:
+            try:
+                stat = os.stat(os.path.join(mods_directory, mod_folder, path))
+            except OSError:
+                continue
+            keys = cache.get_keys(mod_folder, path, stat)
+            if keys is None:
+                stale_paths.append((path, stat))
+            else:
+                keys_by_file[(mod_folder, path)] = keys
+        for start in range(0, len(stale_paths), FILES_PER_TASK):
+            stale.append((mod_folder, stale_paths[start:start + FILES_PER_TASK]))
+    if progress_callback and keys_by_file:
+        progress_callback(len(keys_by_file))
+
+    def store(mod_folder, chunk, results):
+        for path, stat in chunk:
+            keys = results.get(path)
+            if keys is not None:
+                cache.set_keys(mod_folder, path, stat, keys)
+                keys_by_file[(mod_folder, path)] = keys
+        if progress_callback:
+            progress_callback(len(chunk))
+
+    def task_args(mod_folder, chunk):
+        return os.path.join(mods_directory, mod_folder), [path for path, stat in chunk]
+
+    try:
+        if executor is None:
+            for mod_folder, chunk in stale:
+                if cancel_event is not None and cancel_event.is_set():
+                    raise ScanCancelled()
+                store(mod_folder, chunk, parse_script_files(*task_args(mod_folder, chunk)))
+        else:
+            futures = {executor.submit(parse_script_files, *task_args(mod_folder, chunk)): (mod_folder, chunk)
+                       for mod_folder, chunk in stale}
+            for future in completed_futures(futures, cancel_event):
+                store(*futures[future], future.result())
+    finally:
+        # What was parsed before a cancel is kept for the next scan
+        cache.save()
+
+    # Per object type, the file that first defined each key; keys of a file are compared as a whole set,
+    # so only keys defined again cost anything in Python
+    files = list(keys_by_file)
+    first_file = {}
+    repeated = {}
+    for index, (mod_folder, path) in enumerate(files):
+        prefix = object_type(path) + "/"
+        names = set(map(itemgetter(0), keys_by_file[(mod_folder, path)]))
+        seen, owners = first_file.setdefault(prefix, (set(), {}))
+        for key in names & seen:
+            repeated.setdefault(prefix + key, [owners[key]]).append(index)
+        new_names = names - seen
+        seen |= new_names
+        owners.update(dict.fromkeys(new_names, index))
+
+    first_lines = {}
+    collisions = {}
+    for object_id, indices in repeated.items():
+        key = object_id.rpartition("/")[2]
+        locations = []
+        for index in indices:
+            if index not in first_lines:
+                first_lines[index] = dict(reversed(keys_by_file[files[index]]))
+            mod_folder, path = files[index]
+            locations.append((mod_folder, path, first_lines[index][key]))
+        # In the order the game reads the files: by file name, whichever mod they come from
+        locations.sort(key=lambda location: (os.path.basename(location[1]), location[1], location[2]))
+        collisions[object_id] = locations
+    return collisions
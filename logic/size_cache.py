@@ -0,0 +1,90 @@
+# logic/size_cache.py
+
+import os
+import threading
+from pathlib import Path
+from typing import Dict, Optional, Tuple
+from .file_operations import load_json, save_json
+from .tracing import traced
+
+@traced()
+def calculate_folder_size(folder_path: str) -> Tuple[int, Dict[str, int]]:
+    # Returns the total size of the folder and the mtime of every directory in it.
+    # os.scandir reuses the stat info from the directory listing where the OS provides it,
+    # which is much cheaper than os.walk + os.path.getsize on Windows.
+    total_size = 0
+    dir_mtimes = {}
+    stack = [folder_path]
+    while stack:
+        current = stack.pop()
+        try:
+            dir_mtimes[os.path.relpath(current, folder_path)] = os.stat(current).st_mtime_ns
+            with os.scandir(current) as entries:
+                for entry in entries:
+                    try:
+                        if entry.is_dir(follow_symlinks=False):
+                            stack.append(entry.path)
+                        else:
+                            total_size += entry.stat(follow_symlinks=False).st_size
+                    except OSError:
+                        pass
+        except OSError:
+            pass
+    return total_size, dir_mtimes
+
+class SizeCache:
+    def __init__(self, cache_path: Path):
+        self.cache_path = cache_path
+        self.entries = load_json(cache_path)
+        self.lock = threading.Lock()
+        self.dirty = False
+
+    def is_valid(self, folder_path: str, entry: Dict) -> bool:
+        # Adding, removing or renaming anything in a directory bumps its mtime,
+        # so checking the recorded directories is enough to know if the mod changed.
+        dir_mtimes = entry.get("dirs")
+        if not dir_mtimes:
+            return False
+        for rel_dir, mtime in dir_mtimes.items():
+            try:
+                if os.stat(os.path.join(folder_path, rel_dir)).st_mtime_ns != mtime:
+                    return False
+            except OSError:
+                return False
+        return True
+
+    def get_size(self, folder_name: str, folder_path: str) -> int:
+        if not os.path.isdir(folder_path):
+            return 0
+        with self.lock:
+            entry = self.entries.get(folder_name)
+        if entry and self.is_valid(folder_path, entry):
+            return entry["size"]
+
+        total_size, dir_mtimes = calculate_folder_size(folder_path)
+        with self.lock:
+            self.entries[folder_name] = {"size": total_size, "dirs": dir_mtimes}
+            self.dirty = True
+        return total_size
+
+    def cached_size(self, folder_name: str) -> Optional[int]:
+        # Last known size without checking that it is still current
+        with self.lock:
+            entry = self.entries.get(folder_name)
+        return entry["size"] if entry else None
+
+    def prune(self, folder_names) -> None:
+        folder_names = set(folder_names)
+        with self.lock:
+            for folder_name in list(self.entries):
+                if folder_name not in folder_names:
+                    del self.entries[folder_name]
+                    self.dirty = True
+
+    def save(self) -> None:
+        with self.lock:
+            if not self.dirty:
+                return
+            entries = dict(self.entries)
+            self.dirty = False
+        save_json(self.cache_path, entries)
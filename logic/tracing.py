@@ -0,0 +1,191 @@
+# logic/tracing.py
+#
+# Spans around the slow paths, off unless asked for:
+#   CK3_TRACE=trace.json        record spans, write a Chrome trace (chrome://tracing, ui.perfetto.dev) at exit
+#   CK3_TRACE_MEMORY=1          also record the tracemalloc peak inside each span (much slower)
+# or `python -m logic.mod_manager --trace trace.json [--trace-memory] ...`.
+# A summary table per span name is printed to stderr when the trace is written.
+# Spans inside worker processes of a process pool are not recorded.
+
+import os
+import sys
+import json
+import time
+import atexit
+import threading
+import functools
+import multiprocessing
+import tracemalloc
+from typing import Dict, List, Optional
+
+class NullSpan:
+    # What span() hands out while tracing is off: entering and leaving it does nothing
+    __slots__ = ()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        return False
+
+    def set(self, **args) -> None:
+        pass
+
+NULL_SPAN = NullSpan()
+
+class Span:
+    __slots__ = ("tracer", "name", "args", "start", "memory_start", "child_peak")
+
+    def __init__(self, tracer, name: str, args: Dict):
+        self.tracer = tracer
+        self.name = name
+        self.args = args
+
+    def set(self, **args) -> None:
+        # Extra details known only once the work is done, e.g. how many files were found
+        self.args.update(args)
+
+    def __enter__(self):
+        if self.tracer.memory:
+            self.tracer.enter_memory(self)
+        self.start = time.perf_counter_ns()
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        end = time.perf_counter_ns()
+        peak = self.tracer.exit_memory(self) if self.tracer.memory else None
+        self.tracer.record(self.name, self.start, end - self.start, self.args, peak)
+        return False
+
+class Tracer:
+    def __init__(self):
+        self.enabled = False
+        self.memory = False
+        self.output_path = None
+        self.events = []
+        self.thread_names = {}
+        self.lock = threading.Lock()
+        self.local = threading.local()
+        self.origin = time.perf_counter_ns()
+
+    def start(self, output_path: Optional[str], memory: bool = False) -> None:
+        self.output_path = output_path
+        self.memory = memory
+        if memory and not tracemalloc.is_tracing():
+            tracemalloc.start()
+        self.origin = time.perf_counter_ns()
+        self.enabled = True
+        atexit.register(self.finish)
+
+    def span(self, name: str, **args):
+        if not self.enabled:
+            return NULL_SPAN
+        return Span(self, name, args)
+
+    def enter_memory(self, span: Span) -> None:
+        # tracemalloc keeps one peak for the whole process, so each span resets it and hands its own peak
+        # up to the enclosing span on exit. Spans running in parallel threads share the peak.
+        stack = getattr(self.local, "stack", None)
+        if stack is None:
+            stack = self.local.stack = []
+        current, peak = tracemalloc.get_traced_memory()
+        if stack:
+            stack[-1].child_peak = max(stack[-1].child_peak, peak)
+        span.memory_start = current
+        span.child_peak = 0
+        stack.append(span)
+        tracemalloc.reset_peak()
+
+    def exit_memory(self, span: Span) -> int:
+        stack = self.local.stack
+        peak = max(tracemalloc.get_traced_memory()[1], span.child_peak)
+        stack.pop()
+        if stack:
+            stack[-1].child_peak = max(stack[-1].child_peak, peak)
+        return peak - span.memory_start
+
+    def record(self, name: str, start: int, duration: int, args: Dict, memory_peak: Optional[int]) -> None:
+        thread = threading.current_thread()
+        with self.lock:
+            self.thread_names.setdefault(thread.ident, thread.name)
+            self.events.append((name, start, duration, thread.ident, args, memory_peak))
+
+    def chrome_trace(self) -> Dict:
+        pid = os.getpid()
+        with self.lock:
+            events = list(self.events)
+            thread_names = dict(self.thread_names)
+        trace_events = [
+            {"name": "thread_name", "ph": "M", "pid": pid, "tid": tid, "args": {"name": thread_name}}
+            for tid, thread_name in thread_names.items()
+        ]
+        for name, start, duration, tid, args, memory_peak in events:
+            event_args = dict(args)
+            if memory_peak is not None:
+                event_args["memory_peak_kb"] = round(memory_peak / 1024, 1)
+            trace_events.append({
+                "name": name, "ph": "X", "pid": pid, "tid": tid,
+                "ts": (start - self.origin) / 1000, "dur": duration / 1000, "args": event_args,
+            })
+        return {"traceEvents": trace_events, "displayTimeUnit": "ms"}
+
+    def summary(self) -> List[Dict]:
+        # Per span name: count, total, mean and max time, and the biggest memory peak, slowest first
+        rows = {}
+        with self.lock:
+            events = list(self.events)
+        for name, start, duration, tid, args, memory_peak in events:
+            row = rows.setdefault(name, {"name": name, "count": 0, "total": 0, "max": 0, "memory_peak": None})
+            row["count"] += 1
+            row["total"] += duration
+            row["max"] = max(row["max"], duration)
+            if memory_peak is not None:
+                row["memory_peak"] = max(row["memory_peak"] or 0, memory_peak)
+        return sorted(rows.values(), key=lambda row: row["total"], reverse=True)
+
+    def format_summary(self) -> str:
+        lines = [f"{'span':<36} {'count':>7} {'total ms':>10} {'mean ms':>9} {'max ms':>9} {'peak KB':>9}"]
+        for row in self.summary():
+            peak = "" if row["memory_peak"] is None else f"{row['memory_peak'] / 1024:.1f}"
+            lines.append(f"{row['name']:<36} {row['count']:>7} {row['total'] / 1e6:>10.2f} "
+                         f"{row['total'] / row['count'] / 1e6:>9.3f} {row['max'] / 1e6:>9.2f} {peak:>9}")
+        return "\n".join(lines)
+
+    def finish(self) -> None:
+        # Writes the trace and prints the summary; called at exit
+        if not self.enabled:
+            return
+        self.enabled = False
+        if self.output_path:
+            try:
+                with open(self.output_path, 'w', encoding='utf-8') as f:
+                    json.dump(self.chrome_trace(), f)
+                print(f"Trace written to {self.output_path}", file=sys.stderr)
+            except OSError as e:
+                print(f"Error writing trace {self.output_path}: {e}", file=sys.stderr)
+        # stderr, so it never mixes with a report written to stdout
+        print(self.format_summary(), file=sys.stderr)
+
+tracer = Tracer()
+
+def span(name: str, **args):
+    return tracer.span(name, **args)
+
+def traced(name: str = None):
+    # Decorator form of span(); named after the function unless a name is given
+    def decorator(function):
+        span_name = name or function.__qualname__
+
+        @functools.wraps(function)
+        def wrapper(*args, **kwargs):
+            if not tracer.enabled:
+                return function(*args, **kwargs)
+            with Span(tracer, span_name, {}):
+                return function(*args, **kwargs)
+        return wrapper
+    return decorator
+
+# Spawned pool workers import this module again with the same environment; only the main process traces,
+# otherwise every worker would overwrite the trace file and print its own summary at exit
+if os.environ.get("CK3_TRACE") and multiprocessing.parent_process() is None:
+    tracer.start(os.environ["CK3_TRACE"], memory=os.environ.get("CK3_TRACE_MEMORY") == "1")
@@ -0,0 +1,79 @@
+# logic/translations.py
+
+import os
+import re
+import functools
+from typing import Dict, List, Tuple
+from .tracing import traced
+
+# key:0 "value" entries; the version number is optional and the value runs to the last quote on the line
+LOCALIZATION_ENTRY = re.compile(r'^[ \t]*([^\s:#"]+):[0-9]*[ \t]*"(.*)"', re.MULTILINE)
+
+# Share of untranslated keys above which a file is reported as identical to the english one
+IDENTICAL_THRESHOLD = 0.9
+
+# Parsed localization files kept in memory; each worker process of a process pool has its own
+LOCALIZATION_CACHE_SIZE = 4096
+
+@functools.lru_cache(maxsize=LOCALIZATION_CACHE_SIZE)
+def parse_localization_version(file_path: str, size: int, mtime_ns: int) -> Dict[str, str]:
+    # Size and mtime are part of the key, so an edited file is parsed again and its old entries age out
+    return parse_localization_file(file_path)
+
+def load_localization_entries(file_path: str) -> Dict[str, str]:
+    stat = os.stat(file_path)
+    return parse_localization_version(file_path, stat.st_size, stat.st_mtime_ns)
+
+def parse_localization_file(file_path: str) -> Dict[str, str]:
+    with open(file_path, 'r', encoding='utf-8-sig', errors='replace') as file:
+        content = file.read()
+    return dict(LOCALIZATION_ENTRY.findall(content))
+
+def compare_localizations(eng_entries: Dict[str, str], rus_entries: Dict[str, str]) -> Tuple[int, int, int]:
+    # (missing, untranslated, extra) key counts of the russian file against the english one
+    missing = 0
+    untranslated = 0
+    get_rus_value = rus_entries.get
+    for key, value in eng_entries.items():
+        rus_value = get_rus_value(key)
+        if rus_value is None:
+            missing += 1
+        elif rus_value == value:
+            untranslated += 1
+    extra = len(rus_entries) - (len(eng_entries) - missing)
+    return missing, untranslated, extra
+
+@traced()
+def check_mod_translations(mod_path: str) -> List[Tuple[str, str, int, int, int]]:
+    # Top-level so it can run in a worker process; returns (status, file name, missing, untranslated, extra)
+    results = []
+    english_path = os.path.join(mod_path, 'localization', 'english')
+    russian_path = os.path.join(mod_path, 'localization', 'russian')
+
+    if not os.path.exists(english_path) or not os.path.exists(russian_path):
+        return results
+
+    english_files = [f for f in os.listdir(english_path) if f.endswith('_l_english.yml')]
+    russian_files = set(f for f in os.listdir(russian_path) if f.endswith('_l_russian.yml'))
+
+    for eng_file in english_files:
+        rus_file = eng_file.replace('_l_english.yml', '_l_russian.yml')
+        try:
+            eng_entries = load_localization_entries(os.path.join(english_path, eng_file))
+            if rus_file not in russian_files:
+                results.append(('missing', eng_file, len(eng_entries), 0, 0))
+                continue
+            rus_entries = load_localization_entries(os.path.join(russian_path, rus_file))
+        except OSError as e:
+            print(f"Error reading localization {eng_file}: {e}")
+            continue
+
+        missing, untranslated, extra = compare_localizations(eng_entries, rus_entries)
+        if not (missing or untranslated or extra):
+            continue
+        if eng_entries and untranslated / len(eng_entries) >= IDENTICAL_THRESHOLD:
+            status = 'identical'
+        else:
+            status = 'partial'
+        results.append((status, rus_file, missing, untranslated, extra))
+    return results
@@ -1,22 +1,25 @@
 # main.py
 
-import os
 import sys
+import time
+import multiprocessing
 from PyQt5 import QtWidgets
 from ui.ui_manager import ModManagerUI
-from logic.mod_manager import ModOperations
+from logic.mod_manager import ModOperations, default_game_directory, game_paths
 
 def main():
-    user_name = os.getlogin()
-    mods_directory = f"C:\\Users\\{user_name}\\Documents\\Paradox Interactive\\Crusader Kings III\\mod"
-    dlc_load_path = f"C:\\Users\\{user_name}\\Documents\\Paradox Interactive\\Crusader Kings III\\dlc_load.json"
-    profiles_path = f"C:\\Users\\{user_name}\\Documents\\Paradox Interactive\\Crusader Kings III\\profiles.ini"
+    mods_directory, dlc_load_path, profiles_path = game_paths(default_game_directory())
 
-    manager = ModOperations(mods_directory, dlc_load_path, profiles_path)
+    started = time.perf_counter()
     app = QtWidgets.QApplication(sys.argv)
+    # Only the profiles are read here; the mods are loaded in the background once the window is up
+    manager = ModOperations(mods_directory, dlc_load_path, profiles_path, load=False)
     ui = ModManagerUI(manager)
     ui.show()
+    ui.operations.log_startup_phase("window", time.perf_counter() - started)
     sys.exit(app.exec_())
 
 if __name__ == '__main__':
+    # Needed for the conflict finder's process pool in the frozen exe
+    multiprocessing.freeze_support()
     main()
@@ -0,0 +1,67 @@
+# tests/test_load_order.py
+
+from logic.load_order import LoadOrder
+
+def make_order(*keys):
+    return LoadOrder({key: True for key in keys})
+
+def test_shift_up_and_down():
+    load_order = make_order("a", "b", "c", "d")
+    assert load_order.shift(["c"], -1) == ["c"]
+    assert list(load_order) == ["a", "c", "b", "d"]
+    assert load_order.shift(["a"], 1) == ["a"]
+    assert list(load_order) == ["c", "a", "b", "d"]
+    assert load_order.position("a") == 1
+
+def test_shift_stays_put_at_either_end():
+    load_order = make_order("a", "b", "c")
+    assert load_order.shift(["a"], -1) == []
+    assert load_order.shift(["c"], 1) == []
+    assert list(load_order) == ["a", "b", "c"]
+
+def test_shift_adjacent_keys_move_together():
+    load_order = make_order("a", "b", "c", "d")
+    assert load_order.shift(["b", "c"], -1) == ["b", "c"]
+    assert list(load_order) == ["b", "c", "a", "d"]
+    assert load_order.shift(["b", "c"], 1) == ["c", "b"]
+    assert list(load_order) == ["a", "b", "c", "d"]
+
+def test_shift_blocked_neighbour_blocks_the_keys_behind_it():
+    # a is at the top, so b, right below it and selected too, stays put as well; d still moves
+    load_order = make_order("a", "b", "c", "d")
+    assert load_order.shift(["a", "b", "d"], -1) == ["d"]
+    assert list(load_order) == ["a", "b", "d", "c"]
+
+def test_shift_ignores_duplicate_and_unknown_keys():
+    load_order = make_order("a", "b", "c")
+    assert load_order.shift(["c", "c", "x"], -1) == ["c"]
+    assert list(load_order) == ["a", "c", "b"]
+
+def test_shift_stops_at_group_boundaries():
+    groups = {"a": "first", "b": "first", "c": "second", "d": "second"}
+    load_order = make_order("a", "b", "c", "d")
+    assert load_order.shift(["b"], 1, groups.get) == []
+    assert load_order.shift(["c"], -1, groups.get) == []
+    assert load_order.shift(["d"], -1, groups.get) == ["d"]
+    assert list(load_order) == ["a", "b", "d", "c"]
+    # Ungrouped mods do not cross into a group either
+    load_order = make_order("a", "x")
+    assert load_order.shift(["x"], -1, groups.get) == []
+
+def test_move_block_in_front_of_a_key():
+    load_order = make_order("a", "b", "c", "d", "e")
+    # The block keeps its current load order, whatever order the keys are given in
+    load_order.move_block(["e", "b"], "a")
+    assert list(load_order) == ["b", "e", "a", "c", "d"]
+    assert load_order.position("a") == 2
+    # A key of the block used as the target is left out of the block
+    load_order.move_block(["a", "d"], "d")
+    assert list(load_order) == ["b", "e", "c", "a", "d"]
+
+def test_move_block_to_the_end():
+    load_order = make_order("a", "b", "c", "d")
+    load_order.move_block(["a", "c"])
+    assert list(load_order) == ["b", "d", "a", "c"]
+    load_order.move_block(["x"])
+    assert list(load_order) == ["b", "d", "a", "c"]
+    assert load_order.position("c") == 3
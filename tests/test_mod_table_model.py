@@ -0,0 +1,34 @@
+# tests/test_mod_table_model.py
+
+import os
+
+os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+
+from PyQt5 import QtWidgets
+from ui.mod_table_model import ModTableModel, ModFilterProxyModel, NAME_COLUMN, match_rank
+
+class FakeManager:
+    comments = {}
+    colors = {}
+    mods_data = {"enabled_mods": {}}
+
+    def get_conflict_count(self, mod_path):
+        return None
+
+def make_proxy(names):
+    app = QtWidgets.QApplication.instance() or QtWidgets.QApplication([])
+    model = ModTableModel(FakeManager(), False, {})
+    model.set_rows([{"name": name, "path": f"{number}.mod"} for number, name in enumerate(names)])
+    proxy = ModFilterProxyModel()
+    proxy.setSourceModel(model)
+    return app, proxy
+
+def shown_ranks(proxy, term):
+    return [match_rank(proxy.index(row, NAME_COLUMN).data().lower(), term) for row in range(proxy.rowCount())]
+
+def test_ranking_follows_every_query():
+    app, proxy = make_proxy(["Xbr", "Abr", "Bar", "Br", "x-b", "Bbr"])
+    for term in ("b", "br", "r"):
+        proxy.set_search_terms({NAME_COLUMN: term})
+        ranks = shown_ranks(proxy, term)
+        assert ranks == sorted(ranks), term
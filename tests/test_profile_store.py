@@ -0,0 +1,53 @@
+# tests/test_profile_store.py
+
+import json
+import configparser
+from benchmarks.generate_library import generate_library
+from logic.mod_operations import ModOperations
+from logic.profile_store import ProfileStore
+
+def profile_objects(store, profile_name):
+    entry = store.index[profile_name]
+    manifest = store.get(entry["id"])
+    return {entry["id"], manifest["groups"], *manifest["load_order"]}
+
+def stored_objects(store):
+    return {path.stem for path in store.objects_path.glob('*.json')}
+
+def test_migrate_apply_and_delete_profiles(tmp_path):
+    paths = generate_library(str(tmp_path), mods=12, files_per_mod=2, profiles=4)
+    legacy = configparser.ConfigParser()
+    legacy.read(paths["profiles_path"], encoding='utf-8')
+    legacy_text = (tmp_path / 'profiles.ini').read_text(encoding='utf-8')
+
+    manager = ModOperations(paths["mods_directory"], paths["dlc_load_path"], paths["profiles_path"])
+    assert sorted(manager.profiles) == sorted(legacy.sections())
+    for profile_name in legacy.sections():
+        manager.load_profile(profile_name)
+        assert manager.load_order.to_dict() == json.loads(legacy[profile_name]["enabled_mods"])
+        assert manager.groups == json.loads(legacy[profile_name]["groups"])
+        assert manager.profiles[profile_name]["mods"] == len(manager.load_order)
+    manager.flush()
+    # profiles.ini is left as it was and not migrated a second time
+    assert (tmp_path / 'profiles.ini').read_text(encoding='utf-8') == legacy_text
+    store = ProfileStore(tmp_path / 'profiles', tmp_path / 'profiles.ini')
+    assert store.index == manager.profiles
+
+    # A copy shares every object with its original, so deleting the original removes nothing
+    first, second = legacy.sections()[:2]
+    enabled_mods, groups = store.load(first)
+    store.save("Copy", enabled_mods, groups)
+    before = stored_objects(store)
+    store.delete(first)
+    assert stored_objects(store) == before
+    assert store.load("Copy") == (enabled_mods, groups)
+
+    # Deleting a profile removes exactly the objects nothing else refers to
+    kept = set().union(*(profile_objects(store, name) for name in store.names() if name != second))
+    unique = profile_objects(store, second) - kept
+    assert unique
+    store.delete(second)
+    assert stored_objects(store) == kept
+    assert second not in ProfileStore(tmp_path / 'profiles').index
+    for profile_name in store.names():
+        assert store.load(profile_name) is not None
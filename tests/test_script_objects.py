@@ -0,0 +1,81 @@
+# tests/test_script_objects.py
+
+import os
+from logic.script_objects import BLOCK_DEPTH, ScriptObjectCache, find_object_collisions, parse_object_keys
+
+def write_file(path, content):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, 'wb') as f:
+        f.write(content)
+
+def test_top_level_keys_and_lines():
+    content = (
+        b'\xef\xbb\xbfbrave = {\n'
+        b'\tindex = 1\n'
+        b'\topposites = { craven }\n'
+        b'}\n'
+        b'# commented = { }\n'
+        b'craven ?= {\n'
+        b'\tname = "a } in a string"\n'
+        b'}\n'
+        b'calm = yes\n'
+    )
+    assert parse_object_keys(content) == [("brave", 1), ("craven", 6), ("calm", 9)]
+
+def test_namespace_and_scripted_variables_are_skipped():
+    content = b'namespace = my_events\n@cost = 100\nmy_events.1 = {\n\tcost = @cost\n}\n'
+    assert parse_object_keys(content) == [("my_events.1", 3)]
+
+def test_blocks_nested_deeper_than_the_pattern():
+    depth = BLOCK_DEPTH + 3
+    nested = b'a = { ' * depth + b'inner = yes ' + b'} ' * depth
+    content = b'deep = {\n' + nested + b'\n}\nafter = {\n}\n'
+    assert parse_object_keys(content) == [("deep", 1), ("after", 4)]
+
+def test_unclosed_block_hides_the_rest_of_the_file():
+    content = b'first = {\n}\nbroken = {\n\tinner = { \nhidden = {\n}\n'
+    assert parse_object_keys(content) == [("first", 1), ("broken", 3)]
+
+def test_stray_closing_brace_is_ignored():
+    content = b'first = {\n}\n}\nsecond = {\n}\n'
+    assert parse_object_keys(content) == [("first", 1), ("second", 4)]
+
+def test_collision_across_mods_with_different_file_names(tmp_path):
+    mods_directory = str(tmp_path)
+    write_file(os.path.join(mods_directory, "100", "common", "traits", "00_traits.txt"), b'brave = {\n}\ncalm = {\n}\n')
+    write_file(os.path.join(mods_directory, "200", "common", "traits", "zz_my_traits.txt"), b'\nbrave = {\n}\nnew = {\n}\n')
+    # The same key in another database is a different object
+    write_file(os.path.join(mods_directory, "200", "common", "decisions", "zz_decisions.txt"), b'calm = {\n}\n')
+    mod_files = {
+        "100": ["common/traits/00_traits.txt"],
+        "200": ["common/traits/zz_my_traits.txt", "common/decisions/zz_decisions.txt"],
+    }
+    cache = ScriptObjectCache(tmp_path / "script_objects.json")
+    collisions = find_object_collisions(mod_files, mods_directory, cache)
+    assert collisions == {
+        "common/traits/brave": [("100", "common/traits/00_traits.txt", 1), ("200", "common/traits/zz_my_traits.txt", 2)],
+    }
+    # A second scan reads the keys from the cache and finds the same
+    assert find_object_collisions(mod_files, mods_directory, ScriptObjectCache(tmp_path / "script_objects.json")) == collisions
+
+def test_cache_round_trip(tmp_path):
+    file_path = tmp_path / "events.txt"
+    file_path.write_bytes(b'x = {\n}\n')
+    stat = os.stat(file_path)
+    # Keys never hold an ASCII space, but may hold other whitespace
+    keys = [("my_events.1", 3), ("title\u00a0no_break", 12)]
+
+    cache = ScriptObjectCache(tmp_path / "script_objects.json")
+    cache.load()
+    cache.set_keys("100", "events/events.txt", stat, keys)
+    cache.set_keys("100", "events/empty.txt", stat, [])
+    cache.save()
+
+    cache = ScriptObjectCache(tmp_path / "script_objects.json")
+    cache.load()
+    assert cache.get_keys("100", "events/events.txt", stat) == keys
+    assert cache.get_keys("100", "events/empty.txt", stat) == []
+    assert cache.get_keys("100", "events/unknown.txt", stat) is None
+    # An edited file is parsed again
+    file_path.write_bytes(b'x = {\n}\ny = {\n}\n')
+    assert cache.get_keys("100", "events/events.txt", os.stat(file_path)) is None
@@ -0,0 +1,327 @@
+# ui/conflict_model.py
+
+import os
+from PyQt5 import QtWidgets, QtGui, QtCore
+from ui.mod_table_model import HeaderButtonDelegate
+
+REMOVE_COLUMN = 0
+KIND_ORDER = {"red": 0, "yellow": 1, "object": 2, "identical": 3, "missing_localization": 4}
+FILE_KINDS = ("red", "yellow", "identical")
+KIND, PATH, MODS, MOD_TEXT, FOLDER_TEXT, KEY, LOCATIONS = range(7)
+
+class ConflictTableModel(QtCore.QAbstractTableModel):
+    # Columns: X, one per mod (as many as the biggest conflict), Path. Mods are in load order, so the last
+    # one of a row is the winner the game uses.
+    # Object collisions list the "<folder>/<key>" of the object as path and one mod cell per definition, with its
+    # (file, line) in locations.
+    # Rows are [kind, path, mods, mod text, folder text, key, locations] lists; all_rows holds everything, rows what the
+    # filter lets through in the current sort order. Filtering and sorting are done here on plain lists
+    # instead of in a QSortFilterProxyModel, which would call back into Python for every row and comparison.
+    def __init__(self, mod_names, parent=None):
+        super().__init__(parent)
+        self.mod_names = mod_names
+        self.all_rows = []
+        self.rows = []
+        self.row_by_path = {}
+        self.dismissed = set()
+        self.mod_columns = 1
+        self.mod_filter = ""
+        self.folder_filter = ""
+        self.sort_column = -1
+        self.sort_order = QtCore.Qt.AscendingOrder
+
+    def rowCount(self, parent=QtCore.QModelIndex()):
+        return 0 if parent.isValid() else len(self.rows)
+
+    def columnCount(self, parent=QtCore.QModelIndex()):
+        return 0 if parent.isValid() else self.mod_columns + 2
+
+    def path_column(self):
+        return self.mod_columns + 1
+
+    def headerData(self, section, orientation, role=QtCore.Qt.DisplayRole):
+        if role == QtCore.Qt.DisplayRole and orientation == QtCore.Qt.Horizontal:
+            if section == REMOVE_COLUMN:
+                return ""
+            if section == self.path_column():
+                return "Path"
+            return f"Mod {section}"
+        return super().headerData(section, orientation, role)
+
+    def mod_at(self, index):
+        # Mod folder of a mod cell, or None
+        row = self.rows[index.row()]
+        position = index.column() - 1
+        if 0 <= position < len(row[MODS]) and index.column() != self.path_column():
+            return row[MODS][position]
+        return None
+
+    def path_at(self, index):
+        # The file to open for a mod cell
+        row = self.rows[index.row()]
+        if row[KIND] == "object":
+            return row[LOCATIONS][index.column() - 1][0]
+        return row[PATH]
+
+    def data(self, index, role=QtCore.Qt.DisplayRole):
+        if not index.isValid():
+            return None
+        row = self.rows[index.row()]
+        column = index.column()
+        kind = row[KIND]
+        if role == QtCore.Qt.DisplayRole:
+            if column == REMOVE_COLUMN:
+                return "X"
+            if column == self.path_column():
+                return "Missing Russian Localization" if kind == "missing_localization" else row[PATH]
+            return self.mod_at(index)
+        if role == QtCore.Qt.UserRole:
+            if column == REMOVE_COLUMN or (kind != "missing_localization" and self.mod_at(index) is not None):
+                return "button"
+            return None
+        if role == QtCore.Qt.ToolTipRole:
+            mod = self.mod_at(index)
+            if mod is not None:
+                name = self.mod_names.get(mod, mod)
+                if kind == "missing_localization":
+                    return name
+                if kind == "object":
+                    file, line = row[LOCATIONS][column - 1]
+                    return f"{name}\n{file}, line {line}"
+                winner = row[MODS][-1]
+                if mod == winner:
+                    return f"{name}\nWinner: loaded last"
+                return f"{name}\nOverridden by {self.mod_names.get(winner, winner)}"
+            if column == self.path_column() and kind == "identical":
+                return "Identical override: the file is byte-identical in all mods"
+            if column == self.path_column() and kind == "object":
+                return f"Defined in {len(row[MODS])} files; the game keeps only one definition"
+        elif role == QtCore.Qt.FontRole and kind in ("red", "yellow") and column == len(row[MODS]):
+            font = QtGui.QFont()
+            font.setBold(True)
+            return font
+        elif role == QtCore.Qt.ForegroundRole and column == self.path_column():
+            if kind in ("identical", "missing_localization"):
+                # Same content in every mod, so the load order does not matter for this file
+                return QtGui.QBrush(QtGui.QColor(QtCore.Qt.gray))
+        elif role == QtCore.Qt.TextAlignmentRole and column == self.path_column():
+            return QtCore.Qt.AlignRight | QtCore.Qt.AlignVCenter
+        return None
+
+    def make_row(self, kind, path, mods, key, locations=None):
+        # The lower-cased texts the filters look in are filled in the first time a filter is used
+        return [kind, path, tuple(mods), None, None, key, locations]
+
+    def accepts(self, row):
+        if self.mod_filter:
+            if row[MOD_TEXT] is None:
+                mods = row[MODS]
+                row[MOD_TEXT] = "\0".join(mods + tuple(self.mod_names.get(mod, "") for mod in mods)).lower()
+            if self.mod_filter not in row[MOD_TEXT]:
+                return False
+        if self.folder_filter:
+            if row[FOLDER_TEXT] is None:
+                # File paths come from the manifests with os.sep, object ids always use "/"
+                row[FOLDER_TEXT] = row[PATH].replace(os.sep, "/").rpartition("/")[0].lower()
+            if self.folder_filter not in row[FOLDER_TEXT]:
+                return False
+        return True
+
+    def ensure_mod_columns(self, mod_count):
+        if mod_count <= self.mod_columns:
+            return
+        # New mod columns go in front of Path
+        self.beginInsertColumns(QtCore.QModelIndex(), self.mod_columns + 1, mod_count)
+        self.mod_columns = mod_count
+        self.endInsertColumns()
+
+    def set_conflicts(self, conflicts, kind):
+        # Adds conflicts or updates the ones already listed in place; paths the user removed stay removed.
+        # New rows go to the end of the view until the next sort, so the rows being looked at do not jump.
+        self.set_rows([(kind, path, mods, path, None) for path, mods in conflicts.items()])
+
+    def set_missing_localizations(self, mod_folders):
+        self.set_rows([("missing_localization", "", (mod,), ("missing_localization", mod), None) for mod in mod_folders])
+
+    def set_object_collisions(self, collisions):
+        # collisions is "<folder>/<key>" -> (mod folder, file, line) of every definition
+        self.set_rows([
+            ("object", object_id, [mod for mod, file, line in locations], ("object", object_id),
+             tuple((file, line) for mod, file, line in locations))
+            for object_id, locations in collisions.items()
+        ])
+
+    def set_rows(self, entries):
+        new_rows = []
+        filtering = bool(self.mod_filter or self.folder_filter)
+        changed = False
+        mod_count = 0
+        for kind, path, mods, key, locations in entries:
+            if key in self.dismissed:
+                continue
+            mod_count = max(mod_count, len(mods))
+            row = self.row_by_path.get(key)
+            if row is None:
+                row = self.make_row(kind, path, mods, key, locations)
+                self.row_by_path[key] = row
+                self.all_rows.append(row)
+                if not filtering or self.accepts(row):
+                    new_rows.append(row)
+            else:
+                row[:] = self.make_row(kind, path, mods, key, locations)
+                changed = True
+        self.ensure_mod_columns(mod_count)
+        if changed and self.rows:
+            # Updates are usually few compared with the table, so one dataChanged over all of them is fine
+            self.dataChanged.emit(self.index(0, 0), self.index(len(self.rows) - 1, self.columnCount() - 1))
+        if new_rows:
+            self.beginInsertRows(QtCore.QModelIndex(), len(self.rows), len(self.rows) + len(new_rows) - 1)
+            self.rows.extend(new_rows)
+            self.endInsertRows()
+
+    def set_winners(self, resolved):
+        # resolved is path -> (winner, shadowed mods in load order) for the conflicts whose order changed
+        changed = False
+        for path, (winner, shadowed) in resolved.items():
+            row = self.row_by_path.get(path)
+            if row is not None:
+                row[MODS] = tuple(shadowed) + (winner,)
+                # A disabled mod leaves the row, so the mod filter text is built again
+                row[MOD_TEXT] = None
+                changed = True
+        if changed and self.rows:
+            self.dataChanged.emit(self.index(0, 0), self.index(len(self.rows) - 1, self.columnCount() - 1))
+
+    def keep_only(self, paths):
+        # Drops conflicts no longer in the final result
+        stale = [key for key, row in self.row_by_path.items() if row[KIND] in FILE_KINDS and key not in paths]
+        if not stale:
+            return
+        for key in stale:
+            del self.row_by_path[key]
+        self.rebuild()
+
+    def drop_conflicts(self, paths):
+        # Drops the file conflicts of the given paths, e.g. after a mod providing them was disabled
+        stale = [key for key in paths if key in self.row_by_path and self.row_by_path[key][KIND] in FILE_KINDS]
+        if not stale:
+            return
+        for key in stale:
+            del self.row_by_path[key]
+        self.rebuild()
+
+    def remove_row(self, view_row):
+        row = self.rows[view_row]
+        self.dismissed.add(row[KEY])
+        self.row_by_path.pop(row[KEY], None)
+        self.all_rows.remove(row)
+        self.beginRemoveRows(QtCore.QModelIndex(), view_row, view_row)
+        del self.rows[view_row]
+        self.endRemoveRows()
+
+    def sort_key(self, column):
+        if column == REMOVE_COLUMN:
+            return lambda row: (KIND_ORDER[row[KIND]], row[PATH])
+        if column == self.path_column():
+            return lambda row: row[PATH]
+        position = column - 1
+        # Rows without a mod in that column go last
+        return lambda row: (len(row[MODS]) <= position, row[MODS][position] if position < len(row[MODS]) else "")
+
+    def sort(self, column, order=QtCore.Qt.AscendingOrder):
+        self.sort_column = column
+        self.sort_order = order
+        self.layoutAboutToBeChanged.emit()
+        self.apply_sort()
+        self.layoutChanged.emit()
+
+    def apply_sort(self):
+        if self.sort_column >= 0:
+            self.rows.sort(key=self.sort_key(self.sort_column), reverse=self.sort_order == QtCore.Qt.DescendingOrder)
+
+    def set_filters(self, mod_filter, folder_filter):
+        mod_filter = mod_filter.strip().lower()
+        folder_filter = folder_filter.strip().lower().replace("\\", "/")
+        if (mod_filter, folder_filter) == (self.mod_filter, self.folder_filter):
+            return
+        self.mod_filter = mod_filter
+        self.folder_filter = folder_filter
+        self.rebuild()
+
+    def rebuild(self):
+        self.beginResetModel()
+        live = set(map(id, self.row_by_path.values()))
+        self.all_rows = [row for row in self.all_rows if id(row) in live]
+        self.rows = [row for row in self.all_rows if self.accepts(row)]
+        self.apply_sort()
+        self.endResetModel()
+
+class ConflictView(QtWidgets.QWidget):
+    # Filter boxes over a QTableView of a ConflictTableModel. Rows have a fixed height and columns are sized
+    # from the rows on screen, so opening the view costs the same for 100 or 100k conflicts.
+    open_file = QtCore.pyqtSignal(str, str)
+
+    def __init__(self, mod_names, parent=None):
+        super().__init__(parent)
+        self.model = ConflictTableModel(mod_names, self)
+        layout = QtWidgets.QVBoxLayout(self)
+        layout.setContentsMargins(0, 0, 0, 0)
+
+        filter_layout = QtWidgets.QHBoxLayout()
+        self.mod_filter = QtWidgets.QLineEdit()
+        self.mod_filter.setPlaceholderText("Filter by mod (folder or name)")
+        self.folder_filter = QtWidgets.QLineEdit()
+        self.folder_filter.setPlaceholderText("Filter by folder, e.g. common/traits")
+        self.count_label = QtWidgets.QLabel()
+        filter_layout.addWidget(self.mod_filter)
+        filter_layout.addWidget(self.folder_filter)
+        filter_layout.addWidget(self.count_label)
+        layout.addLayout(filter_layout)
+
+        # Typing restarts the timer, the filter runs once typing pauses
+        self.filter_timer = QtCore.QTimer(self)
+        self.filter_timer.setSingleShot(True)
+        self.filter_timer.setInterval(150)
+        self.filter_timer.timeout.connect(self.apply_filters)
+        self.mod_filter.textChanged.connect(self.filter_timer.start)
+        self.folder_filter.textChanged.connect(self.filter_timer.start)
+
+        self.table = QtWidgets.QTableView()
+        self.table.setModel(self.model)
+        self.table.setItemDelegate(HeaderButtonDelegate(self.table))
+        self.table.setEditTriggers(QtWidgets.QAbstractItemView.NoEditTriggers)
+        self.table.setSelectionMode(QtWidgets.QAbstractItemView.NoSelection)
+        self.table.setSortingEnabled(True)
+        self.table.horizontalHeader().setSortIndicator(-1, QtCore.Qt.AscendingOrder)
+        vertical_header = self.table.verticalHeader()
+        vertical_header.setSectionResizeMode(QtWidgets.QHeaderView.Fixed)
+        vertical_header.setDefaultSectionSize(self.table.fontMetrics().height() + 10)
+        vertical_header.hide()
+        header = self.table.horizontalHeader()
+        header.setResizeContentsPrecision(0)
+        header.setSectionResizeMode(QtWidgets.QHeaderView.Interactive)
+        header.setDefaultSectionSize(120)
+        header.setStretchLastSection(True)
+        header.resizeSection(REMOVE_COLUMN, 30)
+        self.table.clicked.connect(self.cell_clicked)
+        layout.addWidget(self.table)
+
+        for signal in (self.model.rowsInserted, self.model.rowsRemoved, self.model.modelReset):
+            signal.connect(self.update_count)
+        self.update_count()
+
+    def apply_filters(self):
+        self.model.set_filters(self.mod_filter.text(), self.folder_filter.text())
+
+    def update_count(self, *args):
+        shown = self.model.rowCount()
+        total = len(self.model.row_by_path)
+        self.count_label.setText(f"{shown} of {total} shown" if shown != total else f"{total} conflicts")
+
+    def cell_clicked(self, index):
+        if index.data(QtCore.Qt.UserRole) != "button":
+            return
+        if index.column() == REMOVE_COLUMN:
+            self.model.remove_row(index.row())
+            return
+        self.open_file.emit(self.model.mod_at(index), self.model.path_at(index))
@@ -0,0 +1,435 @@
+# ui/mod_table_model.py
+
+from PyQt5 import QtWidgets, QtGui, QtCore
+
+COLUMNS = ["Name", "Version", "Comment", "Path", "Size", "Conflicts"]
+NAME_COLUMN, VERSION_COLUMN, COMMENT_COLUMN, PATH_COLUMN, SIZE_COLUMN, CONFLICTS_COLUMN = range(len(COLUMNS))
+BUTTON_COLUMN = len(COLUMNS) - 1
+SEARCH_COLUMNS = (NAME_COLUMN, VERSION_COLUMN, COMMENT_COLUMN, PATH_COLUMN)
+# Rows visible/hidden one by one above this many separate runs cost more than refiltering everything
+MAX_FILTER_RUNS = 32
+
+def format_size(total_size):
+    size_in_mb = total_size / (1024 * 1024)
+    if size_in_mb > 99:
+        return f"{size_in_mb / 1024:.2f} GB"
+    else:
+        return f"{size_in_mb:.2f} MB"
+
+def match_rank(text, term):
+    # Lower is better: prefix, word start, substring, then the letters of the term in order (fuzzy)
+    if text.startswith(term):
+        return 0
+    position = text.find(term)
+    if position > 0:
+        return 1 if not text[position - 1].isalnum() else 2
+    position = 0
+    for char in term:
+        position = text.find(char, position) + 1
+        if not position:
+            return None
+    return 3
+
+def is_color_light(color):
+    r, g, b, _ = QtGui.QColor(color).getRgb()
+    brightness = (r * 299 + g * 587 + b * 114) / 1000
+    return brightness > 186
+
+class ModTableModel(QtCore.QAbstractTableModel):
+    # Rows are the mod dicts from ModOperations.list_mods plus {"header": name, "collapsed": bool} group headers.
+    # Everything shown is computed in data(), so only the rows on screen cost anything.
+    groups_changed = QtCore.pyqtSignal()
+
+    def __init__(self, manager, grouped, sizes, parent=None):
+        super().__init__(parent)
+        self.manager = manager
+        self.grouped = grouped
+        self.rows = []
+        self.row_by_path = {}
+        # Lowercased searchable texts per mod path, built when rows arrive instead of on every keystroke
+        self.search_index = {}
+        # Shared between both tables so a size survives a mod moving from one to the other
+        self.sizes = sizes
+        # Sizes arrive one mod at a time; repaint the column at most every 100 ms
+        self.size_timer = QtCore.QTimer(self)
+        self.size_timer.setSingleShot(True)
+        self.size_timer.setInterval(100)
+        self.size_timer.timeout.connect(lambda: self.refresh_column(SIZE_COLUMN))
+
+    def rowCount(self, parent=QtCore.QModelIndex()):
+        return 0 if parent.isValid() else len(self.rows)
+
+    def columnCount(self, parent=QtCore.QModelIndex()):
+        return 0 if parent.isValid() else len(COLUMNS)
+
+    def headerData(self, section, orientation, role=QtCore.Qt.DisplayRole):
+        if role == QtCore.Qt.DisplayRole and orientation == QtCore.Qt.Horizontal:
+            return COLUMNS[section]
+        return super().headerData(section, orientation, role)
+
+    def is_header(self, row):
+        return 0 <= row < len(self.rows) and "header" in self.rows[row]
+
+    def mod_path(self, row):
+        if 0 <= row < len(self.rows) and "header" not in self.rows[row]:
+            return self.rows[row]["path"]
+        return None
+
+    def mod_paths(self):
+        return [row["path"] for row in self.rows if "header" not in row]
+
+    def find_row(self, mod_path):
+        return self.row_by_path.get(mod_path, -1)
+
+    def search_texts(self, row):
+        return self.search_index.get(self.rows[row]["path"])
+
+    def index_rows(self, rows):
+        for row in rows:
+            if "header" not in row:
+                self.search_index[row["path"]] = (
+                    (row.get("name") or "").lower(),
+                    (row.get("version") or "").lower(),
+                    self.manager.comments.get(row["path"], "").lower(),
+                    row["path"].lower(),
+                )
+
+    def is_temp_disabled(self, mod_path):
+        return not self.manager.mods_data["enabled_mods"].get(f"mod/{mod_path}", True)
+
+    def data(self, index, role=QtCore.Qt.DisplayRole):
+        if not index.isValid():
+            return None
+        row = self.rows[index.row()]
+        column = index.column()
+
+        if "header" in row:
+            color = self.manager.colors.get(row["header"])
+            if role in (QtCore.Qt.DisplayRole, QtCore.Qt.EditRole):
+                if column == NAME_COLUMN:
+                    return row["header"]
+                if column == BUTTON_COLUMN:
+                    return "Show" if row["collapsed"] else "Hide"
+            elif role == QtCore.Qt.UserRole:
+                if column == NAME_COLUMN:
+                    return "header"
+                if column == BUTTON_COLUMN:
+                    return "button"
+            elif role == QtCore.Qt.FontRole and column == NAME_COLUMN:
+                font = QtGui.QFont()
+                font.setBold(True)
+                font.setPointSize(12)
+                return font
+            elif role == QtCore.Qt.TextAlignmentRole and column == NAME_COLUMN:
+                return QtCore.Qt.AlignCenter
+            elif role == QtCore.Qt.BackgroundRole and color and column != BUTTON_COLUMN:
+                return QtGui.QBrush(QtGui.QColor(color))
+            elif role == QtCore.Qt.ForegroundRole and color and column != BUTTON_COLUMN:
+                return QtGui.QBrush(QtGui.QColor("#000000" if is_color_light(color) else "#FFFFFF"))
+            return None
+
+        mod_path = row["path"]
+        if role in (QtCore.Qt.DisplayRole, QtCore.Qt.EditRole):
+            if column == NAME_COLUMN:
+                return row.get("name")
+            if column == VERSION_COLUMN:
+                return row.get("version")
+            if column == COMMENT_COLUMN:
+                return self.manager.comments.get(mod_path, "")
+            if column == PATH_COLUMN:
+                return mod_path
+            if column == SIZE_COLUMN:
+                size = self.sizes.get(mod_path)
+                return "…" if size is None else format_size(size)
+            if column == CONFLICTS_COLUMN:
+                if not self.grouped:
+                    return ""
+                conflict_count = self.manager.get_conflict_count(mod_path)
+                return "…" if conflict_count is None else str(conflict_count)
+        elif role == QtCore.Qt.FontRole:
+            if self.is_temp_disabled(mod_path):
+                font = QtGui.QFont()
+                font.setStrikeOut(True)
+                return font
+        elif role == QtCore.Qt.BackgroundRole:
+            color = self.manager.colors.get(mod_path)
+            if color:
+                return QtGui.QBrush(QtGui.QColor(color))
+        elif role == QtCore.Qt.ForegroundRole:
+            color = self.manager.colors.get(mod_path)
+            if color:
+                return QtGui.QBrush(QtGui.QColor("#000000" if is_color_light(color) else "#FFFFFF"))
+            if self.is_temp_disabled(mod_path):
+                return QtGui.QBrush(QtGui.QColor(128, 128, 128))
+        return None
+
+    def flags(self, index):
+        if not index.isValid():
+            return QtCore.Qt.ItemIsDropEnabled
+        if self.is_header(index.row()):
+            if index.column() == NAME_COLUMN:
+                return QtCore.Qt.ItemIsSelectable | QtCore.Qt.ItemIsEnabled | QtCore.Qt.ItemIsEditable | QtCore.Qt.ItemIsDropEnabled
+            if index.column() == BUTTON_COLUMN:
+                return QtCore.Qt.ItemIsEnabled
+            return QtCore.Qt.NoItemFlags
+        flags = QtCore.Qt.ItemIsSelectable | QtCore.Qt.ItemIsEnabled | QtCore.Qt.ItemIsDragEnabled | QtCore.Qt.ItemIsDropEnabled
+        if index.column() == COMMENT_COLUMN:
+            flags |= QtCore.Qt.ItemIsEditable
+        return flags
+
+    def setData(self, index, value, role=QtCore.Qt.EditRole):
+        if not index.isValid() or role != QtCore.Qt.EditRole:
+            return False
+        row = self.rows[index.row()]
+        if "header" in row:
+            if index.column() != NAME_COLUMN or not value:
+                return False
+            row["header"] = value
+            self.dataChanged.emit(index, index)
+            self.groups_changed.emit()
+            return True
+        if index.column() == COMMENT_COLUMN:
+            self.manager.comments[row["path"]] = value
+            self.manager.save_comments()
+            self.index_rows([row])
+            self.dataChanged.emit(index, index)
+            return True
+        return False
+
+    def supportedDropActions(self):
+        return QtCore.Qt.MoveAction | QtCore.Qt.CopyAction
+
+    def reindex(self):
+        self.row_by_path = {row["path"]: position for position, row in enumerate(self.rows) if "header" not in row}
+
+    def set_rows(self, rows):
+        self.beginResetModel()
+        self.rows = list(rows)
+        self.search_index = {}
+        self.index_rows(self.rows)
+        self.reindex()
+        self.endResetModel()
+
+    def insert_rows(self, position, rows):
+        if not rows:
+            return
+        position = max(0, min(position, len(self.rows)))
+        self.beginInsertRows(QtCore.QModelIndex(), position, position + len(rows) - 1)
+        self.rows[position:position] = rows
+        self.index_rows(rows)
+        self.reindex()
+        self.endInsertRows()
+
+    def replace_row(self, mod):
+        # Swaps in a re-read descriptor for the row of the same mod; returns False if the mod is not in this table
+        row = self.find_row(mod["path"])
+        if row == -1:
+            return False
+        self.rows[row] = mod
+        self.index_rows([mod])
+        self.refresh_rows(row, row)
+        return True
+
+    def take_rows(self, positions):
+        # Removes the rows at the given positions and returns them in table order
+        positions = sorted(set(positions))
+        taken = [self.rows[position] for position in positions]
+        # Remove contiguous runs from the bottom up so each run is a single signal
+        runs = []
+        for position in positions:
+            if runs and runs[-1][1] == position - 1:
+                runs[-1][1] = position
+            else:
+                runs.append([position, position])
+        for first, last in reversed(runs):
+            self.beginRemoveRows(QtCore.QModelIndex(), first, last)
+            del self.rows[first:last + 1]
+            self.endRemoveRows()
+        self.reindex()
+        return taken
+
+    def shift_rows(self, rows, direction):
+        # Moves rows one step up (direction < 0) or down without crossing a header, the same rule
+        # as LoadOrder.shift. Returns where each row ended up.
+        step = -1 if direction < 0 else 1
+        blocked = set()
+        new_rows = []
+        for row in sorted(rows, reverse=step > 0):
+            neighbour = row + step
+            if (not 0 <= neighbour < len(self.rows) or neighbour in blocked
+                    or "header" in self.rows[row] or "header" in self.rows[neighbour]):
+                blocked.add(row)
+                new_rows.append(row)
+                continue
+            self.rows[row], self.rows[neighbour] = self.rows[neighbour], self.rows[row]
+            new_rows.append(neighbour)
+        if len(blocked) < len(new_rows):
+            self.reindex()
+            self.refresh_rows(max(0, min(rows) - 1), min(len(self.rows) - 1, max(rows) + 1))
+        return new_rows
+
+    def refresh_rows(self, first, last):
+        self.dataChanged.emit(self.index(first, 0), self.index(last, len(COLUMNS) - 1))
+
+    def refresh(self):
+        if self.rows:
+            self.refresh_rows(0, len(self.rows) - 1)
+
+    def refresh_column(self, column):
+        if self.rows:
+            self.dataChanged.emit(self.index(0, column), self.index(len(self.rows) - 1, column))
+
+    def set_size(self, mod_path, total_size):
+        if mod_path in self.row_by_path and not self.size_timer.isActive():
+            self.size_timer.start()
+
+    def group_rows(self, header_row):
+        # Positions of the mods under a header, up to the next header
+        row = header_row + 1
+        while row < len(self.rows) and "header" not in self.rows[row]:
+            yield row
+            row += 1
+
+    def toggle_collapsed(self, header_row):
+        self.rows[header_row]["collapsed"] = not self.rows[header_row]["collapsed"]
+        index = self.index(header_row, BUTTON_COLUMN)
+        self.dataChanged.emit(index, index)
+
+    def collapsed_rows(self):
+        collapsed = set()
+        for position, row in enumerate(self.rows):
+            if "header" in row and row["collapsed"]:
+                collapsed.update(self.group_rows(position))
+        return collapsed
+
+class ModFilterProxyModel(QtCore.QSortFilterProxyModel):
+    # Hides rows of collapsed groups and rows not matching the search terms; headers always stay visible
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.search_terms = {}
+        self.pending_terms = {}
+        self.hidden_rows = set()
+        # Keystrokes restart the timer, the filter runs once typing pauses
+        self.search_timer = QtCore.QTimer(self)
+        self.search_timer.setSingleShot(True)
+        self.search_timer.setInterval(150)
+        self.search_timer.timeout.connect(lambda: self.set_search_terms(self.pending_terms))
+
+    def setSourceModel(self, model):
+        super().setSourceModel(model)
+        model.rowsInserted.connect(self.update_hidden_rows)
+        model.rowsRemoved.connect(self.update_hidden_rows)
+        model.modelReset.connect(self.update_hidden_rows)
+
+    def schedule_search_terms(self, search_terms):
+        self.pending_terms = search_terms
+        self.search_timer.start()
+
+    def set_search_terms(self, search_terms):
+        self.search_timer.stop()
+        search_terms = {column: term for column, term in search_terms.items() if term}
+        old_terms = self.search_terms
+        if search_terms == old_terms:
+            return
+        self.search_terms = search_terms
+        # A narrower query can only hide visible rows and a wider one only show hidden rows,
+        # so only that side has to be checked
+        if self.is_narrower(search_terms, old_terms):
+            changed = [row for row in self.visible_source_rows() if not self.filterAcceptsRow(row, QtCore.QModelIndex())]
+        elif self.is_narrower(old_terms, search_terms):
+            visible = set(self.visible_source_rows())
+            changed = [row for row in range(self.sourceModel().rowCount()) if row not in visible and self.filterAcceptsRow(row, QtCore.QModelIndex())]
+        else:
+            changed = None
+        self.refilter_rows(changed)
+        self.update_ranking()
+
+    @staticmethod
+    def is_narrower(terms, other_terms):
+        return all(column in terms and term in terms[column] for column, term in other_terms.items())
+
+    def visible_source_rows(self):
+        return [self.mapToSource(self.index(row, 0)).row() for row in range(self.rowCount())]
+
+    def refilter_rows(self, rows):
+        if rows is None:
+            self.invalidateFilter()
+            return
+        runs = []
+        for row in sorted(rows):
+            if runs and runs[-1][1] == row - 1:
+                runs[-1][1] = row
+            else:
+                runs.append([row, row])
+        if len(runs) > MAX_FILTER_RUNS:
+            self.invalidateFilter()
+            return
+        # dataChanged makes the proxy re-check just these rows
+        model = self.sourceModel()
+        for first, last in runs:
+            model.dataChanged.emit(model.index(first, NAME_COLUMN), model.index(last, NAME_COLUMN))
+
+    def update_ranking(self):
+        # Best name matches first in the ungrouped table; the grouped one keeps its load order
+        if self.sourceModel().grouped:
+            return
+        if NAME_COLUMN in self.search_terms:
+            # sort() returns early when the column and order are unchanged, so a new term needs invalidate()
+            if self.sortColumn() == NAME_COLUMN:
+                self.invalidate()
+            else:
+                self.sort(NAME_COLUMN)
+        elif self.sortColumn() != -1:
+            self.sort(-1)
+
+    def update_hidden_rows(self):
+        hidden_rows = self.sourceModel().collapsed_rows()
+        if hidden_rows != self.hidden_rows:
+            self.hidden_rows = hidden_rows
+            self.invalidateFilter()
+
+    def filterAcceptsRow(self, source_row, source_parent):
+        model = self.sourceModel()
+        if model.is_header(source_row):
+            return True
+        if source_row in self.hidden_rows:
+            return False
+        if not self.search_terms:
+            return True
+        texts = model.search_texts(source_row)
+        for column, term in self.search_terms.items():
+            if column == NAME_COLUMN:
+                if match_rank(texts[column], term) is None:
+                    return False
+            elif term not in texts[column]:
+                return False
+        return True
+
+    def lessThan(self, left, right):
+        model = self.sourceModel()
+        term = self.search_terms.get(NAME_COLUMN, "")
+        left_rank = match_rank(model.search_texts(left.row())[NAME_COLUMN], term)
+        right_rank = match_rank(model.search_texts(right.row())[NAME_COLUMN], term)
+        if left_rank != right_rank:
+            return left_rank < right_rank
+        return left.row() < right.row()
+
+class HeaderButtonDelegate(QtWidgets.QStyledItemDelegate):
+    # Draws cells whose UserRole is "button" as push buttons, e.g. the Hide/Show cell of group headers
+    def paint(self, painter, option, index):
+        if index.data(QtCore.Qt.UserRole) != "button":
+            super().paint(painter, option, index)
+            return
+        button = QtWidgets.QStyleOptionButton()
+        button.rect = option.rect.adjusted(1, 1, -1, -1)
+        button.text = index.data()
+        button.state = QtWidgets.QStyle.State_Enabled | QtWidgets.QStyle.State_Raised
+        widget = option.widget
+        style = widget.style() if widget else QtWidgets.QApplication.style()
+        font = index.data(QtCore.Qt.FontRole)
+        painter.save()
+        if font is not None:
+            painter.setFont(font)
+            button.fontMetrics = QtGui.QFontMetrics(font)
+        style.drawControl(QtWidgets.QStyle.CE_PushButton, button, painter, widget)
+        painter.restore()
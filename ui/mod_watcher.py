@@ -0,0 +1,102 @@
+# ui/mod_watcher.py
+
+import os
+import time
+from PyQt5 import QtCore
+from logic.file_operations import snapshot_mods_directory
+
+# A burst of events (a Workshop sync, an unpacked archive) is handled once it has been quiet this long, in ms
+COALESCE_DELAY = 500
+# ...but never later than this after the first event of the burst
+MAX_COALESCE_DELAY = 3000
+
+class ModDirectoryWatcher(QtCore.QObject):
+    # Watches the mods directory, its descriptors and the root folder of every mod and reports the changes in batches.
+    # The descriptors are watched as files because a directory watch (inotify on Linux) does not report a file
+    # edited in place.
+    # changes_ready carries the mod folders that changed inside; changes to the mods directory itself
+    # (descriptors, folders added or replaced) are found by ModOperations.sync_mods_directory.
+    # The app keeps its settings and caches in the mods directory too; a burst that only touched those is dropped.
+    changes_ready = QtCore.pyqtSignal(set)
+
+    def __init__(self, mods_directory, parent=None):
+        super().__init__(parent)
+        self.mods_directory = os.path.normpath(str(mods_directory))
+        self.watcher = QtCore.QFileSystemWatcher(self)
+        self.watcher.directoryChanged.connect(self.directory_changed)
+        self.watcher.fileChanged.connect(self.descriptor_changed)
+        self.pending_folders = set()
+        self.directory_pending = False
+        self.requeued = False
+        # Descriptors and mod folders as of the last reported change, see snapshot_mods_directory
+        self.snapshot = None
+        self.first_event = None
+        self.timer = QtCore.QTimer(self)
+        self.timer.setSingleShot(True)
+        self.timer.timeout.connect(self.emit_changes)
+
+    def watch(self, mod_folders):
+        # Watches exactly the mods directory, the descriptors in it and the given mod folders that exist
+        snapshot = snapshot_mods_directory(self.mods_directory)
+        if self.snapshot is None:
+            self.snapshot = snapshot
+        wanted = {self.mods_directory}
+        for mod_folder in mod_folders:
+            folder_path = os.path.join(self.mods_directory, mod_folder)
+            if os.path.isdir(folder_path):
+                wanted.add(folder_path)
+        # A descriptor replaced by a rename drops out of the watcher, so it is added again here
+        wanted.update(os.path.join(self.mods_directory, name) for name in snapshot if name.lower().endswith('.mod'))
+        watched = {os.path.normpath(path) for path in self.watcher.directories() + self.watcher.files()}
+        stale = watched - wanted
+        if stale:
+            self.watcher.removePaths(list(stale))
+        new = wanted - watched
+        if new:
+            self.watcher.addPaths(sorted(new))
+
+    def stop(self):
+        self.timer.stop()
+        paths = self.watcher.directories() + self.watcher.files()
+        if paths:
+            self.watcher.removePaths(paths)
+
+    def directory_changed(self, path):
+        path = os.path.normpath(path)
+        if path == self.mods_directory:
+            self.directory_pending = True
+        else:
+            self.pending_folders.add(os.path.basename(path))
+        self.schedule()
+
+    def descriptor_changed(self, path):
+        # An edited descriptor is found like any other change to the mods directory, by its new snapshot entry
+        self.directory_pending = True
+        self.schedule()
+
+    def requeue(self, mod_folders):
+        # Changes that could not be applied yet, e.g. while an install is running; the mods directory is synced
+        # again with them even though the snapshot has already moved on
+        self.pending_folders.update(mod_folders)
+        self.requeued = True
+        self.schedule()
+
+    def schedule(self):
+        now = time.monotonic()
+        if self.first_event is None:
+            self.first_event = now
+        remaining = MAX_COALESCE_DELAY - (now - self.first_event) * 1000
+        self.timer.start(int(max(0, min(COALESCE_DELAY, remaining))))
+
+    def emit_changes(self):
+        mod_folders, self.pending_folders = self.pending_folders, set()
+        self.first_event = None
+        directory_changed = self.requeued
+        if self.directory_pending or self.requeued:
+            self.directory_pending = self.requeued = False
+            # The snapshot only covers descriptors and folders, so writes of the app's own JSON files leave it unchanged
+            snapshot = snapshot_mods_directory(self.mods_directory)
+            directory_changed = directory_changed or snapshot != self.snapshot
+            self.snapshot = snapshot
+        if directory_changed or mod_folders:
+            self.changes_ready.emit(mod_folders)
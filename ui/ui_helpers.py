@@ -2,6 +2,8 @@
 
 from PyQt5 import QtWidgets, QtGui, QtCore
 from PyQt5.QtGui import QBrush, QColor, QGradient, QLinearGradient, QRadialGradient, QConicalGradient
+from ui.mod_table_model import COLUMNS, BUTTON_COLUMN, CONFLICTS_COLUMN
+from logic.tracing import traced
 import os
 import sys
 
@@ -10,291 +12,266 @@ class UIHelpers:
         self.manager = manager
         self.ui = ui
 
+    def model(self, table):
+        return table.model().sourceModel()
+
+    def selected_rows(self, table):
+        # Rows of the source model, so they stay valid whatever the filter hides
+        proxy = table.model()
+        return sorted({proxy.mapToSource(index).row() for index in table.selectionModel().selectedIndexes()})
+
+    def select_rows(self, table, rows):
+        proxy = table.model()
+        model = proxy.sourceModel()
+        selection = QtCore.QItemSelection()
+        for row in rows:
+            proxy_index = proxy.mapFromSource(model.index(row, 0))
+            if proxy_index.isValid():
+                selection.select(proxy_index, proxy_index.sibling(proxy_index.row(), len(COLUMNS) - 1))
+        table.selectionModel().select(selection, QtCore.QItemSelectionModel.ClearAndSelect)
+
+    def row_at(self, table, y):
+        proxy = table.model()
+        proxy_row = table.rowAt(y)
+        if proxy_row == -1:
+            return -1
+        return proxy.mapToSource(proxy.index(proxy_row, 0)).row()
+
     def get_mod_index(self, mod_path):
-        enabled_mods = list(self.manager.mods_data["enabled_mods"].keys())
-        try:
-            return enabled_mods.index(mod_path)
-        except ValueError:
-            return float('inf')
+        position = self.manager.load_order.position(mod_path)
+        return float('inf') if position is None else position
 
+    @traced()
     def create_table(self, table, mods):
-        table.setRowCount(0)
-
+        rows = []
         if table == self.ui.enabled_mods_table:
             group_headers = {header: [] for header in self.manager.groups}
+            group_by_path = {}
+            for group, paths in self.manager.groups.items():
+                for mod_path in paths:
+                    group_by_path.setdefault(mod_path, group)
 
             for mod in mods:
-                mod_path = mod['path']
-                added_to_group = False
-                for group, paths in self.manager.groups.items():
-                    if mod_path in paths:
-                        group_headers[group].append(mod)
-                        added_to_group = True
-                        break
-
-                if not added_to_group:
-                    self.add_mod_row(table, mod)
+                group = group_by_path.get(mod['path'])
+                if group is not None:
+                    group_headers[group].append(mod)
+                else:
+                    rows.append(mod)
 
             for group, group_mods in group_headers.items():
-                self.create_group_header(table, group)
-                for mod in group_mods:
-                    self.add_mod_row(table, mod)
+                rows.append(self.create_group_header(table, group))
+                rows.extend(group_mods)
         else:
-            for mod in mods:
-                self.add_mod_row(table, mod)
-
-        # Apply temporary disable status
-        for row in range(table.rowCount()):
-            mod_path = f"mod/{table.item(row, 3).text()}"
-            if not self.manager.mods_data["enabled_mods"].get(mod_path, True):
-                self.toggle_temp_disable(table, row)
-
-    def add_mod_row(self, table, mod):
-        row_position = table.rowCount()
-        table.insertRow(row_position)
-        table.setItem(row_position, 0, QtWidgets.QTableWidgetItem(mod['name']))
-        table.setItem(row_position, 1, QtWidgets.QTableWidgetItem(mod['version']))
-        table.setItem(row_position, 2, QtWidgets.QTableWidgetItem(mod['comment']))
-        table.item(row_position, 2).setFlags(QtCore.Qt.ItemIsSelectable | QtCore.Qt.ItemIsEnabled | QtCore.Qt.ItemIsEditable)
-        table.setItem(row_position, 3, QtWidgets.QTableWidgetItem(mod['path']))
-        mod_folder_path = os.path.join(self.manager.mods_directory, mod['path'].split('.')[0])
-        size_display = self.calculate_folder_size(mod_folder_path)
-        table.setItem(row_position, 4, QtWidgets.QTableWidgetItem(size_display))
+            rows.extend(mods)
+
+        self.model(table).set_rows(rows)
+
+    def append_mods(self, mods):
+        # Mods arriving from the startup scan, shown unsorted until load_mods puts them in order
+        load_order = self.manager.load_order
+        enabled = [mod for mod in mods if f"mod/{mod.get('path')}" in load_order]
+        disabled = [mod for mod in mods if f"mod/{mod.get('path')}" not in load_order]
+        for table, table_mods in ((self.ui.enabled_mods_table, enabled), (self.ui.disabled_mods_table, disabled)):
+            model = self.model(table)
+            model.insert_rows(model.rowCount(), table_mods)
+
+    @traced()
+    def update_mod_rows(self, updated, removed):
+        # Applies descriptor changes found by the watcher row by row.
+        # Returns True if a new mod is already in the load order and only a full load_mods can place it.
+        tables = (self.ui.enabled_mods_table, self.ui.disabled_mods_table)
+        for table in tables:
+            model = self.model(table)
+            rows = [row for row in (model.find_row(mod_path) for mod_path in removed) if row != -1]
+            if rows:
+                model.take_rows(rows)
+                if table == self.ui.enabled_mods_table:
+                    self.save_groups_to_manager()
+        for mod_path in removed:
+            self.ui.mod_sizes.pop(mod_path, None)
+
+        updated = set(updated)
+        new_mods = []
+        for mod in self.manager.list_mods():
+            if mod['path'] in updated and not any(self.model(table).replace_row(mod) for table in tables):
+                new_mods.append(mod)
+        if any(f"mod/{mod['path']}" in self.manager.load_order for mod in new_mods):
+            return True
+        model = self.model(self.ui.disabled_mods_table)
+        model.insert_rows(model.rowCount(), new_mods)
+        return False
 
     def create_group_header(self, table, group_name):
-        if table != self.ui.enabled_mods_table:
+        return {"header": group_name, "collapsed": False}
+
+    def update_spans(self, table):
+        # Group headers span every column but the Hide/Show one; spans live in view rows, so they follow the filter
+        model = self.model(table)
+        proxy = table.model()
+        table.clearSpans()
+        if not model.grouped:
             return
-
-        row_position = table.rowCount()
-        table.insertRow(row_position)
-        header_item = QtWidgets.QTableWidgetItem(group_name)
-        header_item.setFlags(QtCore.Qt.ItemIsSelectable | QtCore.Qt.ItemIsEnabled | QtCore.Qt.ItemIsEditable)
-        header_item.setTextAlignment(QtCore.Qt.AlignCenter)
-        header_item.setData(QtCore.Qt.UserRole, "header")  # Set custom data to identify header
-
-        font = header_item.font()
-        font.setBold(True)
-        font.setPointSize(12)
-        header_item.setFont(font)
-
-        table.setItem(row_position, 0, header_item)
-        table.setSpan(row_position, 0, 1, table.columnCount() - 1)
-
-        toggle_button = QtWidgets.QPushButton("Hide")
-        button_item = QtWidgets.QTableWidgetItem()
-        button_item.setData(QtCore.Qt.UserRole, "button")
-        table.setItem(row_position, table.columnCount() - 1, button_item)
-        toggle_button.clicked.connect(lambda: self.toggle_group_visibility(table, row_position))
-        table.setCellWidget(row_position, table.columnCount() - 1, toggle_button)
-
-        for col in range(1, table.columnCount() - 1):
-            empty_item = QtWidgets.QTableWidgetItem()
-            empty_item.setFlags(QtCore.Qt.NoItemFlags)
-            table.setItem(row_position, col, empty_item)
-
-        self.save_groups_to_manager()
-
-    def calculate_folder_size(self, folder_path):
-        total_size = 0
-        for dirpath, dirnames, filenames in os.walk(folder_path):
-            for f in filenames:
-                fp = os.path.join(dirpath, f)
-                total_size += os.path.getsize(fp)
-        size_in_mb = total_size / (1024 * 1024)
-        if size_in_mb > 99:
-            return f"{size_in_mb / 1024:.2f} GB"
+        for row, data in enumerate(model.rows):
+            if "header" in data:
+                proxy_index = proxy.mapFromSource(model.index(row, 0))
+                if proxy_index.isValid():
+                    table.setSpan(proxy_index.row(), 0, 1, len(COLUMNS) - 1)
+
+    def update_size_cell(self, mod_path, total_size):
+        self.ui.mod_sizes[mod_path] = total_size
+        for table in (self.ui.disabled_mods_table, self.ui.enabled_mods_table):
+            self.model(table).set_size(mod_path, total_size)
+
+    def update_conflict_cells(self):
+        self.model(self.ui.enabled_mods_table).refresh_column(CONFLICTS_COLUMN)
+        # Newly enabled mods are left to the index thread; their cells fill in when it is done
+        self.ui.operations.index_new_mods()
+
+    def toggle_mods(self, mod_paths, enable):
+        # The one path for the Enable/Disable buttons and double-click. set_enabled never walks a mod folder
+        # (new mods are indexed by the index thread), so it runs on the GUI thread; move_rows saves the load order once.
+        if not mod_paths:
+            return
+        self.manager.set_enabled(mod_paths, enable, save=False)
+        if enable:
+            self.move_rows(self.ui.disabled_mods_table, self.ui.enabled_mods_table, mod_paths)
         else:
-            return f"{size_in_mb:.2f} MB"
-
-    def toggle_mods(self, mod_names, enable):
-        if mod_names:
-            for mod_name in mod_names:
-                if enable:
-                    self.manager.enable_mod(mod_name)
-                else:
-                    self.manager.disable_mod(mod_name)
-            self.ui.operations.load_mods()
-
-    def move_items(self, selected_items, direction):
-        selected_rows = {item.row() for item in selected_items}
-        for row in sorted(selected_rows, reverse=(direction > 0)):
-            if row == 0 and direction < 0:
-                continue
-            if row == self.ui.enabled_mods_table.rowCount() - 1 and direction > 0:
-                continue
-            self.ui.enabled_mods_table.insertRow(row + direction)
-            for col in range(self.ui.enabled_mods_table.columnCount()):
-                self.ui.enabled_mods_table.setItem(row + direction, col, self.ui.enabled_mods_table.takeItem(row, col))
-            self.ui.enabled_mods_table.removeRow(row)
-
-        self.update_enabled_mods_order()
-        self.save_groups_to_manager()
-
-        for row in sorted(selected_rows, reverse=(direction > 0)):
-            for col in range(self.ui.enabled_mods_table.columnCount()):
-                item = self.ui.enabled_mods_table.item(row + direction, col)
-                if item:
-                    item.setSelected(True)
-
-    def move_rows(self, source_table, target_table, row_indices):
-        for row_index in sorted(row_indices, reverse=True):
-            row_data = []
-            for col in range(source_table.columnCount()):
-                item = source_table.takeItem(row_index, col)
-                row_data.append(item)
-            
-            source_table.removeRow(row_index)
-            target_table.insertRow(target_table.rowCount())
-
-            for col, item in enumerate(row_data):
-                target_table.setItem(target_table.rowCount() - 1, col, item)
-
-            mod_path = f"mod/{row_data[3].text()}"
-            if target_table == self.ui.disabled_mods_table:
-                if mod_path in self.manager.mods_data["enabled_mods"]:
-                    del self.manager.mods_data["enabled_mods"][mod_path]
-            else:
-                self.manager.mods_data["enabled_mods"][mod_path] = True
-
-        self.update_enabled_mods_order()
+            self.move_rows(self.ui.enabled_mods_table, self.ui.disabled_mods_table, mod_paths)
+
+    @traced()
+    def move_rows(self, source_table, target_table, mod_paths):
+        source_model = self.model(source_table)
+        target_model = self.model(target_table)
+        rows = [row for row in (source_model.find_row(mod_path) for mod_path in mod_paths) if row != -1]
+        moved_mods = source_model.take_rows(rows)
+        target_model.insert_rows(target_model.rowCount(), moved_mods)
+        # The mods were already switched by ModOperations.set_enabled; the table appended them, so does the load order
+        if target_table == self.ui.enabled_mods_table:
+            self.manager.move_mods([mod['path'] for mod in moved_mods], save=False)
         self.manager.save_mods()
-        self.manager.save_temp_mods()
+        self.update_conflict_cells()
+        self.update_winners()
 
     def update_enabled_mods_order(self):
-        new_order = {}
-        for row in range(self.ui.enabled_mods_table.rowCount()):
-            mod_path = f"mod/{self.ui.enabled_mods_table.item(row, 3).text()}"
-            new_order[mod_path] = self.manager.mods_data["enabled_mods"].get(mod_path, True)
-        
-        # Добавляем моды, которые были в старом порядке, но не попали в новый
-        for mod_path, enabled in self.manager.mods_data["enabled_mods"].items():
-            if mod_path not in new_order:
-                new_order[mod_path] = enabled
-        
-        self.manager.mods_data["enabled_mods"] = new_order
+        # Makes the load order follow the enabled table, e.g. after the table regrouped the mods
+        load_order = self.manager.load_order
+        keys = [f"mod/{mod_path}" for mod_path in self.model(self.ui.enabled_mods_table).mod_paths()]
+        for key in keys:
+            if key not in load_order:
+                load_order[key] = True
+        # Моды, которые были в старом порядке, но не попали в новый, остаются в конце
+        load_order.reorder(keys)
         self.manager.save_mods()
-        self.manager.save_temp_mods()
+        self.update_winners()
 
-    def edit_comment(self, table):
-        selected_item = table.currentItem()
-        if not selected_item or selected_item.column() != 2:
-            return
+    def update_winners(self):
+        # Only the overridden files of the mods that really moved, were enabled or disabled are resolved again
+        paths = self.manager.take_winner_changes()
+        if paths:
+            self.ui.operations.conflict_finder.update_winners(paths, self.manager.conflict_index.resolve(paths))
 
-        table.editItem(selected_item)
-        table.cellChanged.connect(self.update_comment)
-
-    def update_comment(self, row, column):
-        if column == 2:
-            table = self.ui.sender()
-            item = table.item(row, column)
-            if item is not None:
-                new_comment = item.text()
-
-                mod_path_item = table.item(row, 3)
-                if mod_path_item is not None:
-                    mod_path = mod_path_item.text()
-                    self.manager.comments[mod_path] = new_comment
-                    self.manager.save_comments()
-                    table.cellChanged.disconnect(self.update_comment)
-                    table.cellChanged.connect(self.update_comment)
-                        
-    def toggle_temp_disable(self, table, row):
-        mod_item = table.item(row, 0)
-        mod_path = f"mod/{table.item(row, 3).text()}"
-        if mod_item.font().strikeOut():
-            mod_item.setFont(QtGui.QFont())
-            for col in range(table.columnCount()):
-                table.item(row, col).setForeground(QtGui.QBrush(QtGui.QColor(255, 255, 255)))
-            self.manager.mods_data["enabled_mods"][mod_path] = True
+    def show_move_preview(self, mod_paths, direction):
+        if not self.manager.conflict_index_built:
+            QtWidgets.QMessageBox.information(self.ui, "Move Preview", "Run Find Conflicts once to know which files the mods override.")
+            return
+        mod_names = {mod['path'].split('.')[0]: mod.get('name') or mod['path'] for mod in self.manager.mods}
+        changes = self.manager.preview_shift(mod_paths, direction)
+        message = QtWidgets.QMessageBox(self.ui)
+        message.setWindowTitle("Move Preview")
+        if not changes:
+            message.setText(f"Moving {'up' if direction < 0 else 'down'} changes no winners.")
         else:
-            font = QtGui.QFont()
-            font.setStrikeOut(True)
-            mod_item.setFont(font)
-            for col in range(table.columnCount()):
-                table.item(row, col).setForeground(QtGui.QBrush(QtGui.QColor(128, 128, 128)))
-            self.manager.mods_data["enabled_mods"][mod_path] = False
+            message.setText(f"Moving {'up' if direction < 0 else 'down'} changes the winner of {len(changes)} file(s).")
+            message.setDetailedText("\n".join(
+                f"{path}: {mod_names.get(old_winner, old_winner)} -> {mod_names.get(new_winner, new_winner)}"
+                for path, (old_winner, new_winner) in sorted(changes.items())
+            ))
+        message.exec_()
+
+    def edit_comment(self, table, index):
+        if index.column() != 2:
+            return
+        table.edit(index)
+
+    def toggle_temp_disable(self, table, rows):
+        model = self.model(table)
+        for row in rows:
+            mod_path = model.mod_path(row)
+            if mod_path is None:
+                continue
+            enabled = model.is_temp_disabled(mod_path)
+            self.manager.mods_data["enabled_mods"][f"mod/{mod_path}"] = enabled
+            # The mod keeps its place in the load order but leaves the conflict index, as after a restart
+            mod = self.manager.mods_by_path.get(mod_path)
+            if mod is not None:
+                mod['enabled'] = enabled
+            model.refresh_rows(row, row)
         
         # Обновляем файлы
-        self.manager.save_temp_mods()
         self.manager.save_mods()
+        self.manager.update_conflict_index()
+        self.update_conflict_cells()
+        self.update_winners()
 
-    def create_context_menu(self, table, selected_item, column, global_position, selected_items):
+    def create_context_menu(self, table, row, column, global_position, selected_rows):
         menu = QtWidgets.QMenu(self.ui)
-        if selected_item and selected_item.data(QtCore.Qt.UserRole) == "header":  # Check custom data for header
-            self.add_header_context_menu_actions(menu, table, selected_item, column, global_position)
-        elif selected_item and selected_item.data(QtCore.Qt.UserRole) == "button":  # Check custom data for button
-            return  # No actions for button column
+        if self.is_header_row(table, row):
+            if column == BUTTON_COLUMN:
+                return  # No actions for button column
+            self.add_header_context_menu_actions(menu, table, row, column, global_position)
         else:
-            self.add_mod_context_menu_actions(menu, table, column, global_position, selected_items)
-    
+            self.add_mod_context_menu_actions(menu, table, column, global_position, selected_rows)
+
+    def add_header_context_menu_actions(self, menu, table, row, column, global_position):
+        rename_action = menu.addAction("Rename Header")
+        delete_action = menu.addAction("Delete Header")
+        change_color_action = menu.addAction("Change Color (only light theme)" if column == 0 else "Change Color")
+        remove_color_action = None
+        header_text = self.model(table).rows[row]["header"]
+        if header_text in self.manager.colors:
+            remove_color_action = menu.addAction("Remove Color")
+        action = menu.exec_(global_position)
+
+        if action == rename_action:
+            self.rename_header(table, row)
+        elif action == delete_action:
+            self.delete_header(table, row)
+        elif action == change_color_action:
+            self.change_color(table, [row])
+        elif action == remove_color_action:
+            self.remove_color(table, [row])
 
-    def add_header_context_menu_actions(self, menu, table, selected_item, column, global_position):
-        if column == 0:
-            rename_action = menu.addAction("Rename Header")
-            delete_action = menu.addAction("Delete Header")
-            change_color_action = menu.addAction("Change Color (only light theme)")
-            remove_color_action = None
-            header_text = selected_item.text()
-            if header_text in self.manager.colors:
-                remove_color_action = menu.addAction("Remove Color")
-            action = menu.exec_(global_position)
-
-            if action == rename_action:
-                self.rename_header(table, selected_item.row())
-            elif action == delete_action:
-                self.delete_header(table, selected_item.row())
-            elif action == change_color_action:
-                self.change_color(table, [selected_item])
-            elif action == remove_color_action:
-                self.remove_color(table, [selected_item])
-        elif column != table.columnCount() - 1:
-            rename_action = menu.addAction("Rename Header")
-            delete_action = menu.addAction("Delete Header")
-            change_color_action = menu.addAction("Change Color")
-            remove_color_action = None
-            header_text = selected_item.text()
-            if header_text in self.manager.colors:
-                remove_color_action = menu.addAction("Remove Color")
-            action = menu.exec_(global_position)
-
-            if action == rename_action:
-                self.rename_header(table, selected_item.row())
-            elif action == delete_action:
-                self.delete_header(table, selected_item.row())
-            elif action == change_color_action:
-                self.change_color(table, [selected_item])
-            elif action == remove_color_action:
-                self.remove_color(table, [selected_item])
-
-    def add_mod_context_menu_actions(self, menu, table, column, global_position, selected_items):
+    def add_mod_context_menu_actions(self, menu, table, column, global_position, selected_rows):
+        model = self.model(table)
+        selected_rows = [row for row in selected_rows if not model.is_header(row)]
+        if not selected_rows:
+            return
         if table == self.ui.enabled_mods_table:
             create_header_action = menu.addAction("Create Header")
             temp_disable_action = menu.addAction("Temporarily Disable")
-            for item in selected_items:
-                if item.font().strikeOut():
-                    temp_disable_action.setText("Enable")
-                    break
+            if any(model.is_temp_disabled(model.mod_path(row)) for row in selected_rows):
+                temp_disable_action.setText("Enable")
+            preview_up_action = menu.addAction("What Changes If Moved Up")
+            preview_down_action = menu.addAction("What Changes If Moved Down")
         open_folder_action = menu.addAction("Open folder in File Explorer")
         open_steam_action = menu.addAction("Open Steam page")
         find_smods_action = menu.addAction("Find Skymods page")
         view_image_action = menu.addAction("View Image")
         change_color_action = menu.addAction("Change Color")
         remove_color_action = None
-        for item in selected_items:
-            mod_path = table.item(item.row(), 3).text()
-            if mod_path in self.manager.colors:
-                remove_color_action = menu.addAction("Remove Color")
-                break
+        if any(model.mod_path(row) in self.manager.colors for row in selected_rows):
+            remove_color_action = menu.addAction("Remove Color")
 
         action = menu.exec_(global_position)
 
         if table == self.ui.enabled_mods_table:
             if action == create_header_action:
-                self.create_header(table, selected_items[0].row())
+                self.create_header(table, selected_rows[0])
             elif action == temp_disable_action:
-                for item in selected_items:
-                    self.toggle_temp_disable(table, item.row())
-        self.selected_mod_paths = [table.item(item.row(), 3).text() for item in selected_items if item.column() == 3]
+                self.toggle_temp_disable(table, selected_rows)
+            elif action in (preview_up_action, preview_down_action):
+                self.show_move_preview([model.mod_path(row) for row in selected_rows], -1 if action == preview_up_action else 1)
+        self.selected_mod_paths = [model.mod_path(row) for row in selected_rows]
         if action == open_folder_action:
             self.open_folder()
         elif action == open_steam_action:
@@ -304,19 +281,18 @@ class UIHelpers:
         elif action == view_image_action:
             self.view_image()
         elif action == change_color_action:
-            self.change_color(table, selected_items)
+            self.change_color(table, selected_rows)
         elif action == remove_color_action:
-            self.remove_color(table, selected_items)
+            self.remove_color(table, selected_rows)
 
     def rename_header(self, table, row_index):
-        header_item = table.item(row_index, 0)
-        header_name, ok = QtWidgets.QInputDialog.getText(self.ui, "Rename Header", "Enter new header name:", text=header_item.text())
+        model = self.model(table)
+        header_name, ok = QtWidgets.QInputDialog.getText(self.ui, "Rename Header", "Enter new header name:", text=model.rows[row_index]["header"])
         if ok and header_name:
-            header_item.setText(header_name)
-            self.save_groups_to_manager()
+            model.setData(model.index(row_index, 0), header_name)
 
     def delete_header(self, table, row_index):
-        table.removeRow(row_index)
+        self.model(table).take_rows([row_index])
         self.save_groups_to_manager()
 
     def create_header(self, table, row_index):
@@ -327,65 +303,31 @@ class UIHelpers:
         if not ok or not header_name:
             return
 
-        table.insertRow(row_index)
-        
-        header_item = QtWidgets.QTableWidgetItem(header_name)
-        header_item.setFlags(QtCore.Qt.ItemIsSelectable | QtCore.Qt.ItemIsEnabled | QtCore.Qt.ItemIsEditable)
-        header_item.setData(QtCore.Qt.UserRole, "header")  # Set custom data to identify header
-        table.setItem(row_index, 0, header_item)
-        
-        # Set empty items for other columns
-        for col in range(1, table.columnCount()):
-            empty_item = QtWidgets.QTableWidgetItem()
-            empty_item.setFlags(QtCore.Qt.NoItemFlags)
-            table.setItem(row_index, col, empty_item)
-
-        toggle_button = QtWidgets.QPushButton("Hide")
-        toggle_button.clicked.connect(lambda: self.toggle_group_visibility(table, row_index))
-        table.setCellWidget(row_index, table.columnCount() - 1, toggle_button)
-
+        self.model(table).insert_rows(row_index, [self.create_group_header(table, header_name)])
         self.save_groups_to_manager()
 
     def toggle_group_visibility(self, table, header_row):
-        toggle_button = table.cellWidget(header_row, 4)
-        if not toggle_button:
+        if not self.is_header_row(table, header_row):
             return
-
-        if toggle_button.text() == "Hide":
-            toggle_button.setText("Show")
-            self.set_group_visibility(table, header_row, False)
-        else:
-            toggle_button.setText("Hide")
-            self.set_group_visibility(table, header_row, True)
+        self.model(table).toggle_collapsed(header_row)
+        table.model().update_hidden_rows()
 
     def set_group_visibility(self, table, header_row, visible):
-        row = header_row + 1
-        while row < table.rowCount():
-            item = table.item(row, 0)
-            if item and item.data(QtCore.Qt.UserRole) == "header":
-                break
-            table.setRowHidden(row, not visible)
-            row += 1
-
+        if self.model(table).rows[header_row]["collapsed"] == visible:
+            self.toggle_group_visibility(table, header_row)
 
     def is_header_row(self, table, row):
-        item = table.item(row, 0)
-        return item and item.data(QtCore.Qt.UserRole) == "header"
+        return self.model(table).is_header(row)
 
     def save_groups_to_manager(self):
         groups = {}
         current_group = None
-        for row in range(self.ui.enabled_mods_table.rowCount()):
-            item = self.ui.enabled_mods_table.item(row, 0)
-            if item and item.data(QtCore.Qt.UserRole) == "header":
-                current_group = item.text()
+        for row in self.model(self.ui.enabled_mods_table).rows:
+            if "header" in row:
+                current_group = row["header"]
                 groups[current_group] = []
-                self.reassign_toggle_button(self.ui.enabled_mods_table, row)
             elif current_group:
-                mod_path_item = self.ui.enabled_mods_table.item(row, 3)
-                if mod_path_item:
-                    mod_path = mod_path_item.text()
-                    groups[current_group].append(mod_path)
+                groups[current_group].append(row["path"])
         
         if not groups:
             print("Warning: No groups found. Keeping existing groups.")
@@ -394,22 +336,6 @@ class UIHelpers:
         self.manager.groups = groups
         self.manager.save_groups()
 
-    def reassign_toggle_button(self, table, row):
-        toggle_button = table.cellWidget(row, 4)
-        if toggle_button is None:
-            toggle_button = QtWidgets.QPushButton("Hide")
-            toggle_button.clicked.connect(lambda: self.toggle_group_visibility(table, row))
-            table.setCellWidget(row, 4, toggle_button)
-        else:
-            toggle_button.clicked.disconnect()
-            toggle_button.clicked.connect(lambda: self.toggle_group_visibility(table, row))
-
-    def refresh_toggle_buttons(self, table):
-        for row in range(table.rowCount()):
-            item = table.item(row, 0)
-            if item and item.data(QtCore.Qt.UserRole) == "header":
-                self.reassign_toggle_button(table, row)
-
     def open_folder(self):
         for mod_path in self.selected_mod_paths:
             folder_path = os.path.join(self.manager.mods_directory, mod_path.split('.')[0])
@@ -466,6 +392,8 @@ class UIHelpers:
         else:
             button.setText("Show Search")
             self.hide_search_entries(parent)
+            search_vars.clear()
+            self.apply_filter(table, search_vars)
 
     def show_search_entries(self, parent, table, search_vars):
         for index, column_name in enumerate(["Name", "Version", "Comment", "Path"]):
@@ -492,129 +420,41 @@ class UIHelpers:
         search_vars[column_index] = search_var
 
     def apply_filter(self, table, search_vars):
+        # Header rows are always shown by the proxy
         search_terms = {index: var.text().lower() for index, var in search_vars.items()}
-        for row in range(table.rowCount()):
-            item = table.item(row, 0)
-            if item and item.data(QtCore.Qt.UserRole) == "header":
-                # Always show header rows
-                table.setRowHidden(row, False)
-                continue
-            
-            match = all(
-                table.item(row, index) is not None and
-                term in table.item(row, index).text().lower()
-                for index, term in search_terms.items() if term
-            )
-            table.setRowHidden(row, not match)
+        table.model().set_search_terms(search_terms)
 
     def filter_table(self, table, search_vars):
-        self.apply_filter(table, search_vars)
+        # Called per keystroke; the proxy waits for a pause in typing before filtering
+        search_terms = {index: var.text().lower() for index, var in search_vars.items()}
+        table.model().schedule_search_terms(search_terms)
 
     def load_colors(self):
-        for row in range(self.ui.enabled_mods_table.rowCount()):
-            item = self.ui.enabled_mods_table.item(row, 0)
-            if item and item.data(QtCore.Qt.UserRole) == "header":
-                header_text = item.text()
-                color = self.manager.colors.get(header_text)
-                if color:
-                    self.set_custom_color(item, color)
-            else:
-                mod_path = self.ui.enabled_mods_table.item(row, 3).text()
-                if mod_path in self.manager.colors:
-                    color = self.manager.colors[mod_path]
-                    for col in range(self.ui.enabled_mods_table.columnCount()):
-                        cell_item = self.ui.enabled_mods_table.item(row, col)
-                        if cell_item:
-                            self.set_custom_color(cell_item, color)
-
-        for row in range(self.ui.disabled_mods_table.rowCount()):
-            mod_path = self.ui.disabled_mods_table.item(row, 3).text()
-            if mod_path in self.manager.colors:
-                color = self.manager.colors[mod_path]
-                for col in range(self.ui.disabled_mods_table.columnCount()):
-                    cell_item = self.ui.disabled_mods_table.item(row, col)
-                    if cell_item:
-                        self.set_custom_color(cell_item, color)
-
-    def change_color(self, table, selected_items):
+        # Colors are read from manager.colors by the models, so this only repaints
+        for table in (self.ui.disabled_mods_table, self.ui.enabled_mods_table):
+            self.model(table).refresh()
+
+    def change_color(self, table, selected_rows):
         color = QtWidgets.QColorDialog.getColor()
         if color.isValid():
-            for item in selected_items:
-                if item.data(QtCore.Qt.UserRole) == "header":
-                    header_text = item.text()
-                    self.set_custom_color(item, color.name())
-                    self.manager.colors[header_text] = color.name()
+            model = self.model(table)
+            for row in selected_rows:
+                if model.is_header(row):
+                    self.manager.colors[model.rows[row]["header"]] = color.name()
                 else:
-                    row = item.row()
-                    for col in range(table.columnCount()):
-                        cell_item = table.item(row, col)
-                        if cell_item:
-                            self.set_custom_color(cell_item, color.name())
-                            # mod_path = table.item(row, 3).text()
-                            # self.manager.colors[mod_path] = color.name()
+                    self.manager.colors[model.mod_path(row)] = color.name()
             self.manager.save_colors()
+            self.load_colors()
 
-    def set_custom_color(self, item, color):
-        brush = QtGui.QBrush(QtGui.QColor(color))
-        item.setBackground(brush)
-        if item.data(QtCore.Qt.UserRole) == "header":
-            header_text = item.text()
-            self.manager.colors[header_text] = color
-            item.setData(QtCore.Qt.UserRole + 1, color)
-        else:
-            mod_path = item.tableWidget().item(item.row(), 3).text()
-            if mod_path:
-                self.manager.colors[mod_path] = color
-        text_color = "#000000" if self.is_color_light(color) else "#FFFFFF"
-        item.setForeground(QtGui.QBrush(QtGui.QColor(text_color)))
-
-    def is_color_light(self, color):
-        r, g, b, _ = QtGui.QColor(color).getRgb()
-        brightness = (r * 299 + g * 587 + b * 114) / 1000
-        return brightness > 186
-    
-    def remove_color(self, table, selected_items):
-        for item in selected_items:
-            if item.data(QtCore.Qt.UserRole) == "header":
-                header_text = item.text()
-                if header_text in self.manager.colors:
-                    del self.manager.colors[header_text]
-                    item.setBackground(QtGui.QBrush())  # Reset background
-                    if self.ui.dark_theme_enabled:
-                        item.setForeground(QtGui.QBrush(QtGui.QColor(255, 255, 255)))  # White text for dark theme
-                    else:
-                        item.setForeground(QtGui.QBrush(QtGui.QColor(0, 0, 0)))  # Black text for light theme
-            else:
-                row = item.row()
-                mod_path = table.item(row, 3).text()
-                if mod_path in self.manager.colors:
-                    del self.manager.colors[mod_path]
-                    for col in range(table.columnCount()):
-                        cell_item = table.item(row, col)
-                        if cell_item:
-                            cell_item.setBackground(QtGui.QBrush())  # Reset background
-                            if self.ui.dark_theme_enabled:
-                                cell_item.setForeground(QtGui.QBrush(QtGui.QColor(255, 255, 255)))  # White text for dark theme
-                            else:
-                                cell_item.setForeground(QtGui.QBrush(QtGui.QColor(0, 0, 0)))  # Black text for light theme
+    def remove_color(self, table, selected_rows):
+        model = self.model(table)
+        for row in selected_rows:
+            key = model.rows[row]["header"] if model.is_header(row) else model.mod_path(row)
+            self.manager.colors.pop(key, None)
 
         self.manager.save_colors()
         self.load_colors()  # Refresh colors for all items
 
-        # Update the appearance of affected items in the other table
-        other_table = self.ui.disabled_mods_table if table == self.ui.enabled_mods_table else self.ui.enabled_mods_table
-        for row in range(other_table.rowCount()):
-            mod_path = other_table.item(row, 3).text()
-            if mod_path not in self.manager.colors:
-                for col in range(other_table.columnCount()):
-                    cell_item = other_table.item(row, col)
-                    if cell_item:
-                        cell_item.setBackground(QtGui.QBrush())
-                        if self.ui.dark_theme_enabled:
-                            cell_item.setForeground(QtGui.QBrush(QtGui.QColor(255, 255, 255)))
-                        else:
-                            cell_item.setForeground(QtGui.QBrush(QtGui.QColor(0, 0, 0)))
-
     def save_column_width(self):
         settings = QtCore.QSettings("unrl0000", "UnModManagerCK3")
         comment_width = self.ui.disabled_mods_table.columnWidth(2)
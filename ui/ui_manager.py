@@ -2,6 +2,7 @@
 
 from PyQt5 import QtWidgets, QtGui, QtCore
 from ui.ui_operations import UIManagerOperations
+from ui.mod_table_model import ModTableModel, ModFilterProxyModel, HeaderButtonDelegate, BUTTON_COLUMN
 import sys
 import os
 
@@ -14,10 +15,8 @@ class ModManagerUI(QtWidgets.QMainWindow):
         self.setGeometry(100, 100, 1000, 600)
         self.dark_theme_enabled = True
         self.initUI()
-        self.operations.load_mods()
         self.apply_stylesheet()
-        self.operations.load_mods()
-        self.operations.load_colors()
+        self.operations.start_loading()
 
     def initUI(self):
         self.central_widget = QtWidgets.QWidget()
@@ -61,50 +60,11 @@ class ModManagerUI(QtWidgets.QMainWindow):
         self.right_layout = QtWidgets.QVBoxLayout(self.right_frame)
         self.splitter.addWidget(self.right_frame)
 
-        self.disabled_mods_table = QtWidgets.QTableWidget()
-        self.disabled_mods_table.setColumnCount(5)
-        self.disabled_mods_table.setHorizontalHeaderLabels(["Name", "Version", "Comment", "Path", "Size"])
-        self.disabled_mods_table.horizontalHeader().setSectionResizeMode(0, QtWidgets.QHeaderView.Stretch)
-        self.disabled_mods_table.horizontalHeader().setSectionResizeMode(1, QtWidgets.QHeaderView.ResizeToContents)
-        self.disabled_mods_table.horizontalHeader().setSectionResizeMode(2, QtWidgets.QHeaderView.Interactive)
-        self.disabled_mods_table.horizontalHeader().setSectionResizeMode(3, QtWidgets.QHeaderView.ResizeToContents)
-        self.disabled_mods_table.horizontalHeader().setSectionResizeMode(4, QtWidgets.QHeaderView.ResizeToContents)
-        self.disabled_mods_table.setEditTriggers(QtWidgets.QAbstractItemView.NoEditTriggers)
-        self.disabled_mods_table.setSelectionBehavior(QtWidgets.QTableView.SelectRows)
-        self.disabled_mods_table.setContextMenuPolicy(QtCore.Qt.CustomContextMenu)
-        self.disabled_mods_table.customContextMenuRequested.connect(self.show_context_menu)
-
-        self.disabled_mods_table.setSelectionMode(QtWidgets.QAbstractItemView.ExtendedSelection)
-        self.disabled_mods_table.setDragEnabled(True)
-        self.disabled_mods_table.setAcceptDrops(True)
-        self.disabled_mods_table.setDropIndicatorShown(True)
-        self.disabled_mods_table.viewport().setAcceptDrops(True)
-        self.disabled_mods_table.setDragDropMode(QtWidgets.QAbstractItemView.DragDrop)
-        self.disabled_mods_table.dropEvent = lambda event: self.operations.drop_event(event, self.disabled_mods_table)
-
+        self.mod_sizes = {}
+        self.disabled_mods_table = self.create_mod_table(grouped=False)
         self.left_layout.addWidget(self.disabled_mods_table)
 
-        self.enabled_mods_table = QtWidgets.QTableWidget()
-        self.enabled_mods_table.setColumnCount(5)
-        self.enabled_mods_table.setHorizontalHeaderLabels(["Name", "Version", "Comment", "Path", "Size"])
-        self.enabled_mods_table.horizontalHeader().setSectionResizeMode(0, QtWidgets.QHeaderView.Stretch)
-        self.enabled_mods_table.horizontalHeader().setSectionResizeMode(1, QtWidgets.QHeaderView.ResizeToContents)
-        self.enabled_mods_table.horizontalHeader().setSectionResizeMode(2, QtWidgets.QHeaderView.Interactive)
-        self.enabled_mods_table.horizontalHeader().setSectionResizeMode(3, QtWidgets.QHeaderView.ResizeToContents)
-        self.enabled_mods_table.horizontalHeader().setSectionResizeMode(4, QtWidgets.QHeaderView.ResizeToContents)
-        self.enabled_mods_table.setEditTriggers(QtWidgets.QAbstractItemView.NoEditTriggers)
-        self.enabled_mods_table.setSelectionBehavior(QtWidgets.QTableView.SelectRows)
-        self.enabled_mods_table.setContextMenuPolicy(QtCore.Qt.CustomContextMenu)
-        self.enabled_mods_table.customContextMenuRequested.connect(self.show_context_menu)
-
-        self.enabled_mods_table.setSelectionMode(QtWidgets.QAbstractItemView.ExtendedSelection)
-        self.enabled_mods_table.setDragEnabled(True)
-        self.enabled_mods_table.setAcceptDrops(True)
-        self.enabled_mods_table.setDropIndicatorShown(True)
-        self.enabled_mods_table.viewport().setAcceptDrops(True)
-        self.enabled_mods_table.setDragDropMode(QtWidgets.QAbstractItemView.DragDrop)
-        self.enabled_mods_table.dropEvent = lambda event: self.operations.drop_event(event, self.enabled_mods_table)
-
+        self.enabled_mods_table = self.create_mod_table(grouped=True)
         self.right_layout.addWidget(self.enabled_mods_table)
 
         self.button_frame = QtWidgets.QHBoxLayout()
@@ -130,25 +90,27 @@ class ModManagerUI(QtWidgets.QMainWindow):
         self.move_buttons_frame.addWidget(self.disable_button)
 
         self.up_button = QtWidgets.QPushButton("Move Up")
-        self.up_button.clicked.connect(lambda: self.operations.move_items(self.enabled_mods_table.selectedItems(), -1))
+        self.up_button.clicked.connect(lambda: self.operations.move_items(self.operations.helpers.selected_rows(self.enabled_mods_table), -1))
         self.move_buttons_frame.addWidget(self.up_button)
 
         self.down_button = QtWidgets.QPushButton("Move Down")
-        self.down_button.clicked.connect(lambda: self.operations.move_items(self.enabled_mods_table.selectedItems(), 1))
+        self.down_button.clicked.connect(lambda: self.operations.move_items(self.operations.helpers.selected_rows(self.enabled_mods_table), 1))
         self.move_buttons_frame.addWidget(self.down_button)
 
         self.conflict_button = QtWidgets.QPushButton("Find Conflicts")
         self.conflict_button.clicked.connect(self.operations.find_conflicts)
         self.move_buttons_frame.addWidget(self.conflict_button)
 
+        self.process_pool_checkbox = QtWidgets.QCheckBox("Use all cores")
+        self.process_pool_checkbox.setChecked(self.operations.conflict_finder.use_processes)
+        self.process_pool_checkbox.toggled.connect(self.operations.conflict_finder.set_use_processes)
+        self.move_buttons_frame.addWidget(self.process_pool_checkbox)
+
         self.preview_on_hover = True
         self.last_conflict_check_time = 0
-        self.disabled_mods_table.itemDoubleClicked.connect(self.handle_double_click)
-        self.enabled_mods_table.itemDoubleClicked.connect(self.handle_double_click)
-        self.disabled_mods_table.setContextMenuPolicy(QtCore.Qt.CustomContextMenu)
-        self.disabled_mods_table.customContextMenuRequested.connect(self.show_context_menu)
-        self.enabled_mods_table.setContextMenuPolicy(QtCore.Qt.CustomContextMenu)
-        self.enabled_mods_table.customContextMenuRequested.connect(self.show_context_menu)
+        self.disabled_mods_table.doubleClicked.connect(self.handle_double_click)
+        self.enabled_mods_table.doubleClicked.connect(self.handle_double_click)
+        self.enabled_mods_table.clicked.connect(self.operations.handle_click)
 
         self.operations.create_search_button(self.left_layout, self.disabled_mods_table, {}, QtCore.Qt.AlignLeft)
         self.operations.create_search_button(self.right_layout, self.enabled_mods_table, {}, QtCore.Qt.AlignLeft)
@@ -164,11 +126,50 @@ class ModManagerUI(QtWidgets.QMainWindow):
 
         self.operations.load_column_width()
 
+    def create_mod_table(self, grouped):
+        model = ModTableModel(self.manager, grouped, self.mod_sizes, self)
+        proxy = ModFilterProxyModel(self)
+        proxy.setSourceModel(model)
+
+        table = QtWidgets.QTableView()
+        table.setModel(proxy)
+        table.setItemDelegateForColumn(BUTTON_COLUMN, HeaderButtonDelegate(table))
+        # Size columns to the rows on screen instead of measuring every row of the model
+        table.horizontalHeader().setResizeContentsPrecision(0)
+        table.horizontalHeader().setSectionResizeMode(0, QtWidgets.QHeaderView.Stretch)
+        table.horizontalHeader().setSectionResizeMode(1, QtWidgets.QHeaderView.ResizeToContents)
+        table.horizontalHeader().setSectionResizeMode(2, QtWidgets.QHeaderView.Interactive)
+        table.horizontalHeader().setSectionResizeMode(3, QtWidgets.QHeaderView.ResizeToContents)
+        table.horizontalHeader().setSectionResizeMode(4, QtWidgets.QHeaderView.ResizeToContents)
+        table.horizontalHeader().setSectionResizeMode(5, QtWidgets.QHeaderView.ResizeToContents)
+        table.setEditTriggers(QtWidgets.QAbstractItemView.NoEditTriggers)
+        table.setSelectionBehavior(QtWidgets.QTableView.SelectRows)
+        table.setContextMenuPolicy(QtCore.Qt.CustomContextMenu)
+        table.customContextMenuRequested.connect(self.show_context_menu)
+
+        table.setSelectionMode(QtWidgets.QAbstractItemView.ExtendedSelection)
+        table.setDragEnabled(True)
+        table.setAcceptDrops(True)
+        table.setDropIndicatorShown(True)
+        table.viewport().setAcceptDrops(True)
+        table.setDragDropMode(QtWidgets.QAbstractItemView.DragDrop)
+        table.dropEvent = lambda event: self.operations.drop_event(event, table)
+
+        model.groups_changed.connect(self.operations.helpers.save_groups_to_manager)
+        for signal in (proxy.modelReset, proxy.rowsInserted, proxy.rowsRemoved, proxy.layoutChanged):
+            signal.connect(lambda *args: self.operations.helpers.update_spans(table))
+        return table
+
+    def closeEvent(self, event):
+        self.operations.stop_background_threads()
+        self.manager.flush()
+        super().closeEvent(event)
+
     def show_context_menu(self, position):
         self.operations.show_context_menu(position)
 
-    def handle_double_click(self, item):
-        self.operations.handle_double_click(item)
+    def handle_double_click(self, index):
+        self.operations.handle_double_click(self.sender(), index)
 
     def apply_stylesheet(self):
         self.operations.apply_stylesheet()
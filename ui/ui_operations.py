@@ -1,26 +1,140 @@
 # ui/ui_operations.py
 
+import os
+import time
+import queue
+import threading
 from PyQt5 import QtWidgets, QtCore
 from PyQt5.QtCore import QThread, pyqtSignal
 from ui.ui_helpers import UIHelpers
+from ui.mod_table_model import BUTTON_COLUMN, format_size
+from logic.file_operations import ExtractionCancelled
+from logic.conflict_analysis import ScanCancelled
+from logic.install_preview import read_archive_mods
+from logic.tracing import traced
 from .conflict_finder import ConflictFinder 
+from .mod_watcher import ModDirectoryWatcher
 
-class ModToggleThread(QThread):
-    finished = pyqtSignal()
+class FolderSizeThread(QThread):
+    size_ready = pyqtSignal(str, object)
 
-    def __init__(self, manager, mod_names, enable):
+    def __init__(self, manager, mod_paths):
         super().__init__()
         self.manager = manager
-        self.mod_names = mod_names
-        self.enable = enable
+        self.mod_paths = mod_paths
 
     def run(self):
-        for mod_name in self.mod_names:
-            if self.enable:
-                self.manager.enable_mod(mod_name)
-            else:
-                self.manager.disable_mod(mod_name)
-        self.finished.emit()
+        for mod_path in self.mod_paths:
+            if self.isInterruptionRequested():
+                break
+            self.size_ready.emit(mod_path, self.manager.get_mod_size(mod_path))
+        self.manager.save_sizes()
+
+class ConflictIndexThread(QThread):
+    def __init__(self, manager):
+        super().__init__()
+        self.manager = manager
+        # Set on close, so a cold build of a large library does not hold up the exit
+        self.cancel_event = threading.Event()
+
+    def cancel(self):
+        self.cancel_event.set()
+
+    def run(self):
+        try:
+            self.manager.refresh_conflict_index(cancel_event=self.cancel_event)
+        except ScanCancelled:
+            pass
+
+class StartupLoaderThread(QThread):
+    # Reads the settings and scans the descriptors after the window is already up
+    mods_found = pyqtSignal(list)
+    phase_finished = pyqtSignal(str, float)
+
+    def __init__(self, manager):
+        super().__init__()
+        self.manager = manager
+
+    def run(self):
+        started = time.perf_counter()
+        self.manager.load_settings()
+        self.phase_finished.emit("settings", time.perf_counter() - started)
+
+        started = time.perf_counter()
+        self.manager.scan_mods(self.mods_found.emit)
+        self.phase_finished.emit("descriptors", time.perf_counter() - started)
+
+class ArchiveReaderThread(QThread):
+    # Reads the central directories of the archives picked for install
+    archives_read = pyqtSignal(object)
+
+    def __init__(self, zip_paths):
+        super().__init__()
+        self.zip_paths = zip_paths
+
+    def run(self):
+        self.archives_read.emit({zip_path: read_archive_mods(zip_path) for zip_path in self.zip_paths})
+
+class InstallQueueThread(QThread):
+    # Installs queued archives one after another; more archives can be queued while it runs
+    progress = pyqtSignal(str, object, object)
+    archive_installed = pyqtSignal(str, list)
+    archive_cancelled = pyqtSignal(str)
+    archive_failed = pyqtSignal(str, str)
+
+    def __init__(self, manager):
+        super().__init__()
+        self.manager = manager
+        self.queue = queue.Queue()
+        # A fresh event per archive, swapped under the lock, so a cancel can never be cleared by the worker
+        # taking the next archive; archives queued after a cancel get their own event and still install
+        self.lock = threading.Lock()
+        self.cancel_event = threading.Event()
+        self.last_progress = 0
+
+    def enqueue(self, zip_paths):
+        for zip_path in zip_paths:
+            self.queue.put(zip_path)
+
+    def pending(self):
+        return self.queue.qsize()
+
+    def cancel(self):
+        # Stops the running archive and drops everything still queued
+        with self.lock:
+            while True:
+                try:
+                    self.queue.get_nowait()
+                except queue.Empty:
+                    break
+            self.cancel_event.set()
+
+    def report_progress(self, zip_path, written, total):
+        # At most every 50 ms, extraction calls back for every chunk
+        now = time.monotonic()
+        if written == total or now - self.last_progress >= 0.05:
+            self.last_progress = now
+            self.progress.emit(zip_path, written, total)
+
+    def run(self):
+        while not self.isInterruptionRequested():
+            with self.lock:
+                try:
+                    zip_path = self.queue.get_nowait()
+                except queue.Empty:
+                    break
+                cancel_event = self.cancel_event = threading.Event()
+            try:
+                mod_paths = self.manager.install_mod(
+                    zip_path, lambda written, total, zip_path=zip_path: self.report_progress(zip_path, written, total), cancel_event)
+            except ExtractionCancelled:
+                self.archive_cancelled.emit(zip_path)
+                continue
+            except Exception as e:
+                # A broken archive does not stop the ones queued after it
+                self.archive_failed.emit(zip_path, str(e))
+                continue
+            self.archive_installed.emit(zip_path, mod_paths)
 
 class UIManagerOperations:
     def __init__(self, manager, ui):
@@ -28,40 +142,164 @@ class UIManagerOperations:
         self.ui = ui
         self.helpers = UIHelpers(manager, ui)
         self.conflict_finder = ConflictFinder(manager, ui)
-
+        self.size_thread = None
+        self.conflict_index_thread = None
+        self.loader_thread = None
+        self.install_thread = None
+        self.install_dialog = None
+        self.mod_watcher = None
+        self.installed_count = 0
+        self.installed_count_total = 0
+        self.startup_started = None
+        self.background_threads = set()
+        self.stopping = False
+
+    def log_startup_phase(self, phase, seconds):
+        print(f"Startup {phase}: {seconds:.3f}s")
+
+    def start_loading(self):
+        # Staged startup: the window is shown first, mods stream in from StartupLoaderThread
+        if self.manager.loaded:
+            self.load_mods()
+            self.start_watching()
+            return
+        self.startup_started = time.perf_counter()
+        self.set_loading(True)
+        self.loader_thread = StartupLoaderThread(self.manager)
+        self.loader_thread.mods_found.connect(self.helpers.append_mods)
+        self.loader_thread.phase_finished.connect(self.log_startup_phase)
+        self.loader_thread.finished.connect(self.finish_loading)
+        self.start_background_thread(self.loader_thread)
+
+    def finish_loading(self):
+        started = time.perf_counter()
+        self.load_mods()
+        self.log_startup_phase("tables", time.perf_counter() - started)
+        self.set_loading(False)
+        self.start_watching()
+
+    def start_watching(self):
+        # New, removed and edited mods are picked up as they change on disk instead of on Refresh
+        self.mod_watcher = ModDirectoryWatcher(self.manager.mods_directory, self.ui)
+        self.mod_watcher.changes_ready.connect(self.apply_mod_changes)
+        self.mod_watcher.watch(mod['path'].split('.')[0] for mod in self.manager.mods)
+
+    @traced()
+    def apply_mod_changes(self, mod_folders):
+        # Only the affected mods are re-read, resized and re-indexed for conflicts
+        if self.install_thread is not None and self.install_thread.isRunning():
+            # The installer is changing the mod list itself; look again once it is done
+            self.mod_watcher.requeue(mod_folders)
+            return
+        updated, removed, changed_folders = self.manager.sync_mods_directory(mod_folders)
+        if updated or removed or changed_folders:
+            print(f"Mods changed on disk: {len(updated)} updated, {len(removed)} removed, {len(changed_folders)} folder(s) changed")
+        self.mod_watcher.watch(mod['path'].split('.')[0] for mod in self.manager.mods)
+        if self.helpers.update_mod_rows(updated, removed):
+            self.load_mods()
+            return
+        changed_folders = set(changed_folders)
+        changed_paths = [mod['path'] for mod in self.manager.mods if mod['path'].split('.')[0] in changed_folders]
+        if changed_paths:
+            size_thread = FolderSizeThread(self.manager, changed_paths)
+            size_thread.size_ready.connect(self.helpers.update_size_cell)
+            self.start_background_thread(size_thread)
+        if updated or removed or changed_folders:
+            self.helpers.update_conflict_cells()
+            self.helpers.update_winners()
+
+    def set_loading(self, loading):
+        # Nothing may change the mods until the settings and descriptors are in
+        for widget in (self.ui.splitter, self.ui.save_profile_button, self.ui.delete_profile_button, self.ui.load_profile_button):
+            widget.setEnabled(not loading)
+
+    @traced()
     def load_mods(self):
-        self.ui.disabled_mods_table.setRowCount(0)
-        self.ui.enabled_mods_table.setRowCount(0)
         mods = self.manager.list_mods()
         
         # Sort mods based on their order in temp_mods
-        sorted_mods = sorted(mods, key=lambda x: list(self.manager.mods_data["enabled_mods"].keys()).index(f"mod/{x['path']}")
-                            if f"mod/{x['path']}" in self.manager.mods_data["enabled_mods"] else float('inf'))
-        
-        enabled_mods = [mod for mod in sorted_mods if f"mod/{mod['path']}" in self.manager.mods_data["enabled_mods"]]
-        disabled_mods = [mod for mod in sorted_mods if f"mod/{mod['path']}" not in self.manager.mods_data["enabled_mods"]]
+        positions = [(self.manager.get_mod_position(mod['path']), mod) for mod in mods]
+        enabled_mods = [mod for position, mod in sorted(
+            (item for item in positions if item[0] is not None), key=lambda item: item[0])]
+        disabled_mods = [mod for position, mod in positions if position is None]
+        sorted_mods = enabled_mods + disabled_mods
         
         self.helpers.create_table(self.ui.disabled_mods_table, disabled_mods)
         self.helpers.create_table(self.ui.enabled_mods_table, enabled_mods)
         self.helpers.update_enabled_mods_order()
         self.helpers.save_groups_to_manager()
         self.load_colors()
+        self.start_size_thread([mod['path'] for mod in sorted_mods])
+        if self.manager.conflict_index_built:
+            self.helpers.update_conflict_cells()
+        elif self.conflict_index_thread is None:
+            self.start_conflict_index_thread()
+
+    def start_size_thread(self, mod_paths):
+        # Sizes are filled in by a worker; a newer refresh supersedes the running one
+        if self.size_thread is not None:
+            self.size_thread.requestInterruption()
+            self.size_thread.size_ready.disconnect()
+        self.size_thread = FolderSizeThread(self.manager, mod_paths)
+        self.size_thread.size_ready.connect(self.helpers.update_size_cell)
+        if self.startup_started is not None:
+            started, self.startup_started = self.startup_started, None
+            self.size_thread.finished.connect(lambda: self.log_startup_phase("sizes", time.perf_counter() - started))
+        self.start_background_thread(self.size_thread)
+
+    def start_conflict_index_thread(self):
+        # The conflict index is built once in the background, later changes update it incrementally;
+        # mods enabled for the first time afterwards are walked here too, see index_new_mods
+        self.conflict_index_thread = ConflictIndexThread(self.manager)
+        self.conflict_index_thread.finished.connect(self.conflict_index_finished)
+        self.start_background_thread(self.conflict_index_thread)
+
+    def conflict_index_finished(self):
+        self.conflict_index_thread = None
+        if self.stopping:
+            return
+        self.helpers.update_conflict_cells()
+        self.helpers.update_winners()
+
+    def index_new_mods(self):
+        # Enabled mods the index has no files for show "…" until the index thread has walked them,
+        # so enabling a large mod never walks its folder on the GUI thread
+        if self.stopping or not self.manager.conflict_index_built or self.conflict_index_thread is not None:
+            return
+        if self.manager.unindexed_mod_folders():
+            self.start_conflict_index_thread()
+
+    def start_background_thread(self, thread):
+        self.background_threads.add(thread)
+        thread.finished.connect(lambda: self.background_threads.discard(thread))
+        thread.start()
+
+    def stop_background_threads(self):
+        self.stopping = True
+        if self.mod_watcher is not None:
+            self.mod_watcher.stop()
+        for thread in list(self.background_threads):
+            if isinstance(thread, (InstallQueueThread, ConflictIndexThread)):
+                thread.cancel()
+            thread.requestInterruption()
+            thread.wait()
 
     def save_profile(self):
         profile_name = self.ui.save_profile_var.text()
         if not profile_name:
             profile_name = f"Profile {len(self.manager.profiles) + 1}"
+        is_new = profile_name not in self.manager.profiles
         self.manager.save_profile(profile_name)
-        self.ui.load_profile_var.clear()
-        self.ui.load_profile_var.addItems(list(self.manager.profiles.keys()))
-        self.manager.save_profile(self.ui.load_profile_var.currentText())
+        # Only the new name is added; the combo box is not refilled with every profile
+        if is_new:
+            self.ui.load_profile_var.addItem(profile_name)
+        self.ui.load_profile_var.setCurrentText(profile_name)
 
     def delete_profile(self):
         profile_name = self.ui.load_profile_var.currentText()
         if profile_name:
             self.manager.delete_profile(profile_name)
-            self.ui.load_profile_var.clear()
-            self.ui.load_profile_var.addItems(list(self.manager.profiles.keys()))
+            self.ui.load_profile_var.removeItem(self.ui.load_profile_var.currentIndex())
 
     def load_profile(self):
         profile_name = self.ui.load_profile_var.currentText()
@@ -70,202 +308,193 @@ class UIManagerOperations:
 
     def install_mod(self):
         options = QtWidgets.QFileDialog.Options()
-        zip_path, _ = QtWidgets.QFileDialog.getOpenFileName(self.ui, "Open your mod_name.zip", "", "ZIP Files (*.zip)", options=options)
-        if zip_path:
-            self.manager.install_mod(zip_path)
-            self.load_mods()
+        zip_paths, _ = QtWidgets.QFileDialog.getOpenFileNames(self.ui, "Open your mod_name.zip", "", "ZIP Files (*.zip)", options=options)
+        if zip_paths:
+            reader_thread = ArchiveReaderThread(zip_paths)
+            reader_thread.archives_read.connect(self.archives_read)
+            self.start_background_thread(reader_thread)
+
+    def archives_read(self, archives):
+        # The preview looks the archives up in the conflict index, so it waits for the index thread to finish with it
+        if self.conflict_index_thread is not None and self.conflict_index_thread.isRunning():
+            self.conflict_index_thread.finished.connect(lambda: self.archives_read(archives))
+            return
+        if self.confirm_install(archives):
+            self.queue_install(list(archives))
+
+    def confirm_install(self, archives):
+        # Shows what the archives would conflict with among the enabled mods before anything is extracted
+        mod_names = {mod['path'].split('.')[0]: mod.get('name') or mod['path'] for mod in self.manager.mods}
+        summary = []
+        details = []
+        partial = False
+        for zip_path, archive_mods in archives.items():
+            preview = self.manager.preview_install(zip_path, archive_mods)
+            partial = partial or preview["partial"]
+            conflicting_mods = sorted({mod for conflicts in (preview["red"], preview["yellow"]) for mods in conflicts.values() for mod in mods[:-1]})
+            summary.append(f"{os.path.basename(zip_path)}: {len(preview['red'])} red, {len(preview['yellow'])} yellow conflicts"
+                           + (f" with {', '.join(mod_names.get(mod, mod) for mod in conflicting_mods)}" if conflicting_mods else ""))
+            for color in ("red", "yellow"):
+                for path, mods in sorted(preview[color].items()):
+                    details.append(f"[{color}] {path}: {', '.join(mod_names.get(mod, mod) for mod in mods[:-1])}")
+        if not details and not partial:
+            return True
+        if partial:
+            summary.append("\nThe conflict index is not complete yet, so conflicts with some enabled mods may be missing.")
+        message = QtWidgets.QMessageBox(self.ui)
+        message.setWindowTitle("Install Preview")
+        message.setIcon(QtWidgets.QMessageBox.Warning)
+        message.setText("\n".join(summary) + "\n\nInstall anyway?")
+        message.setDetailedText("\n".join(details))
+        message.setStandardButtons(QtWidgets.QMessageBox.Yes | QtWidgets.QMessageBox.No)
+        return message.exec_() == QtWidgets.QMessageBox.Yes
+
+    def queue_install(self, zip_paths):
+        # Archives picked while an install is running join its queue
+        if self.install_thread is not None and self.install_thread.isRunning():
+            self.install_thread.enqueue(zip_paths)
+            self.installed_count_total += len(zip_paths)
+            return
+        self.installed_count = 0
+        self.installed_count_total = len(zip_paths)
+        self.install_dialog = QtWidgets.QProgressDialog("Installing...", "Cancel", 0, 1000, self.ui)
+        self.install_dialog.setWindowModality(QtCore.Qt.WindowModal)
+        self.install_dialog.setMinimumDuration(0)
+        # One dialog for the whole queue, so it must not reset when an archive reaches 100%
+        self.install_dialog.setAutoReset(False)
+        self.install_dialog.setAutoClose(False)
+        self.install_thread = InstallQueueThread(self.manager)
+        self.install_thread.enqueue(zip_paths)
+        self.install_thread.progress.connect(self.update_install_progress)
+        self.install_thread.archive_installed.connect(self.finish_install)
+        self.install_thread.archive_cancelled.connect(lambda zip_path: print(f"Installation of {zip_path} cancelled"))
+        self.install_thread.archive_failed.connect(self.install_failed)
+        self.install_thread.finished.connect(self.finish_install_queue)
+        self.install_dialog.canceled.connect(self.install_thread.cancel)
+        self.start_background_thread(self.install_thread)
+
+    def update_install_progress(self, zip_path, written, total):
+        if self.install_dialog is None:
+            return
+        self.install_dialog.setLabelText(
+            f"Installing {os.path.basename(zip_path)} ({self.installed_count + 1}/{self.installed_count_total})\n"
+            f"{format_size(written)} of {format_size(total)}")
+        self.install_dialog.setValue(int(written * 1000 / total) if total else 1000)
+
+    def finish_install(self, zip_path, mod_paths):
+        self.installed_count += 1
+        print(f"Installed {os.path.basename(zip_path)}: {', '.join(mod_paths) or 'no descriptors found'}")
+
+    def install_failed(self, zip_path, error):
+        self.installed_count += 1
+        print(f"Error installing {zip_path}: {error}")
+        QtWidgets.QMessageBox.warning(self.ui, "Install Failed", f"{os.path.basename(zip_path)} could not be installed:\n{error}")
+
+    def finish_install_queue(self):
+        # Archives queued just as the worker ran out of work; a cancel has already dropped the ones queued before it
+        if self.install_thread.pending():
+            self.start_background_thread(self.install_thread)
+            return
+        if self.install_dialog is not None:
+            self.install_dialog.close()
+            self.install_dialog = None
+        self.load_mods()
 
     def enable_mod(self):
-        selected_items = self.ui.disabled_mods_table.selectedItems()
-        mod_names = {self.ui.disabled_mods_table.item(item.row(), 0).text() for item in selected_items}
-        rows = {item.row() for item in selected_items}
+        rows = self.helpers.selected_rows(self.ui.disabled_mods_table)
+        model = self.helpers.model(self.ui.disabled_mods_table)
 
         for row in rows:
             if self.helpers.is_header_row(self.ui.disabled_mods_table, row):
                 return 
-            
-        if mod_names:
-            self.toggle_thread = ModToggleThread(self.manager, mod_names, True)
-            self.toggle_thread.finished.connect(lambda: self.helpers.move_rows(self.ui.disabled_mods_table, self.ui.enabled_mods_table, rows))
-            self.toggle_thread.start()
+
+        mod_paths = [model.mod_path(row) for row in rows]
+        if mod_paths:
+            self.helpers.toggle_mods(mod_paths, True)
 
     def disable_mod(self):
-        selected_items = self.ui.enabled_mods_table.selectedItems()
-        mod_names = {self.ui.enabled_mods_table.item(item.row(), 0).text() for item in selected_items}
-        rows = {item.row() for item in selected_items}
+        rows = self.helpers.selected_rows(self.ui.enabled_mods_table)
+        model = self.helpers.model(self.ui.enabled_mods_table)
 
         for row in rows:
             if self.helpers.is_header_row(self.ui.enabled_mods_table, row):
                 return
-                
-        if mod_names:
-            self.toggle_thread = ModToggleThread(self.manager, mod_names, False)
-            self.toggle_thread.finished.connect(lambda: self.helpers.move_rows(self.ui.enabled_mods_table, self.ui.disabled_mods_table, rows))
-            self.toggle_thread.start()
-
-    def move_items(self, selected_items, direction):
-        selected_rows = sorted(set(item.row() for item in selected_items))
-        
-        if direction < 0:  # Moving up
-            for row in selected_rows:
-                if row == 0 or self.helpers.is_header_row(self.ui.enabled_mods_table, row) or self.helpers.is_header_row(self.ui.enabled_mods_table, row - 1):
-                    continue
-                self.ui.enabled_mods_table.insertRow(row - 1)
-                for col in range(self.ui.enabled_mods_table.columnCount()):
-                    self.ui.enabled_mods_table.setItem(row - 1, col, self.ui.enabled_mods_table.takeItem(row + 1, col))
-                self.ui.enabled_mods_table.removeRow(row + 1)
-
-        elif direction > 0:  # Moving down
-            for row in reversed(selected_rows):
-                if row == self.ui.enabled_mods_table.rowCount() - 1 or self.helpers.is_header_row(self.ui.enabled_mods_table, row) or self.helpers.is_header_row(self.ui.enabled_mods_table, row + 1):
-                    continue
-                self.ui.enabled_mods_table.insertRow(row + 2)
-                for col in range(self.ui.enabled_mods_table.columnCount()):
-                    self.ui.enabled_mods_table.setItem(row + 2, col, self.ui.enabled_mods_table.takeItem(row, col))
-                self.ui.enabled_mods_table.removeRow(row)
-
-        self.helpers.update_enabled_mods_order()
-        self.helpers.save_groups_to_manager()
 
-        for row in selected_rows:
-            for col in range(self.ui.enabled_mods_table.columnCount()):
-                item = self.ui.enabled_mods_table.item(row + direction, col)
-                if item:
-                    item.setSelected(True)
+        mod_paths = [model.mod_path(row) for row in rows]
+        if mod_paths:
+            self.helpers.toggle_mods(mod_paths, False)
 
-    def handle_double_click(self, item):
-        table = item.tableWidget()
-        if self.helpers.is_header_row(table, item.row()):
-            table.editItem(item)
+    def move_items(self, selected_rows, direction):
+        table = self.ui.enabled_mods_table
+        model = self.helpers.model(table)
+        if not selected_rows or not direction:
+            return
+        mod_paths = [model.mod_path(row) for row in selected_rows if not model.is_header(row)]
+        # The table and the load order apply the same one-step rule, so neither has to be rebuilt from the other
+        moved_rows = model.shift_rows(selected_rows, direction)
+        if self.manager.shift_mods(mod_paths, direction):
             self.helpers.save_groups_to_manager()
+            self.helpers.update_winners()
+        self.helpers.select_rows(table, moved_rows)
+
+    def handle_click(self, index):
+        table = self.ui.enabled_mods_table
+        row = table.model().mapToSource(index).row()
+        if index.column() == BUTTON_COLUMN and self.helpers.is_header_row(table, row):
+            self.helpers.toggle_group_visibility(table, row)
+
+    def handle_double_click(self, table, index):
+        row = table.model().mapToSource(index).row()
+        model = self.helpers.model(table)
+        if self.helpers.is_header_row(table, row):
+            if index.column() == 0:
+                table.edit(index)
             return
-        mod_name = table.item(item.row(), 0).text()
-        if item.column() == 2:
-            self.helpers.edit_comment(table)
+        if index.column() == 2:
+            self.helpers.edit_comment(table, index)
         else:
-            if table == self.ui.disabled_mods_table:
-                self.manager.enable_mod(mod_name)
-                self.helpers.move_rows(self.ui.disabled_mods_table, self.ui.enabled_mods_table, {item.row()})
-            else:
-                self.manager.disable_mod(mod_name)
-                self.helpers.move_rows(self.ui.enabled_mods_table, self.ui.disabled_mods_table, {item.row()})
+            self.helpers.toggle_mods([model.mod_path(row)], table == self.ui.disabled_mods_table)
         self.helpers.save_groups_to_manager()
 
     def drop_event(self, event, target):
         source = event.source()
+        if source not in (self.ui.disabled_mods_table, self.ui.enabled_mods_table):
+            event.ignore()
+            return
 
-        if source == target:
-            selected_items = source.selectedItems()
-            selected_rows = sorted(set(item.row() for item in selected_items))
-            
-            if any(self.helpers.is_header_row(source, row) for row in selected_rows):
-                event.ignore()
-                return
+        source_model = self.helpers.model(source)
+        target_model = self.helpers.model(target)
+        selected_rows = self.helpers.selected_rows(source)
 
-            drop_row = target.rowAt(event.pos().y())
-            if drop_row == -1:
-                drop_row = target.rowCount()
-
-            if drop_row < target.rowCount() - len(selected_rows):
-                row_data_list = []
-                for row in selected_rows:
-                    row_data = []
-                    for col in range(source.columnCount()):
-                        item = source.item(row, col)
-                        row_data.append(item.text() if item else "")
-                    row_data_list.append(row_data)
-
-                for row in reversed(selected_rows):
-                    source.removeRow(row)
-
-                for offset, row_data in enumerate(row_data_list):
-                    new_row = drop_row + offset
-                    target.insertRow(new_row)
-                    for col, data in enumerate(row_data):
-                        item = QtWidgets.QTableWidgetItem(data)
-                        target.setItem(new_row, col, item)
-
-                    # Обновляем mods_data и стиль
-                    mod_path = f"mod/{row_data[3]}"
-                    if target == self.ui.disabled_mods_table:
-                        if mod_path in self.manager.mods_data["enabled_mods"]:
-                            del self.manager.mods_data["enabled_mods"][mod_path]
-                    else:
-                        is_temp_disabled = not self.manager.mods_data["enabled_mods"].get(mod_path, True)
-                        self.manager.mods_data["enabled_mods"][mod_path] = True
-                        if is_temp_disabled:
-                            self.helpers.toggle_temp_disable(target, new_row)
-            else:
-                row_data_list = []
-                for row in selected_rows:
-                    row_data = []
-                    for col in range(source.columnCount()):
-                        item = source.item(row, col)
-                        row_data.append(item.text() if item else "")
-                    row_data_list.append(row_data)
-
-                for row in reversed(selected_rows):
-                    source.removeRow(row)
-
-                for row_data in row_data_list:
-                    target.insertRow(target.rowCount())
-                    for col, data in enumerate(row_data):
-                        target.setItem(target.rowCount() - 1, col, QtWidgets.QTableWidgetItem(data))
-
-            self.helpers.update_enabled_mods_order()
-            event.accept()
-            self.manager.sync_enabled_mods()
-            self.helpers.save_groups_to_manager()
-            self.helpers.refresh_toggle_buttons(target)
-            self.load_colors()
+        if not selected_rows or any(self.helpers.is_header_row(source, row) for row in selected_rows):
+            event.ignore()
             return
-        else:
-            # Это случай, когда мы перетаскиваем между таблицами (включение/отключение модов)
-            selected_items = source.selectedItems()
-            selected_rows = sorted(set(item.row() for item in selected_items))
 
-            if any(self.helpers.is_header_row(source, row) for row in selected_rows):
-                event.ignore()
-                return
+        drop_row = self.helpers.row_at(target, event.pos().y())
+        if drop_row == -1:
+            drop_row = target_model.rowCount()
 
-            drop_row = target.rowAt(event.pos().y())
-            if drop_row == -1:
-                drop_row = target.rowCount()
-
-            row_data_list = []
-            for row in selected_rows:
-                row_data = []
-                for col in range(source.columnCount()):
-                    item = source.item(row, col)
-                    row_data.append(item.text() if item else "")
-                row_data_list.append(row_data)
-
-            for row in reversed(selected_rows):
-                source.removeRow(row)
-
-            for offset, row_data in enumerate(row_data_list):
-                target.insertRow(drop_row + offset)
-                for col, data in enumerate(row_data):
-                    target.setItem(drop_row + offset, col, QtWidgets.QTableWidgetItem(data))
-
-                # Обновляем mods_data
-                mod_path = f"mod/{row_data[3]}"  # Предполагается, что путь мода находится в 4-м столбце
-                if target == self.ui.disabled_mods_table:
-                    # Мод отключен
-                    if mod_path in self.manager.mods_data["enabled_mods"]:
-                        del self.manager.mods_data["enabled_mods"][mod_path]
-                else:
-                    # Мод включен
-                    self.manager.mods_data["enabled_mods"][mod_path] = True
+        moved_mods = source_model.take_rows(selected_rows)
+        if source == target:
+            # Rows taken out above the drop position shift it up
+            drop_row -= sum(1 for row in selected_rows if row < drop_row)
+        target_model.insert_rows(drop_row, moved_mods)
 
-        self.helpers.update_enabled_mods_order()
+        mod_paths = [mod['path'] for mod in moved_mods]
+        if source != target:
+            # Это случай, когда мы перетаскиваем между таблицами (включение/отключение модов)
+            # The same index-only set_enabled as toggle_mods; the drop decides where the rows go
+            self.manager.set_enabled(mod_paths, target == self.ui.enabled_mods_table, save=False)
+        if target == self.ui.enabled_mods_table:
+            # The dropped block goes in front of the first mod below it in the table
+            following = (target_model.mod_path(row) for row in range(drop_row + len(moved_mods), target_model.rowCount()))
+            self.manager.move_mods(mod_paths, next((path for path in following if path), None), save=False)
+        self.manager.save_mods()
         event.accept()
-        self.manager.sync_enabled_mods()
-        self.manager.save_mods()  # Сохраняем изменения
-        self.manager.save_temp_mods()  # Сохраняем изменения в temp_mods
         self.helpers.save_groups_to_manager()
-        self.helpers.refresh_toggle_buttons(target)
-        self.load_colors()
+        self.helpers.update_conflict_cells()
+        self.helpers.update_winners()
+        self.helpers.select_rows(target, range(drop_row, drop_row + len(moved_mods)))
 
     def dragEnterEvent(self, event):
         event.accept()
@@ -279,13 +508,13 @@ class UIManagerOperations:
     def show_context_menu(self, position):
         table = self.ui.sender()
         global_position = table.viewport().mapToGlobal(position)
-        selected_items = table.selectedItems()
-        if not selected_items:
+        selected_rows = self.helpers.selected_rows(table)
+        if not selected_rows:
             return
 
-        selected_item = table.itemAt(position)
+        row = self.helpers.row_at(table, position.y())
         column = table.columnAt(position.x())
-        self.helpers.create_context_menu(table, selected_item, column, global_position, selected_items)
+        self.helpers.create_context_menu(table, row, column, global_position, selected_rows)
 
     def apply_stylesheet(self):
         self.helpers.apply_stylesheet()